@@ -69,6 +69,15 @@ class VerboseCLIOption(FlagCLIOption):
         super().__init__("verbose", "verbose logging")
 
 
+class NoLearningCLIOption(FlagCLIOption):
+    def __init__(self):
+        super().__init__(
+            "no-learning",
+            "classify the decks of concurrent requests in batches, without "
+            "learning them",
+        )
+
+
 class InputFileCLIOption(ValuedCLIOption):
     def __init__(
         self,
@@ -103,3 +112,93 @@ class OutputFileCLIOption(ValuedCLIOption):
             multiple_allowed,
             "output file",
         )
+
+
+class PortCLIOption(ValuedCLIOption):
+    def __init__(
+        self,
+        choices=None,
+        default_value=None,
+        required=False,
+        multiple_allowed=False,
+    ):
+        super().__init__(
+            "port",
+            choices,
+            default_value,
+            required,
+            multiple_allowed,
+            "port to listen on",
+        )
+
+
+class BatchSizeCLIOption(ValuedCLIOption):
+    def __init__(
+        self,
+        choices=None,
+        default_value=None,
+        required=False,
+        multiple_allowed=False,
+    ):
+        super().__init__(
+            "batch-size",
+            choices,
+            default_value,
+            required,
+            multiple_allowed,
+            "maximum number of decks classified in a batch",
+        )
+
+
+class MaxWaitCLIOption(ValuedCLIOption):
+    def __init__(
+        self,
+        choices=None,
+        default_value=None,
+        required=False,
+        multiple_allowed=False,
+    ):
+        super().__init__(
+            "max-wait",
+            choices,
+            default_value,
+            required,
+            multiple_allowed,
+            "maximum seconds a deck waits for its batch to fill up",
+        )
+
+
+class FoldsCLIOption(ValuedCLIOption):
+    def __init__(
+        self,
+        choices=None,
+        default_value=None,
+        required=False,
+        multiple_allowed=False,
+    ):
+        super().__init__(
+            "folds",
+            choices,
+            default_value,
+            required,
+            multiple_allowed,
+            "number of cross-validation folds (leave-one-out if omitted)",
+        )
+
+
+class BrewThresholdCLIOption(ValuedCLIOption):
+    def __init__(
+        self,
+        choices=None,
+        default_value=None,
+        required=False,
+        multiple_allowed=False,
+    ):
+        super().__init__(
+            "brew-threshold",
+            choices,
+            default_value,
+            required,
+            multiple_allowed,
+            "minimum similarity of a deck not classified as a brew",
+        )
@@ -2,11 +2,33 @@
 from pauperformance_bot.cli.builder.command import CLICommand
 from pauperformance_bot.cli.builder.group import CLIGroup
 from pauperformance_bot.cli.builder.options import (
+    BatchSizeCLIOption,
+    BrewThresholdCLIOption,
+    FoldsCLIOption,
     InputFileCLIOption,
+    MaxWaitCLIOption,
+    NoLearningCLIOption,
     OutputFileCLIOption,
+    PortCLIOption,
 )
-from pauperformance_bot.constant.cli import DPL_META_SILVER_CMD, SILVER_CLI_GROUP
-from pauperformance_bot.task.silver import main
+from pauperformance_bot.constant.cli import (
+    DPL_META_SILVER_CMD,
+    EVALUATE_SILVER_CMD,
+    SERVE_SILVER_CMD,
+    SILVER_CLI_GROUP,
+    SIMILARITY_GRAPH_SILVER_CMD,
+)
+from pauperformance_bot.constant.pauperformance.myr import (
+    SILVER_EVALUATION_FILE,
+    SIMILARITY_GRAPH_FILE,
+)
+from pauperformance_bot.constant.pauperformance.silver import (
+    BREW_CLASSIFICATION_THRESHOLD,
+    CLASSIFICATION_SERVER_BATCH_SIZE,
+    CLASSIFICATION_SERVER_MAX_WAIT,
+    CLASSIFICATION_SERVER_PORT,
+)
+from pauperformance_bot.task.silver import evaluate, main, serve, similarity_graph
 from pauperformance_bot.util.log import get_application_logger
 
 logger = get_application_logger(SILVER_CLI_GROUP)
@@ -28,8 +50,63 @@ class DPLMetaCommand(CLICommand):
         main(input_file, output_file)
 
 
+class ServeCommand(CLICommand):
+    def __init__(self):
+        super().__init__(
+            SERVE_SILVER_CMD,
+            "Serve APL and DPL deck classification over HTTP.",
+            [
+                PortCLIOption(default_value=str(CLASSIFICATION_SERVER_PORT)),
+                BatchSizeCLIOption(default_value=str(CLASSIFICATION_SERVER_BATCH_SIZE)),
+                MaxWaitCLIOption(default_value=str(CLASSIFICATION_SERVER_MAX_WAIT)),
+                NoLearningCLIOption(),
+            ],
+        )
+
+    def dispatch_cmd(self, port, batch_size, max_wait, no_learning, *args, **kwargs):
+        super().dispatch_cmd(*args, **kwargs)
+        serve(int(port), int(batch_size), float(max_wait), not no_learning)
+
+
+class EvaluateCommand(CLICommand):
+    def __init__(self):
+        super().__init__(
+            EVALUATE_SILVER_CMD,
+            "Cross-validate the deck classifier on its training data.",
+            [
+                FoldsCLIOption(),
+                BrewThresholdCLIOption(
+                    default_value=str(BREW_CLASSIFICATION_THRESHOLD)
+                ),
+                OutputFileCLIOption(default_value=SILVER_EVALUATION_FILE),
+            ],
+        )
+
+    def dispatch_cmd(self, folds, brew_threshold, output_file, *args, **kwargs):
+        super().dispatch_cmd(*args, **kwargs)
+        evaluate(int(folds) if folds else None, float(brew_threshold), output_file)
+
+
+class SimilarityGraphCommand(CLICommand):
+    def __init__(self):
+        super().__init__(
+            SIMILARITY_GRAPH_SILVER_CMD,
+            "Store the most similar decks of each tournament deck.",
+            [OutputFileCLIOption(default_value=SIMILARITY_GRAPH_FILE)],
+        )
+
+    def dispatch_cmd(self, output_file, *args, **kwargs):
+        super().dispatch_cmd(*args, **kwargs)
+        similarity_graph(output_file)
+
+
 class SilverGroup(CLIGroup):
-    _cli_commands = [DPLMetaCommand()]
+    _cli_commands = [
+        DPLMetaCommand(),
+        ServeCommand(),
+        EvaluateCommand(),
+        SimilarityGraphCommand(),
+    ]
 
     def __init__(self):
         super().__init__(SILVER_CLI_GROUP, self._cli_commands)
@@ -11,3 +11,6 @@ UPDATE2_ACADEMY_CMD = "update2"
 
 SILVER_CLI_GROUP = "silver"
 DPL_META_SILVER_CMD = "dpl-meta"
+SERVE_SILVER_CMD = "serve"
+EVALUATE_SILVER_CMD = "evaluate"
+SIMILARITY_GRAPH_SILVER_CMD = "similarity-graph"
@@ -2,3 +2,7 @@ WEBSITE_URL = "https://scryfall.com"
 API_ENDPOINT = "https://api.scryfall.com"
 REQUESTS_SLEEP_SECONDS = 1
 USER_AGENT = "PauperformanceBot/1.0"
+# max number of cards kept in memory by the card store
+SCRYFALL_CARDS_LRU_SIZE = 4096
+# bytes read at a time when streaming a bulk data file
+BULK_DATA_CHUNK_SIZE = 1 << 20
@@ -9,6 +9,29 @@ PAUPERFORMANCE_BOT_DIR = posix_path(
 )  # for user data
 SECRETS_UNTRACKED_FILE = "pauperformance_bot.p13_secrets.py"
 HOME_CACHE_DIR = posix_path(Path.home().as_posix(), ".cache", "pauperformance")
+DECKLASSIFIER_MODEL_CACHE_DIR = posix_path(HOME_CACHE_DIR, "decklassifier")
+DECKLASSIFIER_RESULTS_CACHE_FILE = posix_path(
+    HOME_CACHE_DIR, "decklassifier_results.sqlite"
+)
+DECK_DEDUP_INDEX_FILE = posix_path(HOME_CACHE_DIR, "deck_dedup_index.json")
+# card stores of the Scryfall cards cache dirs, one per dir (see get_card_store)
+SCRYFALL_CARDS_DB_DIR = posix_path(HOME_CACHE_DIR, "scryfall_cards")
+# frozen decks the classifier benchmark runs on, and its results (one per line)
+SILVER_BENCHMARK_FIXTURE_FILE = posix_path(HOME_CACHE_DIR, "silver_benchmark.json")
+SILVER_BENCHMARK_RESULTS_FILE = posix_path(
+    HOME_CACHE_DIR, "silver_benchmark_results.jsonl"
+)
+# confusion matrix and per-archetype precision/recall of the classifier
+SILVER_EVALUATION_FILE = posix_path(HOME_CACHE_DIR, "silver_evaluation.json")
+# top-k similarity graph of the tournament decks
+SIMILARITY_GRAPH_FILE = posix_path(HOME_CACHE_DIR, "similarity_graph.npz")
+# memory-mapped columns (set, name, URI) of the pauper cards index
+CARDS_INDEX_COLUMNS_DIR = posix_path(HOME_CACHE_DIR, "cards_index_columns")
+# sources of the decks in the deduplication index
+MTGGOLDFISH_DECK_SOURCE = "mtggoldfish"
+DPL_DECK_SOURCE = "dpl"
+DECKSTATS_DECK_SOURCE = "deckstats"
+ARCHIVE_DECK_SOURCE = "archive"
 
 # Local storage
 STORAGE_DIR = posix_path(PAUPERFORMANCE_BOT_DIR, "storage")
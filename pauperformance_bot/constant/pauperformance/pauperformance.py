@@ -873,3 +873,8 @@ INCREMENTAL_CARDS_INDEX_SKIP_SETS = [
     1058,
     1069,
 ]
+
+# sets whose full Scryfall cards are kept in memory, when loaded on demand
+CARD_INDEX_LOADED_SETS = 4
+# max number of fixed card names remembered (see fix_card_name)
+FIXED_CARD_NAMES_CACHE_SIZE = 16384
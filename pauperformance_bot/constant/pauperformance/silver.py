@@ -1,6 +1,46 @@
 MAINBOARD_WEIGHT = 1
 SIDEBOARD_WEIGHT = 0.25
+# relative weights of mainboard and sideboard similarity in the deck similarity
+MAINBOARD_SIMILARITY_WEIGHT = 3
+SIDEBOARD_SIMILARITY_WEIGHT = 1
 BREW_CLASSIFICATION_THRESHOLD = 0.78
+# max number of decks scored by a single matrix product
+CLASSIFICATION_BATCH_SIZE = 1024
+# number of deck files loaded and classified by a worker process per task
+CLASSIFICATION_CHUNK_SIZE = 256
+# if set, decks are only compared with the decks of the archetypes whose centroids
+# are the closest ones, up to this many archetypes
+CENTROID_PREFILTER_ARCHETYPES = None
+# decks of concurrent requests to the classification server are classified together,
+# up to this many decks, waiting for more decks up to this many seconds (defaults)
+CLASSIFICATION_SERVER_BATCH_SIZE = 256
+CLASSIFICATION_SERVER_MAX_WAIT = 0.01
+CLASSIFICATION_SERVER_PORT = 8000
+# number of latest classifications whose latency is summarized by percentiles
+CLASSIFICATION_LATENCY_WINDOW = 10000
+# max number of decks learned while classifying (the oldest ones are forgotten)
+LEARNED_DECKS_CAPACITY = 4096
+# max number of reference decks loaded concurrently when preloading them
+REFERENCE_DECKS_THREADS = 8
+# the classifier benchmark holds out every n-th labelled deck of its fixture, and
+# measures throughput as the best of this many rounds
+BENCHMARK_HOLDOUT = 5
+BENCHMARK_ROUNDS = 3
+# max number of unlabelled cached decks added to the benchmark fixture as queries
+BENCHMARK_MAX_QUERIES = 1000
+# the similarity graph links each deck to its k most similar decks, if at least this
+# similar, scoring blocks of this many decks at a time
+SIMILARITY_GRAPH_K = 20
+SIMILARITY_GRAPH_MIN_SIMILARITY = 0.5
+SIMILARITY_GRAPH_BLOCK_SIZE = 512
+# decks at least this similar are considered near-duplicates
+NEAR_DUPLICATE_SIMILARITY = 0.95
+# cached classifications are dropped once older than this many seconds, and the
+# oldest ones beyond this many classifications (whatever classifier computed them)
+DECKLASSIFIER_RESULTS_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+DECKLASSIFIER_RESULTS_CACHE_MAX_SIZE = 1_000_000
+# bump when changes to the classifier invalidate the stored model snapshots
+DECKLASSIFIER_MODEL_VERSION = 2
 # TODO: set below to True after all YT is indexed
 FORBID_INVALID_DECKS = False
 
@@ -83,6 +83,26 @@ class ChangelogEntry:
         return hash(self.text)
 
 
+@auto_repr
+@auto_str
+class ArchetypeSignature:
+    """Cards identifying an archetype: at least min_cards of them must be played.
+
+    Signatures are checked before comparing decks, lowest priority first.
+    """
+
+    def __init__(
+        self,
+        *,
+        cards: list[str],
+        min_cards: int,
+        priority: int,
+    ):
+        self.cards: list[str] = cards
+        self.min_cards: int = min_cards
+        self.priority: int = priority
+
+
 @auto_repr
 @auto_str
 class ArchetypeConfig:
@@ -101,6 +121,7 @@ class ArchetypeConfig:
         resource_sideboards: list[SideboardResource],
         resources_discord: list[DiscordResource],
         resources: list[Resource],
+        signature: Optional[ArchetypeSignature] = None,
     ):
         self.name: str = name
         self.aliases: Optional[list[str]] = aliases
@@ -114,6 +135,7 @@ class ArchetypeConfig:
         self.resource_sideboards: list[SideboardResource] = resource_sideboards
         self.resources_discord: list[DiscordResource] = resources_discord
         self.resources: list[Resource] = resources
+        self.signature: Optional[ArchetypeSignature] = signature
 
     def __hash__(self):
         return hash(self.name)
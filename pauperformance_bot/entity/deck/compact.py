@@ -0,0 +1,157 @@
+from array import array
+from threading import Lock
+from typing import Iterable, Optional
+
+from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.playable import (
+    PlayableDeck,
+    PlayedCard,
+    get_deck_digest,
+)
+
+# ids and quantities are stored as unsigned shorts
+_MAX_ID = 2**16 - 1
+
+
+class CardNameTable:
+    """Thread-safe intern table mapping card names to small integer ids."""
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        self._lock: Lock = Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        card_id = self._ids.get(name)
+        if card_id is not None:
+            return card_id
+        with self._lock:
+            card_id = self._ids.get(name)
+            if card_id is None:
+                if len(self._names) > _MAX_ID:
+                    raise OverflowError(f"Too many card names to intern {name}.")
+                self._names.append(name)
+                card_id = self._ids[name] = len(self._names) - 1
+            return card_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name(self, card_id: int) -> str:
+        return self._names[card_id]
+
+
+CARD_NAMES = CardNameTable()
+
+
+def _to_arrays(board: Iterable[PlayedCard]) -> tuple[array, array]:
+    ids, quantities = array("H"), array("H")
+    for played_card in board:
+        ids.append(CARD_NAMES.intern(played_card.card_name))
+        quantities.append(played_card.quantity)
+    return ids, quantities
+
+
+class CompactDeck:
+    """Read-only PlayableDeck with interned card names, for bulk corpora.
+
+    Each board is a pair of parallel unsigned short arrays (card ids and
+    quantities), with card names stored once in CARD_NAMES. It exposes the read
+    side of PlayableDeck (boards are materialized on access) and converts back
+    to an equal PlayableDeck, preserving card order and names.
+    """
+
+    __slots__ = ("_main_ids", "_main_quantities", "_side_ids", "_side_quantities")
+
+    def __init__(self, mainboard: list[PlayedCard], sideboard: list[PlayedCard]):
+        self._main_ids, self._main_quantities = _to_arrays(mainboard)
+        self._side_ids, self._side_quantities = _to_arrays(sideboard)
+
+    @classmethod
+    def from_playable(cls, playable_deck: PlayableDeck) -> "CompactDeck":
+        return cls(playable_deck.mainboard, playable_deck.sideboard)
+
+    @classmethod
+    def from_cards_maps(
+        cls, mainboard: dict[str, int], sideboard: dict[str, int]
+    ) -> "CompactDeck":
+        return cls(
+            [PlayedCard(q, c) for c, q in mainboard.items()],
+            [PlayedCard(q, c) for c, q in sideboard.items()],
+        )
+
+    def to_playable(self, raise_error_if_invalid=False) -> PlayableDeck:
+        return PlayableDeck(self.mainboard, self.sideboard, raise_error_if_invalid)
+
+    @staticmethod
+    def _board(ids: array, quantities: array) -> list[PlayedCard]:
+        return [PlayedCard(q, CARD_NAMES.name(i)) for i, q in zip(ids, quantities)]
+
+    @staticmethod
+    def _cards_map(ids: array, quantities: array) -> dict[str, int]:
+        return {CARD_NAMES.name(i): q for i, q in zip(ids, quantities)}
+
+    @property
+    def mainboard(self) -> list[PlayedCard]:
+        return self._board(self._main_ids, self._main_quantities)
+
+    @property
+    def sideboard(self) -> list[PlayedCard]:
+        return self._board(self._side_ids, self._side_quantities)
+
+    @property
+    def mainboard_cards_map(self) -> dict[str, int]:
+        return self._cards_map(self._main_ids, self._main_quantities)
+
+    @property
+    def sideboard_cards_map(self) -> dict[str, int]:
+        return self._cards_map(self._side_ids, self._side_quantities)
+
+    @property
+    def card_names(self) -> frozenset[str]:
+        return frozenset(
+            CARD_NAMES.name(i) for ids in (self._main_ids, self._side_ids) for i in ids
+        )
+
+    @property
+    def digest(self) -> str:
+        return get_deck_digest(self.mainboard, self.sideboard)
+
+    @property
+    def len_mainboard(self):
+        return sum(self._main_quantities)
+
+    @property
+    def len_sideboard(self):
+        return sum(self._side_quantities)
+
+    def __contains__(self, item):
+        card_id = CARD_NAMES.get(item)
+        return card_id is not None and (
+            card_id in self._main_ids or card_id in self._side_ids
+        )
+
+    def is_legal(self, banned_cards_names):
+        return self.card_names.isdisjoint(banned_cards_names)
+
+    def can_belong_to_archetype(self, archetype: ArchetypeConfig) -> bool:
+        return all(c in self for c in archetype.must_have_cards) and not any(
+            c in self for c in archetype.must_not_have_cards
+        )
+
+    def __str__(self):
+        return str(self.to_playable())
+
+    def __repr__(self):
+        return repr(self.to_playable())
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __eq__(self, other):
+        if isinstance(other, (CompactDeck, PlayableDeck)):
+            return self.digest == other.digest
+        return NotImplemented
@@ -1,5 +1,7 @@
+import hashlib
+import json
 from itertools import chain
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
 from pauperformance_bot.constant.pauperformance.silver import FORBID_INVALID_DECKS
 from pauperformance_bot.entity.config.archetype import ArchetypeConfig
@@ -36,7 +38,46 @@ class PlayedCard:
         return False
 
 
+class _BoardIndex:
+    """Name-to-quantity map and lowercase positions of the cards of a board."""
+
+    def __init__(self, board: list[PlayedCard]):
+        self.quantities: dict[str, int] = {
+            played_card.card_name: played_card.quantity for played_card in board
+        }
+        self.has_duplicates: bool = len(self.quantities) != len(board)
+        self.positions: dict[str, int] = {}
+        for i, played_card in enumerate(board):
+            self.positions.setdefault(played_card.card_name.lower(), i)
+
+
+def get_deck_digest(
+    mainboard: Iterable[PlayedCard], sideboard: Iterable[PlayedCard]
+) -> str:
+    """Returns the canonical digest of a deck.
+
+    Card names are compared in lowercase and repeated cards are merged, so that
+    decks with the same digest are equal no matter the order of their cards.
+    """
+    boards = []
+    for board in (mainboard, sideboard):
+        quantities: dict[str, int] = {}
+        for played_card in board:
+            name = played_card.card_name.lower()
+            quantities[name] = quantities.get(name, 0) + played_card.quantity
+        boards.append(sorted(quantities.items()))
+    return hashlib.sha1(json.dumps(boards).encode("utf-8")).hexdigest()
+
+
 class PlayableDeck:
+    """A mainboard and a sideboard of played cards.
+
+    Card maps, card names, the digest and the lowercase index used by
+    add_*/remove_* are built lazily and kept current by add_*/remove_*, which never
+    mutate the PlayedCard instances they are given (they may be shared with other
+    decks). Boards should only be changed through them.
+    """
+
     MAINBOARD_MIN_AMOUNT = 60
     SIDEBOARD_MAX_AMOUNT = 15
     MAX_NON_LAND_QUANTITY = 4
@@ -72,6 +113,10 @@ class PlayableDeck:
             raise ValueError("\n".join(errors))
         self.mainboard: list[PlayedCard] = mainboard
         self.sideboard: list[PlayedCard] = sideboard
+        self._mainboard_index: Optional[_BoardIndex] = None
+        self._sideboard_index: Optional[_BoardIndex] = None
+        self._card_names: Optional[frozenset[str]] = None
+        self._digest: Optional[str] = None
 
     @property
     def mainboard_mtggoldfish(self):
@@ -82,18 +127,40 @@ class PlayableDeck:
         return "\n".join((f"{c.quantity} {c.card_name}" for c in self.sideboard))
 
     @property
-    def mainboard_cards_map(self):
-        return {
-            played_card.card_name: played_card.quantity
-            for played_card in self.mainboard
-        }
+    def _main_index(self) -> _BoardIndex:
+        if self._mainboard_index is None:
+            self._mainboard_index = _BoardIndex(self.mainboard)
+        return self._mainboard_index
 
     @property
-    def sideboard_cards_map(self):
-        return {
-            played_card.card_name: played_card.quantity
-            for played_card in self.sideboard
-        }
+    def _side_index(self) -> _BoardIndex:
+        if self._sideboard_index is None:
+            self._sideboard_index = _BoardIndex(self.sideboard)
+        return self._sideboard_index
+
+    @property
+    def mainboard_cards_map(self) -> dict[str, int]:
+        # a copy: callers may change it, the deck is changed by add_*/remove_*
+        return dict(self._main_index.quantities)
+
+    @property
+    def sideboard_cards_map(self) -> dict[str, int]:
+        return dict(self._side_index.quantities)
+
+    @property
+    def card_names(self) -> frozenset[str]:
+        if self._card_names is None:
+            self._card_names = frozenset(
+                c.card_name for c in chain(self.mainboard, self.sideboard)
+            )
+        return self._card_names
+
+    @property
+    def digest(self) -> str:
+        """Canonical digest of the deck (see get_deck_digest)."""
+        if self._digest is None:
+            self._digest = get_deck_digest(self.mainboard, self.sideboard)
+        return self._digest
 
     @property
     def len_mainboard(self):
@@ -104,12 +171,7 @@ class PlayableDeck:
         return sum(c.quantity for c in self.sideboard)
 
     def is_legal(self, banned_cards_names):
-        banned_cards_names = set(banned_cards_names)
-        if len({c.card_name for c in self.mainboard} & banned_cards_names) != 0:
-            return False
-        if len({c.card_name for c in self.sideboard} & banned_cards_names) != 0:
-            return False
-        return True
+        return self.card_names.isdisjoint(banned_cards_names)
 
     def __str__(self):
         return (
@@ -125,53 +187,83 @@ class PlayableDeck:
         )
 
     def __hash__(self):
-        return hash(repr(self))
+        return hash(self.digest)
+
+    def __getstate__(self):
+        # cached views are rebuilt on demand, instead of being sent along
+        state = vars(self).copy()
+        state.update(_mainboard_index=None, _sideboard_index=None, _card_names=None)
+        return state
 
     def __eq__(self, other):
-        if not other or not isinstance(other, PlayableDeck):
-            return False
-        return sorted(self.mainboard) == sorted(other.mainboard) and sorted(
-            self.sideboard
-        ) == sorted(other.sideboard)
+        # CompactDeck compares with PlayableDeck (see CompactDeck.__eq__)
+        if not isinstance(other, PlayableDeck):
+            return NotImplemented
+        return self.digest == other.digest
 
     def __contains__(self, item):
-        return any(c.card_name == item for c in chain(self.mainboard, self.sideboard))
-
-    @staticmethod
-    def _add_card(played_card: PlayedCard, board: list):
-        for existing in board:
-            if existing.card_name.lower() == played_card.card_name.lower():
-                existing.quantity += played_card.quantity
-                return
-        board.append(PlayedCard(played_card.quantity, played_card.card_name))
+        return item in self.card_names
+
+    def _add_card(self, played_card: PlayedCard, board: list, index: _BoardIndex):
+        key = played_card.card_name.lower()
+        self._digest = None
+        i = index.positions.get(key)
+        if i is None:
+            index.positions[key] = len(board)
+            board.append(PlayedCard(played_card.quantity, played_card.card_name))
+            self._card_names = None
+        else:
+            board[i] = PlayedCard(
+                board[i].quantity + played_card.quantity, board[i].card_name
+            )
+        self._update_board_index(board, index, i if i is not None else -1)
 
     def add_mainboard_card(self, played_card: PlayedCard):
-        self._add_card(played_card, self.mainboard)
+        self._add_card(played_card, self.mainboard, self._main_index)
 
     def add_sideboard_card(self, played_card: PlayedCard):
-        self._add_card(played_card, self.sideboard)
-
-    @staticmethod
-    def _remove_card(played_card: PlayedCard, board: list):
-        for i, existing in enumerate(board):
-            if existing.card_name.lower() == played_card.card_name.lower():
-                if existing.quantity < played_card.quantity:
-                    raise ValueError(
-                        f"Cannot remove {played_card.quantity} copies of"
-                        f" '{played_card.card_name}': only {existing.quantity} in deck"
-                    )
-                if existing.quantity == played_card.quantity:
-                    board.pop(i)
-                else:
-                    existing.quantity -= played_card.quantity
-                return
-        raise ValueError(f"'{played_card.card_name}' not found in deck")
+        self._add_card(played_card, self.sideboard, self._side_index)
+
+    def _remove_card(self, played_card: PlayedCard, board: list, index: _BoardIndex):
+        i = index.positions.get(played_card.card_name.lower())
+        if i is None:
+            raise ValueError(f"'{played_card.card_name}' not found in deck")
+        existing = board[i]
+        if existing.quantity < played_card.quantity:
+            raise ValueError(
+                f"Cannot remove {played_card.quantity} copies of"
+                f" '{played_card.card_name}': only {existing.quantity} in deck"
+            )
+        self._digest = None
+        if existing.quantity == played_card.quantity:
+            board.pop(i)
+            self._card_names = None
+            # positions after i have shifted
+            self._reset_board_index(board)
+        else:
+            board[i] = PlayedCard(
+                existing.quantity - played_card.quantity, existing.card_name
+            )
+            self._update_board_index(board, index, i)
+
+    def _update_board_index(self, board: list, index: _BoardIndex, i: int):
+        if index.has_duplicates:
+            # the map keeps the last of several cards with the same name
+            self._reset_board_index(board)
+        else:
+            index.quantities[board[i].card_name] = board[i].quantity
+
+    def _reset_board_index(self, board: list):
+        if board is self.mainboard:
+            self._mainboard_index = _BoardIndex(board)
+        else:
+            self._sideboard_index = _BoardIndex(board)
 
     def remove_mainboard_card(self, played_card: PlayedCard):
-        self._remove_card(played_card, self.mainboard)
+        self._remove_card(played_card, self.mainboard, self._main_index)
 
     def remove_sideboard_card(self, played_card: PlayedCard):
-        self._remove_card(played_card, self.sideboard)
+        self._remove_card(played_card, self.sideboard, self._side_index)
 
     def can_belong_to_archetype(self, archetype: ArchetypeConfig) -> bool:
         for must_have_card in archetype.must_have_cards:
@@ -204,6 +296,20 @@ def parse_playable_deck_from_lines(lines, raise_error_if_invalid=True) -> Playab
     )
 
 
+def parse_playable_deck_from_text(deck_text: str) -> PlayableDeck:
+    """Parses the text of a deck file: mainboard, an empty line, sideboard."""
+    lines = [line.strip() for line in deck_text.splitlines()]
+    # the empty line closing the sideboard is lost if the text ends with it
+    if not lines or lines[-1] != "":
+        lines.append("")
+    return parse_playable_deck_from_lines(lines)
+
+
+def parse_playable_deck_from_file(playable_deck_file: str) -> PlayableDeck:
+    with open(playable_deck_file) as in_f:
+        return parse_playable_deck_from_text(in_f.read())
+
+
 def _get_plus_minus_diff(deck1_cards_map, deck2_cards_map):
     minus_list, plus_list = [], []
     for card, qty in deck1_cards_map.items():
@@ -0,0 +1,56 @@
+from typing import Any, Callable
+
+# returns the full Scryfall card, given its set and its position in the set
+ScryfallCardLoader = Callable[[int, int], dict[str, Any]]
+
+
+class PauperCard:
+    """A pauper common of the card index, with the fields its users read.
+
+    The full Scryfall card (a few KB of JSON) is not kept in memory, but loaded
+    on demand by scryfall_card.
+    """
+
+    __slots__ = ("name", "scryfall_uri", "p12e_code", "position", "_loader")
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        scryfall_uri: str,
+        p12e_code: int,
+        position: int,
+        loader: ScryfallCardLoader,
+    ):
+        self.name: str = name
+        self.scryfall_uri: str = scryfall_uri
+        # the set of the card, and its position in the card index of the set
+        self.p12e_code: int = p12e_code
+        self.position: int = position
+        self._loader: ScryfallCardLoader = loader
+
+    @property
+    def url(self) -> str:
+        return self.scryfall_uri.replace("?utm_source=api", "")
+
+    @property
+    def scryfall_card(self) -> dict[str, Any]:
+        return self._loader(self.p12e_code, self.position)
+
+    def __eq__(self, other):
+        return isinstance(other, PauperCard) and (
+            self.name,
+            self.scryfall_uri,
+            self.p12e_code,
+            self.position,
+        ) == (other.name, other.scryfall_uri, other.p12e_code, other.position)
+
+    def __hash__(self):
+        return hash((self.p12e_code, self.position))
+
+    def __repr__(self):
+        fq_class_name = ".".join([type(self).__module__, type(self).__qualname__])
+        return (
+            f"{fq_class_name}(name={self.name}, scryfall_uri={self.scryfall_uri}, "
+            f"p12e_code={self.p12e_code}, position={self.position})"
+        )
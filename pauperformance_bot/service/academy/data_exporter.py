@@ -2,7 +2,6 @@ import collections
 import csv
 import os
 import shutil
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import jsonpickle
@@ -14,6 +13,7 @@ from pauperformance_bot.constant.pauperformance.academy import (
     TOP_N_ARCHETYPES_PIE_CHART,
     AcademyFileSystem,
 )
+from pauperformance_bot.constant.pauperformance.myr import MTGGOLDFISH_DECK_SOURCE
 from pauperformance_bot.constant.pauperformance.silver import (
     BREW_CLASSIFICATION_THRESHOLD,
 )
@@ -24,13 +24,18 @@ from pauperformance_bot.entity.api.video import Video
 from pauperformance_bot.entity.deck.archive.abstract import AbstractArchivedDeck
 from pauperformance_bot.entity.deck.playable import (
     PlayableDeck,
-    parse_playable_deck_from_lines,
+    parse_playable_deck_from_file,
 )
 from pauperformance_bot.service.academy.data_loader import AcademyDataLoader
 from pauperformance_bot.service.pauperformance.config_reader import ConfigReader
+from pauperformance_bot.service.pauperformance.deck_dedup import DeckDedupIndex
 from pauperformance_bot.service.pauperformance.pauperformance import (
     PauperformanceService,
 )
+from pauperformance_bot.service.pauperformance.silver.classification_pool import (
+    classify_deck_files,
+    load_playable_deck_file,
+)
 from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
 from pauperformance_bot.service.pauperformance.silver.deckstatistics import (
     DeckstatisticsFactory,
@@ -46,6 +51,18 @@ from pauperformance_bot.util.path import (
 logger = get_application_logger()
 
 
+def _has_tournament_deck_metadata(tournament_decks_dir: str, deck_id: str) -> bool:
+    # decks without tournament metadata cannot be exported
+    tournament_deck_path = posix_path(tournament_decks_dir, f"{deck_id}.json")
+    if not os.path.isfile(tournament_deck_path):
+        logger.warning(
+            f"Unable to find tournament deck metadata: "
+            f"{tournament_deck_path}. Please, (re)download it first."
+        )
+        return False
+    return True
+
+
 class AcademyDataExporter:
     def __init__(
         self,
@@ -170,29 +187,28 @@ class AcademyDataExporter:
         logger.info(
             f"Exporting cards intel to {self.academy_fs.ASSETS_DATA_INTEL_CARD_DIR}..."
         )
-        cards_intel = {}
         archetypes_index = collections.defaultdict(set)
         logger.debug("Loading archetypes for each card...")
         for arch, decks in self.decklassifier.known_decks.items():
-            for deck, *_ in decks:
+            for deck in decks:
                 for played_card in deck.mainboard + deck.sideboard:
                     card = fix_card_name(played_card.card_name)
                     archetypes_index[card].add(arch.name)
 
-        for set_index, scryfall_cards in self.pauperformance.card_index.items():
+        # sets are exported one at a time, so that the full Scryfall cards of only
+        # the last few sets read are in memory
+        for set_index, cards in self.pauperformance.card_index.items():
             logger.debug(f"Processing set: {set_index}...")
-            for scryfall_card in scryfall_cards:
-                card_name = scryfall_card["name"]
-                cards_intel[card_name] = {}
-                cards_intel[card_name]["scryfall"] = scryfall_card
-                if card_name in archetypes_index:
-                    cards_intel[card_name]["archetypes"] = archetypes_index[card_name]
-                else:
-                    cards_intel[card_name]["archetypes"] = set()
+            for card in cards:
+                card_name = card.name
+                card_intel = {
+                    "scryfall": card.scryfall_card,
+                    "archetypes": archetypes_index.get(card_name, set()),
+                }
                 safe_dump_json_to_file(
                     self.academy_fs.ASSETS_DATA_INTEL_CARD_DIR,
                     f"{safe_posix_path(card_name)}.json",
-                    cards_intel[card_name],
+                    card_intel,
                 )
         logger.info(
             f"Exported cards intel to {self.academy_fs.ASSETS_DATA_INTEL_CARD_DIR}."
@@ -357,58 +373,63 @@ class AcademyDataExporter:
             f"Exported decks intel to {self.academy_fs.ASSETS_DATA_INTEL_DECK_DIR}."
         )
 
-    def _classify_deck_file(self, playable_deck_file: str):
-        deck_id = playable_deck_file.split("/")[-1].replace(".txt", "")
+    def _load_tournament_deck(self, deck_id: str) -> MTGGoldfishTournamentDeck:
         # A PlayableDeck has no knowledge about the time it was created.
         # This information is stored in the tournament metadata for the deck.
         tournament_deck_path = posix_path(
             self.academy_fs.ASSETS_DATA_TOURNAMENT_MTGGOLDFISH_DECKS_DIR,
             f"{deck_id}.json",
         )
-        try:
-            with open(tournament_deck_path) as f:
-                tournament_deck: MTGGoldfishTournamentDeck = jsonpickle.decode(f.read())
-        except FileNotFoundError:
-            logger.warning(
-                f"Unable to find tournament deck metadata: "
-                f"{tournament_deck_path}. Please, (re)download it first."
-            )
-            return None
-        logger.debug(f"Classifying deck {playable_deck_file}...")
-        try:
-            with open(playable_deck_file) as f:
-                playable_deck = parse_playable_deck_from_lines(
-                    [line.strip() for line in f.readlines()]
-                )
-        except (IndexError, ValueError):
-            logger.warning(f"Unable to parse deck {playable_deck_file}...")
-            return None
-        most_similar_archetype, highest_similarity = self.decklassifier.classify_deck(
-            playable_deck
-        )
-        return deck_id, tournament_deck, most_similar_archetype, highest_similarity
+        with open(tournament_deck_path) as f:
+            return jsonpickle.decode(f.read())
 
     def _classify_mtggoldfish_tournament_decks(self):
         already_classified_deck_ids = set(
             p.as_posix().split("/")[-1].replace(".json", "")
             for p in Path(self.academy_fs.ASSETS_DATA_INTEL_DECK_DIR).rglob("*.json")
         )
-        unclassified_files = [
-            f.as_posix()
-            for f in Path(
-                self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR
-            ).glob("*.txt")
+        decks_dir = self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR
+        unclassified_deck_ids = [
+            f.stem
+            for f in sorted(Path(decks_dir).glob("*.txt"))
             if f.stem not in already_classified_deck_ids
+            and _has_tournament_deck_metadata(
+                self.academy_fs.ASSETS_DATA_TOURNAMENT_MTGGOLDFISH_DECKS_DIR, f.stem
+            )
+        ]
+        # identical lists are classified once, as the first of their ids
+        dedup_index = DeckDedupIndex()
+        dedup_index.index_decks(
+            MTGGOLDFISH_DECK_SOURCE,
+            unclassified_deck_ids,
+            lambda deck_id: load_playable_deck_file(
+                posix_path(decks_dir, f"{deck_id}.txt")
+            ),
+        )
+        duplicates = dedup_index.group_duplicates(
+            MTGGOLDFISH_DECK_SOURCE, unclassified_deck_ids
+        )
+        logger.info(
+            f"Found {len(duplicates)} distinct lists among "
+            f"{len(unclassified_deck_ids)} unclassified decks."
+        )
+        # decks are loaded and classified in chunks by a pool of processes
+        classifications = classify_deck_files(
+            self.decklassifier,
+            [posix_path(decks_dir, f"{deck_ids[0]}.txt") for deck_ids in duplicates],
+        )
+        archetypes = {a.name: a for a in self.decklassifier.archetypes}
+        loaded_decks = [
+            (deck_id, classification)
+            for deck_ids, classification in zip(duplicates, classifications)
+            if classification
+            for deck_id in deck_ids
         ]
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            results = list(executor.map(self._classify_deck_file, unclassified_files))
 
         myr_fs = self.pauperformance.config_reader.myr_file_system
         missing_rows = []
-        for result in results:
-            if result is None:
-                continue
-            deck_id, tournament_deck, similar_archetype, similarity_score = result
+        for deck_id, (similar_archetype_name, similarity_score) in loaded_decks:
+            similar_archetype = archetypes.get(similar_archetype_name)
             if not similar_archetype or not similarity_score:
                 logger.debug("Unable to find similar deck...")
                 continue
@@ -427,6 +448,7 @@ class AcademyDataExporter:
                 )
                 continue
             logger.debug("Similarity score sufficient. Storing intel...")
+            tournament_deck = self._load_tournament_deck(deck_id)
             tournament_deck.archetype = similar_archetype.name
             safe_dump_json_to_file(
                 posix_path(
@@ -494,9 +516,7 @@ class AcademyDataExporter:
                 continue  # no tournament, no party: skip the deck
             logger.debug(f"Classifying deck {playable_deck_file}...")
             try:
-                playable_deck = parse_playable_deck_from_lines(
-                    [line.strip() for line in open(playable_deck_file).readlines()]
-                )
+                playable_deck = parse_playable_deck_from_file(playable_deck_file)
             except (IndexError, ValueError):
                 logger.warning(f"Unable to parse deck {playable_deck_file}...")
                 continue
@@ -601,15 +621,7 @@ class AcademyDataExporter:
                     "name": set_info["name"],
                     "date": set_info["date"],
                     "cards": sorted(
-                        [
-                            {
-                                "name": card["name"],
-                                "url": card["scryfall_uri"].replace(
-                                    "?utm_source=api", ""
-                                ),
-                            }
-                            for card in cards
-                        ],
+                        [{"name": card.name, "url": card.url} for card in cards],
                         key=lambda c: c["name"],
                     ),
                 }
@@ -8,10 +8,8 @@ import jsonpickle
 
 from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
 from pauperformance_bot.entity.api.deck import Deck
-from pauperformance_bot.entity.deck.playable import (
-    PlayableDeck,
-    parse_playable_deck_from_lines,
-)
+from pauperformance_bot.entity.deck.compact import CompactDeck
+from pauperformance_bot.entity.deck.playable import parse_playable_deck_from_file
 from pauperformance_bot.util.log import get_application_logger
 from pauperformance_bot.util.path import posix_path
 
@@ -25,7 +23,7 @@ class AcademyDataLoader:
         self._academy_fs = academy_fs
 
     @lru_cache(maxsize=1)
-    def load_classified_decks(self, archetype: str) -> List[PlayableDeck]:
+    def load_classified_decks(self, archetype: str) -> List[CompactDeck]:
         """Returns a list of decks for the given archetype."""
         deck_dir = posix_path(self._academy_fs.ASSETS_DATA_INTEL_DECK_DIR, archetype)
         if not path.exists(deck_dir):
@@ -45,12 +43,12 @@ class AcademyDataLoader:
         return playable_decks
 
     @staticmethod
-    def __load_deck(playable_deck_txt) -> Optional[PlayableDeck]:
+    def __load_deck(playable_deck_txt) -> Optional[CompactDeck]:
         playable_deck = None
         try:
-            with open(playable_deck_txt) as playable_f:
-                lines = [line.strip() for line in playable_f.readlines()]
-                playable_deck = parse_playable_deck_from_lines(lines)
+            playable_deck = CompactDeck.from_playable(
+                parse_playable_deck_from_file(playable_deck_txt)
+            )
         except Exception as e:
             logger.error(f"Cannot parse {playable_deck_txt}. Error: {e}")
         finally:
@@ -0,0 +1,166 @@
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from os import path
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from pauperformance_bot.constant.mtg.scryfall import SCRYFALL_CARDS_LRU_SIZE
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+# max number of names looked up by a single query (SQLite default limit is 999)
+_MAX_QUERY_NAMES = 500
+
+
+def to_card_key(card_name: str) -> str:
+    """Returns the key of a (fixed) card name in the store.
+
+    Keys are case-insensitive, and slashes are replaced as in the names of the
+    legacy pickle files (see to_pkl_name), so that those can be imported.
+    """
+    return card_name.replace("/", "_").replace("\\", "_").casefold()
+
+
+class ScryfallCardStore:
+    """Persistent Scryfall cards, by card name, with an in-process LRU on top.
+
+    Cards are stored as pickles in a single SQLite file, instead of a pickle file
+    per card. Each operation opens its own connection, so the store can be shared
+    by threads and by forked processes. Read failures are logged and treated as
+    misses.
+    """
+
+    def __init__(self, db_file: str, lru_size: int = SCRYFALL_CARDS_LRU_SIZE):
+        self.db_file: str = db_file
+        self.lru_size: int = lru_size
+        self._lru: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lru_lock = threading.Lock()
+        os.makedirs(path.dirname(db_file) or ".", exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS card ("
+                "key TEXT PRIMARY KEY, "
+                "card BLOB NOT NULL) "
+                "WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_file, timeout=30)
+
+    def __len__(self):
+        with closing(self._connect()) as connection:
+            (count,) = connection.execute("SELECT COUNT(*) FROM card").fetchone()
+        return count
+
+    def _get_cached(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lru_lock:
+            card = self._lru.get(key)
+            if card is not None:
+                self._lru.move_to_end(key)
+            return card
+
+    def _cache(self, key: str, card: dict[str, Any]):
+        with self._lru_lock:
+            self._lru[key] = card
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get(self, card_name: str) -> Optional[dict[str, Any]]:
+        return self.get_many([card_name]).get(card_name)
+
+    def get_many(self, card_names: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Returns the stored cards among card_names, by name.
+
+        Names missing from the LRU are looked up by a single query (per chunk of
+        _MAX_QUERY_NAMES names).
+        """
+        cards: dict[str, dict[str, Any]] = {}
+        missing: dict[str, list[str]] = {}
+        for card_name in card_names:
+            key = to_card_key(card_name)
+            card = self._get_cached(key)
+            if card is not None:
+                cards[card_name] = card
+            else:
+                missing.setdefault(key, []).append(card_name)
+        if not missing:
+            return cards
+        keys = list(missing)
+        try:
+            with closing(self._connect()) as connection:
+                for start in range(0, len(keys), _MAX_QUERY_NAMES):
+                    chunk = keys[start : start + _MAX_QUERY_NAMES]
+                    rows = connection.execute(
+                        "SELECT key, card FROM card "
+                        f"WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    for key, serialized_card in rows:
+                        card = pickle.loads(serialized_card)
+                        self._cache(key, card)
+                        cards.update((name, card) for name in missing[key])
+        except sqlite3.Error as e:
+            logger.warning(f"Unable to read card store: {e}")
+        return cards
+
+    def put(self, card_name: str, card: dict[str, Any]):
+        self.put_many([(card_name, card)])
+
+    def put_many(self, cards: Iterable[tuple[str, dict[str, Any]]]):
+        cards = [(to_card_key(card_name), card) for card_name, card in cards]
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO card VALUES (?, ?)",
+                (
+                    (key, pickle.dumps(card, pickle.HIGHEST_PROTOCOL))
+                    for key, card in cards
+                ),
+            )
+        with self._lru_lock:
+            for key, _ in cards:
+                self._lru.pop(key, None)
+
+    def list_keys(self) -> set[str]:
+        with closing(self._connect()) as connection:
+            return {key for (key,) in connection.execute("SELECT key FROM card")}
+
+    def import_pickles(self, cards_cache_dir: str, missing_only: bool = False) -> int:
+        """Imports the pickle files of cards_cache_dir (one per card).
+
+        If missing_only is set, only the cards missing from the store are imported.
+        Files are left in place. Returns the number of imported cards.
+        """
+        logger.debug(f"Importing cards from pickle files in {cards_cache_dir}...")
+        known_keys = self.list_keys() if missing_only else set()
+        cards = []
+        for card_file in sorted(Path(cards_cache_dir).glob("*.pkl")):
+            if to_card_key(card_file.stem) in known_keys:
+                continue
+            try:
+                with open(card_file, "rb") as cache_f:
+                    cards.append((card_file.stem, pickle.load(cache_f)))
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning(f"Unable to import card from {card_file}: {e}")
+        self.put_many(cards)
+        logger.debug(f"Imported {len(cards)} cards from {cards_cache_dir}.")
+        return len(cards)
+
+    @classmethod
+    def open(
+        cls, db_file: str, legacy_cards_dir: Optional[str] = None, **kwargs
+    ) -> "ScryfallCardStore":
+        """Opens the store in db_file.
+
+        The pickle files of legacy_cards_dir that are missing from the store (e.g.
+        new ones pulled with the repository) are imported into it.
+        """
+        store = cls(db_file, **kwargs)
+        if legacy_cards_dir and path.isdir(legacy_cards_dir):
+            store.import_pickles(legacy_cards_dir, missing_only=True)
+        return store
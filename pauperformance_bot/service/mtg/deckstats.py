@@ -136,7 +136,8 @@ class DeckstatsService:
             pickle.dump(deck, cache_f)
         return deck
 
-    def to_playable_deck(self, deckstats_deck):
+    @staticmethod
+    def to_playable_deck(deckstats_deck):
         logger.info(f"Parsing deckstats deck {deckstats_deck['saved_id']} list...")
         main_section = next(
             s for s in deckstats_deck["sections"] if s["name"] == "Main"
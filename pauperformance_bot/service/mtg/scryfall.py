@@ -1,4 +1,6 @@
+import hashlib
 import json
+import os
 import pickle
 import time
 import urllib.parse
@@ -12,9 +14,13 @@ from pauperformance_bot.constant.mtg.scryfall import (
     USER_AGENT,
     WEBSITE_URL,
 )
-from pauperformance_bot.constant.pauperformance.myr import SCRYFALL_CARDS_CACHE_DIR
+from pauperformance_bot.constant.pauperformance.myr import (
+    SCRYFALL_CARDS_CACHE_DIR,
+    SCRYFALL_CARDS_DB_DIR,
+)
 from pauperformance_bot.entity.api.archetype import ArchetypeCard
 from pauperformance_bot.exceptions import CardNotFoundException
+from pauperformance_bot.service.mtg.card_store import ScryfallCardStore
 from pauperformance_bot.util.cache import to_pkl_name
 from pauperformance_bot.util.log import get_application_logger
 from pauperformance_bot.util.naming import fix_card_name
@@ -25,9 +31,16 @@ logger = get_application_logger()
 
 
 class ScryfallService:
-    def __init__(self, website_url=WEBSITE_URL, endpoint=API_ENDPOINT):
+    def __init__(
+        self,
+        website_url=WEBSITE_URL,
+        endpoint=API_ENDPOINT,
+        card_stores_dir=SCRYFALL_CARDS_DB_DIR,
+    ):
         self.website_url = website_url
         self.endpoint = endpoint
+        self.card_stores_dir = card_stores_dir
+        self._card_stores: dict[str, ScryfallCardStore] = {}
 
     def _execute_http_request(self, request_fn, url, **kwargs):
         headers = kwargs.pop("headers", {})
@@ -41,43 +54,92 @@ class ScryfallService:
         response = self._execute_http_request(method, url)
         return json.loads(response.content)
 
+    def get_card_store(
+        self, cards_cache_dir=SCRYFALL_CARDS_CACHE_DIR
+    ) -> ScryfallCardStore:
+        # the pickle files of the cache dir are shared through the repository, the
+        # store indexing them is kept out of it and imports the ones it misses
+        if cards_cache_dir not in self._card_stores:
+            cache_dir_digest = hashlib.sha1(
+                os.path.abspath(cards_cache_dir).encode("utf-8")
+            ).hexdigest()
+            self._card_stores[cards_cache_dir] = ScryfallCardStore.open(
+                posix_path(self.card_stores_dir, f"{cache_dir_digest}.sqlite3"),
+                legacy_cards_dir=cards_cache_dir,
+            )
+        return self._card_stores[cards_cache_dir]
+
     def get_card_named(
         self,
         exact_card_name,
         cards_cache_dir=SCRYFALL_CARDS_CACHE_DIR,
     ):
         exact_card_name = fix_card_name(exact_card_name)
+        card_store = self.get_card_store(cards_cache_dir)
+        card = card_store.get(exact_card_name)
+        if card is not None:
+            logger.debug(f"Loaded card from cache: {exact_card_name}")
+            return card
+        logger.debug(f"No cache found for card {exact_card_name}.")
+        return self._fetch_card_named(exact_card_name, cards_cache_dir)
+
+    def get_cards_named(
+        self,
+        card_names,
+        cards_cache_dir=SCRYFALL_CARDS_CACHE_DIR,
+        skip_missing=False,
+    ):
+        """Returns the cards named card_names, by name.
+
+        Cached cards are looked up all at once, the other ones are retrieved one
+        at a time as in get_card_named. Cards absent in Scryfall raise
+        CardNotFoundException, unless skip_missing is set.
+        """
+        fixed_card_names = {name: fix_card_name(name) for name in card_names}
+        card_store = self.get_card_store(cards_cache_dir)
+        found_cards = card_store.get_many(set(fixed_card_names.values()))
+        missing_cards = set()
+        cards = {}
+        for card_name, fixed_card_name in fixed_card_names.items():
+            if fixed_card_name in missing_cards:
+                continue
+            if fixed_card_name not in found_cards:
+                try:
+                    found_cards[fixed_card_name] = self._fetch_card_named(
+                        fixed_card_name, cards_cache_dir
+                    )
+                except CardNotFoundException:
+                    if not skip_missing:
+                        raise
+                    missing_cards.add(fixed_card_name)
+                    continue
+            cards[card_name] = found_cards[fixed_card_name]
+        logger.debug(f"Loaded {len(cards)} cards, {len(missing_cards)} missing.")
+        return cards
+
+    def _fetch_card_named(self, exact_card_name, cards_cache_dir):
+        url = f"{self.endpoint}/cards/named"
+        method = requests.get
+        params = {"exact": exact_card_name}
+        method = partial(method, params=params)
         try:
+            response = self._execute_http_request(method, url)
+            card = json.loads(response.content)
+            time.sleep(REQUESTS_SLEEP_SECONDS)
             with open(
-                posix_path(cards_cache_dir, to_pkl_name(exact_card_name)), "rb"
+                posix_path(cards_cache_dir, to_pkl_name(exact_card_name)), "wb"
             ) as cache_f:
-                card = pickle.load(cache_f)
-                logger.debug(f"Loaded card from cache: {exact_card_name}")
-                # logger.debug(f"Card: {card}")
-                return card
-        except FileNotFoundError:
-            logger.debug(f"No cache found for card {exact_card_name}.")
-            url = f"{self.endpoint}/cards/named"
-            method = requests.get
-            params = {"exact": exact_card_name}
-            method = partial(method, params=params)
-            try:
-                response = self._execute_http_request(method, url)
-                card = json.loads(response.content)
-                time.sleep(REQUESTS_SLEEP_SECONDS)
-                with open(
-                    posix_path(cards_cache_dir, to_pkl_name(exact_card_name)), "wb"
-                ) as cache_f:
-                    pickle.dump(card, cache_f)
-                return card
-            except requests.exceptions.HTTPError as exc:
-                time.sleep(REQUESTS_SLEEP_SECONDS)
-                if exc.response.status_code == 404:
-                    message = f"Absent card in Scryfall: {exact_card_name}."
-                    logger.warning(message)
-                    raise CardNotFoundException(message)
-                else:
-                    raise
+                pickle.dump(card, cache_f)
+            self.get_card_store(cards_cache_dir).put(exact_card_name, card)
+            return card
+        except requests.exceptions.HTTPError as exc:
+            time.sleep(REQUESTS_SLEEP_SECONDS)
+            if exc.response.status_code == 404:
+                message = f"Absent card in Scryfall: {exact_card_name}."
+                logger.warning(message)
+                raise CardNotFoundException(message)
+            else:
+                raise
 
     def search_cards(self, query):
         url = f"{self.endpoint}/cards/search"
@@ -132,8 +194,9 @@ class ScryfallService:
 
     def get_archetype_cards(self, cards) -> list[ArchetypeCard]:
         rendered_cards: list[ArchetypeCard] = []
+        scryfall_cards = self.get_cards_named(cards)
         for card in sorted(cards):
-            scryfall_card = self.get_card_named(card)
+            scryfall_card = scryfall_cards[card]
             if "image_uris" not in scryfall_card:  # e.g. Delver of Secrets
                 image_uris = scryfall_card["card_faces"][0]["image_uris"]
             else:
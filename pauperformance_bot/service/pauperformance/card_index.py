@@ -0,0 +1,291 @@
+import collections
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from pauperformance_bot.constant.mtg.scryfall import BULK_DATA_CHUNK_SIZE
+from pauperformance_bot.constant.pauperformance.myr import (
+    PAUPER_CARDS_INDEX_CACHE_DIR,
+    SET_INDEX_FILE,
+)
+from pauperformance_bot.constant.pauperformance.pauperformance import (
+    CARD_INDEX_LOADED_SETS,
+    KNOWN_SETS_WITH_NO_PAUPER_CARDS,
+)
+from pauperformance_bot.entity.mtg.pauper_card import PauperCard, ScryfallCardLoader
+from pauperformance_bot.util.json_stream import iter_json_array
+from pauperformance_bot.util.log import get_application_logger
+from pauperformance_bot.util.path import posix_path
+
+logger = get_application_logger()
+
+
+def load_set_index(set_index_file=SET_INDEX_FILE) -> Dict[int, Dict[str, Any]]:
+    with open(set_index_file, "r") as index_f:
+        json_set_index = json.load(index_f, object_pairs_hook=collections.OrderedDict)
+    return collections.OrderedDict({int(k): dict(v) for k, v in json_set_index.items()})
+
+
+def is_pauper_common(card: Dict[str, Any]) -> bool:
+    # as the Scryfall query "rarity:common legal:pauper"
+    return (
+        card.get("rarity") == "common"
+        and card.get("legalities", {}).get("pauper") == "legal"
+    )
+
+
+def iter_bulk_data_cards(
+    bulk_data_file: str, chunk_size: int = BULK_DATA_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yields the cards of a Scryfall bulk data file, parsing one at a time."""
+    with open(bulk_data_file, "rb") as bulk_f:
+        yield from iter_json_array(iter(partial(bulk_f.read, chunk_size), b""))
+
+
+def partition_cards_by_set(
+    cards: Iterable[Dict[str, Any]],
+    set_index: Dict[int, Dict[str, Any]],
+    skip_sets=KNOWN_SETS_WITH_NO_PAUPER_CARDS,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """Groups the pauper commons of cards by set (p12e_code), in one pass.
+
+    As in a Scryfall search, a set lists each card once (its first printing in
+    cards), sorted by name. Cards of sets missing from set_index are ignored.
+    """
+    p12e_codes = {s["scryfall_code"]: p12e_code for p12e_code, s in set_index.items()}
+    card_index = {p12e_code: [] for p12e_code in set_index}
+    set_card_names = collections.defaultdict(set)
+    for card in cards:
+        p12e_code = p12e_codes.get(card.get("set"))
+        if p12e_code is None or p12e_code in skip_sets or not is_pauper_common(card):
+            continue
+        if card["name"] in set_card_names[p12e_code]:
+            continue
+        set_card_names[p12e_code].add(card["name"])
+        card_index[p12e_code].append(card)
+    for set_cards in card_index.values():
+        set_cards.sort(key=lambda c: c["name"])
+    return card_index
+
+
+def build_card_index_from_bulk_data(
+    bulk_data_file: str,
+    set_index: Dict[int, Dict[str, Any]],
+    skip_sets=KNOWN_SETS_WITH_NO_PAUPER_CARDS,
+    cards_index_cache_dir=PAUPER_CARDS_INDEX_CACHE_DIR,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """Builds the card index from a Scryfall bulk data file, with no requests.
+
+    The file is e.g. the "Default Cards" dump (https://scryfall.com/docs/api/bulk-data).
+    The sets with pauper commons are stored in cards_index_cache_dir, as
+    PauperformanceService._build_card_index does.
+    """
+    logger.info(f"Building card index from bulk data {bulk_data_file}...")
+    card_index = partition_cards_by_set(
+        iter_bulk_data_cards(bulk_data_file), set_index, skip_sets
+    )
+    os.makedirs(cards_index_cache_dir, exist_ok=True)
+    for p12e_code, set_cards in card_index.items():
+        if len(set_cards) == 0:
+            continue
+        set_cache_file = posix_path(cards_index_cache_dir, f"{p12e_code}.json")
+        tmp_file = f"{set_cache_file}.tmp"
+        with open(tmp_file, "w") as cache_f:
+            cache_f.write(json.dumps(set_cards))
+        os.replace(tmp_file, set_cache_file)
+    logger.info(
+        f"Built card index from bulk data {bulk_data_file}: "
+        f"{sum(len(c) for c in card_index.values())} cards."
+    )
+    return card_index
+
+
+def get_card_index_stamp(cards_index_cache_dir: str, p12e_codes: Iterable[int]) -> str:
+    """Returns a stamp of the cache of the card index, changing with its files."""
+    stats = sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in os.scandir(cards_index_cache_dir)
+        if entry.name.endswith(".json")
+    )
+    digest = hashlib.sha1(json.dumps([stats, sorted(p12e_codes)]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode_strings(strings: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    # UTF-8 bytes of all the strings, and the offset of each one
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(strings: np.ndarray, offsets: np.ndarray, rows: range) -> list[str]:
+    # rows are contiguous: their bytes are read at once
+    row_offsets = offsets[rows.start : rows.stop + 1].tolist()
+    if not row_offsets:
+        return []
+    encoded = strings[row_offsets[0] : row_offsets[-1]].tobytes()
+    start = row_offsets[0]
+    return [
+        encoded[begin - start : end - start].decode("utf-8")
+        for begin, end in zip(row_offsets, row_offsets[1:])
+    ]
+
+
+class CardIndexColumns:
+    """Set, name and Scryfall URI of the cards of the card index, by column.
+
+    Cards are sorted by set, as in the set index, and within each set as in its
+    cache file. Strings are stored as UTF-8 bytes with offsets, and loaded
+    columns are memory-mapped: only the rows that are read are paged in.
+    """
+
+    _ARRAYS = (
+        "p12e_codes",
+        "names",
+        "name_offsets",
+        "scryfall_uris",
+        "scryfall_uri_offsets",
+    )
+    _MANIFEST_FILE = "manifest.json"
+
+    def __init__(
+        self,
+        *,
+        p12e_codes: np.ndarray,
+        names: np.ndarray,
+        name_offsets: np.ndarray,
+        scryfall_uris: np.ndarray,
+        scryfall_uri_offsets: np.ndarray,
+    ):
+        self.p12e_codes: np.ndarray = p12e_codes
+        self.names: np.ndarray = names
+        self.name_offsets: np.ndarray = name_offsets
+        self.scryfall_uris: np.ndarray = scryfall_uris
+        self.scryfall_uri_offsets: np.ndarray = scryfall_uri_offsets
+        codes, starts, counts = np.unique(
+            p12e_codes, return_index=True, return_counts=True
+        )
+        self._set_rows: dict[int, range] = {
+            int(code): range(int(start), int(start + count))
+            for code, start, count in zip(codes, starts, counts)
+        }
+
+    def __len__(self):
+        return len(self.p12e_codes)
+
+    @classmethod
+    def from_card_index(
+        cls, card_index: Dict[int, List[Dict[str, Any]]]
+    ) -> "CardIndexColumns":
+        cards = [(code, card) for code, cards in card_index.items() for card in cards]
+        names, name_offsets = _encode_strings(card["name"] for _, card in cards)
+        scryfall_uris, scryfall_uri_offsets = _encode_strings(
+            card["scryfall_uri"] for _, card in cards
+        )
+        return cls(
+            p12e_codes=np.array([code for code, _ in cards], dtype=np.int32),
+            names=names,
+            name_offsets=name_offsets,
+            scryfall_uris=scryfall_uris,
+            scryfall_uri_offsets=scryfall_uri_offsets,
+        )
+
+    def get_set_rows(self, p12e_code: int) -> range:
+        return self._set_rows.get(p12e_code, range(0))
+
+    def get_names(self, rows: range) -> list[str]:
+        return _decode_strings(self.names, self.name_offsets, rows)
+
+    def get_scryfall_uris(self, rows: range) -> list[str]:
+        return _decode_strings(self.scryfall_uris, self.scryfall_uri_offsets, rows)
+
+    def get_cards(self, p12e_code: int, loader: ScryfallCardLoader) -> list[PauperCard]:
+        rows = self.get_set_rows(p12e_code)
+        return [
+            PauperCard(
+                name=name,
+                scryfall_uri=scryfall_uri,
+                p12e_code=p12e_code,
+                position=position,
+                loader=loader,
+            )
+            for position, (name, scryfall_uri) in enumerate(
+                zip(self.get_names(rows), self.get_scryfall_uris(rows))
+            )
+        ]
+
+    def save(self, columns_dir: str, stamp: str):
+        """Stores the columns in columns_dir, as of the card index stamp."""
+        logger.info(f"Storing card index columns in {columns_dir}...")
+        tmp_dir = f"{columns_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for array in self._ARRAYS:
+            np.save(posix_path(tmp_dir, f"{array}.npy"), getattr(self, array))
+        with open(posix_path(tmp_dir, self._MANIFEST_FILE), "w") as out_f:
+            json.dump(
+                {"stamp": stamp, "date": datetime.now().date().isoformat()}, out_f
+            )
+        shutil.rmtree(columns_dir, ignore_errors=True)
+        os.replace(tmp_dir, columns_dir)
+        logger.info(f"Stored card index columns in {columns_dir}.")
+
+    @classmethod
+    def load(cls, columns_dir: str, stamp: str) -> Optional["CardIndexColumns"]:
+        """Memory-maps the columns in columns_dir.
+
+        Returns None if they are missing, or stale: stored with another stamp,
+        or on a previous day (sets with no cards yet may have some now).
+        """
+        try:
+            with open(posix_path(columns_dir, cls._MANIFEST_FILE), "r") as in_f:
+                manifest = json.load(in_f)
+            if (
+                manifest["stamp"] != stamp
+                or manifest["date"] != datetime.now().date().isoformat()
+            ):
+                logger.info(f"Card index columns in {columns_dir} are stale.")
+                return None
+            return cls(
+                **{
+                    array: np.load(
+                        posix_path(columns_dir, f"{array}.npy"), mmap_mode="r"
+                    )
+                    for array in cls._ARRAYS
+                }
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"Unable to load card index columns from {columns_dir}: {e}")
+            return None
+
+
+class SetCardsCache:
+    """Full Scryfall cards of the card index, read from the cache files on demand.
+
+    The cards of the last loaded_sets sets read are kept in memory, so that
+    reading the cards of a set one after the other parses its file once.
+    """
+
+    def __init__(
+        self,
+        cards_index_cache_dir: str = PAUPER_CARDS_INDEX_CACHE_DIR,
+        loaded_sets: int = CARD_INDEX_LOADED_SETS,
+    ):
+        self.cards_index_cache_dir: str = cards_index_cache_dir
+        self._load_set = lru_cache(maxsize=loaded_sets)(self._read_set)
+
+    def _read_set(self, p12e_code: int) -> List[Dict[str, Any]]:
+        set_cache_file = posix_path(self.cards_index_cache_dir, f"{p12e_code}.json")
+        logger.debug(f"Loading full cards from {set_cache_file}...")
+        with open(set_cache_file, "r", encoding="utf-8") as cache_f:
+            return json.load(cache_f)
+
+    def get_card(self, p12e_code: int, position: int) -> Dict[str, Any]:
+        return self._load_set(p12e_code)[position]
@@ -10,6 +10,7 @@ from pauperformance_bot.entity.api.creator import CreatorSheet
 from pauperformance_bot.entity.api.miscellanea import Changelog, Newspauper
 from pauperformance_bot.entity.config.archetype import (
     ArchetypeConfig,
+    ArchetypeSignature,
     ChangelogEntry,
     DiscordResource,
     SideboardResource,
@@ -192,6 +193,16 @@ class ConfigReader:
             for resource in self._read_sequential_resources(config, "resource")
         ]
 
+        signature = None
+        if "signature" in config:
+            section = config["signature"]
+            signature_cards = [c for c in section["cards"].split("\n") if c]
+            signature = ArchetypeSignature(
+                cards=signature_cards,
+                min_cards=int(section.get("min_cards") or len(signature_cards)),
+                priority=int(section.get("priority") or 0),
+            )
+
         return ArchetypeConfig(
             name=config["values"]["name"],
             aliases=self._parse_list_value(config["values"]["aliases"]),
@@ -205,6 +216,7 @@ class ConfigReader:
             resource_sideboards=resource_sideboards,
             resources_discord=resources_discord,
             resources=resources,
+            signature=signature,
         )
 
     def get_newspauper(self) -> Newspauper:
@@ -0,0 +1,236 @@
+import json
+import os
+import pickle
+from os import path
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.myr import (
+    ARCHIVE_DECK_SOURCE,
+    DECK_DEDUP_INDEX_FILE,
+    DECKSTATS_DECK_SOURCE,
+    DECKSTATS_DECKS_CACHE_DIR,
+    DPL_DECK_SOURCE,
+    MTGGOLDFISH_DECK_SOURCE,
+    MyrFileSystem,
+)
+from pauperformance_bot.entity.deck.compact import CompactDeck
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+from pauperformance_bot.exceptions import DeckstatsException
+from pauperformance_bot.service.mtg.deckstats import DeckstatsService
+from pauperformance_bot.service.pauperformance.archive.abstract import (
+    AbstractArchiveService,
+)
+from pauperformance_bot.service.pauperformance.silver.classification_pool import (
+    load_playable_deck_file,
+)
+from pauperformance_bot.util.log import get_application_logger
+from pauperformance_bot.util.path import posix_path
+
+logger = get_application_logger()
+
+# source (e.g. MTGGOLDFISH_DECK_SOURCE) and id of a deck in that source
+DeckSourceId = tuple[str, str]
+
+
+class DeckDedupIndex:
+    """Maps the digests of decks (see PlayableDeck.digest) to their source ids.
+
+    The same list is often known from several sources (e.g. a tournament deck
+    archived by a player, or submitted twice to DPL): it is indexed once, with all
+    of its ids. Decks are indexed by id, so they are parsed only once too.
+    """
+
+    def __init__(self):
+        self._source_ids: dict[str, list[DeckSourceId]] = {}
+        self._digests: dict[DeckSourceId, str] = {}
+
+    def __len__(self):
+        return len(self._source_ids)
+
+    def __contains__(self, deck: Union[PlayableDeck, CompactDeck]):
+        return deck.digest in self._source_ids
+
+    @property
+    def nr_source_ids(self) -> int:
+        return len(self._digests)
+
+    def is_indexed(self, source: str, deck_id: str) -> bool:
+        return (source, deck_id) in self._digests
+
+    def get_digest(self, source: str, deck_id: str) -> Optional[str]:
+        return self._digests.get((source, deck_id))
+
+    def get_source_ids(
+        self, deck: Union[str, PlayableDeck, CompactDeck]
+    ) -> list[DeckSourceId]:
+        digest = deck if isinstance(deck, str) else deck.digest
+        return list(self._source_ids.get(digest, []))
+
+    def add(
+        self, source: str, deck_id: str, deck: Union[PlayableDeck, CompactDeck]
+    ) -> bool:
+        """Indexes deck as deck_id of source, returning whether it is a new list."""
+        return self._add((source, deck_id), deck.digest)
+
+    def _add(self, source_id: DeckSourceId, digest: str) -> bool:
+        old_digest = self._digests.get(source_id)
+        if old_digest == digest:
+            return False
+        if old_digest is not None:
+            # the deck has changed since it was indexed
+            self._remove(source_id, old_digest)
+        self._digests[source_id] = digest
+        source_ids = self._source_ids.setdefault(digest, [])
+        source_ids.append(source_id)
+        return len(source_ids) == 1
+
+    def _remove(self, source_id: DeckSourceId, digest: str):
+        source_ids = self._source_ids[digest]
+        source_ids.remove(source_id)
+        if not source_ids:
+            del self._source_ids[digest]
+
+    def group_duplicates(self, source: str, deck_ids: Iterable[str]) -> list[list[str]]:
+        """Groups the deck_ids of source by list, in order of their first id.
+
+        Ids not indexed (e.g. decks that could not be parsed) are left alone.
+        """
+        groups: dict[Union[str, DeckSourceId], list[str]] = {}
+        for deck_id in deck_ids:
+            digest = self.get_digest(source, deck_id)
+            key = digest if digest is not None else (source, deck_id)
+            groups.setdefault(key, []).append(deck_id)
+        return list(groups.values())
+
+    def get_duplicates(self) -> dict[str, list[DeckSourceId]]:
+        """Returns the source ids of the lists known more than once, by digest."""
+        return {
+            digest: list(source_ids)
+            for digest, source_ids in self._source_ids.items()
+            if len(source_ids) > 1
+        }
+
+    def save(self, index_file: str):
+        logger.debug(f"Storing deck deduplication index in {index_file}...")
+        os.makedirs(path.dirname(index_file) or ".", exist_ok=True)
+        tmp_file = f"{index_file}.tmp"
+        with open(tmp_file, "w") as out_f:
+            json.dump(
+                {
+                    digest: [list(source_id) for source_id in source_ids]
+                    for digest, source_ids in self._source_ids.items()
+                },
+                out_f,
+            )
+        os.replace(tmp_file, index_file)
+        logger.debug(f"Stored deck deduplication index in {index_file}.")
+
+    @classmethod
+    def load(cls, index_file: str) -> "DeckDedupIndex":
+        """Returns the index stored in index_file (empty if it is missing)."""
+        index = cls()
+        if not path.exists(index_file):
+            logger.debug(f"Deck deduplication index {index_file} not found.")
+            return index
+        logger.debug(f"Loading deck deduplication index from {index_file}...")
+        with open(index_file) as in_f:
+            for digest, source_ids in json.load(in_f).items():
+                for source, deck_id in source_ids:
+                    index._add((source, deck_id), digest)
+        logger.debug(f"Loaded deck deduplication index from {index_file}.")
+        return index
+
+    def index_decks(
+        self,
+        source: str,
+        deck_ids: Iterable[str],
+        load_deck: Callable[[str], Optional[PlayableDeck]],
+    ) -> int:
+        """Loads and indexes the decks of source not indexed yet.
+
+        Returns the number of new lists.
+        """
+        logger.info(f"Indexing {source} decks...")
+        nr_decks, nr_new_lists = 0, 0
+        for deck_id in deck_ids:
+            if self.is_indexed(source, deck_id):
+                continue
+            deck = load_deck(deck_id)
+            if deck is None:
+                continue
+            nr_decks += 1
+            nr_new_lists += self.add(source, deck_id, deck)
+        logger.info(
+            f"Indexed {nr_decks} {source} decks: {nr_new_lists} new lists, "
+            f"{nr_decks - nr_new_lists} duplicates."
+        )
+        return nr_new_lists
+
+    def index_deck_files(self, source: str, decks_dir: str) -> int:
+        """Indexes the .txt decks in decks_dir, identified by file name."""
+        return self.index_decks(
+            source,
+            sorted(f.stem for f in Path(decks_dir).glob("*.txt")),
+            lambda deck_id: load_playable_deck_file(
+                posix_path(decks_dir, f"{deck_id}.txt")
+            ),
+        )
+
+    def index_deckstats_decks(
+        self, decks_cache_dir: str = DECKSTATS_DECKS_CACHE_DIR
+    ) -> int:
+        def load_deck(deck_id):
+            with open(posix_path(decks_cache_dir, f"{deck_id}.pkl"), "rb") as in_f:
+                deckstats_deck = pickle.load(in_f)
+            try:
+                return DeckstatsService.to_playable_deck(deckstats_deck)
+            except (DeckstatsException, KeyError, StopIteration) as e:
+                logger.warning(f"Unable to parse deckstats deck {deck_id}: {e}")
+                return None
+
+        return self.index_decks(
+            DECKSTATS_DECK_SOURCE,
+            sorted(f.stem for f in Path(decks_cache_dir).glob("*.pkl")),
+            load_deck,
+        )
+
+    def index_archive_decks(self, archive: AbstractArchiveService) -> int:
+        decks = {str(deck.deck_id): deck for deck in archive.list_decks()}
+        return self.index_decks(
+            ARCHIVE_DECK_SOURCE,
+            decks.keys(),
+            lambda deck_id: archive.to_playable_deck(decks[deck_id]),
+        )
+
+
+def build_deck_dedup_index(
+    academy_fs: AcademyFileSystem,
+    myr_fs: MyrFileSystem,
+    archive: Optional[AbstractArchiveService] = None,
+    deckstats_decks_cache_dir: str = DECKSTATS_DECKS_CACHE_DIR,
+    index_file: Optional[str] = DECK_DEDUP_INDEX_FILE,
+) -> DeckDedupIndex:
+    """Updates the deduplication index of all the known decks.
+
+    Only the decks not indexed yet in index_file are parsed, and the updated index
+    is stored back (unless index_file is None). Archived decks are indexed only if
+    archive is given, because listing them may require network access.
+    """
+    index = DeckDedupIndex.load(index_file) if index_file else DeckDedupIndex()
+    index.index_deck_files(
+        MTGGOLDFISH_DECK_SOURCE, academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR
+    )
+    index.index_deck_files(MTGGOLDFISH_DECK_SOURCE, myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR)
+    index.index_deck_files(DPL_DECK_SOURCE, academy_fs.ASSETS_DATA_DECK_DPL_DIR)
+    index.index_deckstats_decks(deckstats_decks_cache_dir)
+    if archive:
+        index.index_archive_decks(archive)
+    logger.info(
+        f"Indexed {index.nr_source_ids} decks: {len(index)} distinct lists, "
+        f"{len(index.get_duplicates())} of them known more than once."
+    )
+    if index_file:
+        index.save(index_file)
+    return index
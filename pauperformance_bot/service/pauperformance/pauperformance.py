@@ -1,8 +1,8 @@
-import collections
 import glob
 import json
 import os
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from time import sleep
 from typing import Any, Dict, List
@@ -13,6 +13,7 @@ import pauperformance_bot
 from pauperformance_bot.constant.arena.youtube import YOUTUBE_VIDEO_URL
 from pauperformance_bot.constant.mtg.scryfall import REQUESTS_SLEEP_SECONDS
 from pauperformance_bot.constant.pauperformance.myr import (
+    CARDS_INDEX_COLUMNS_DIR,
     CONFIG_ARCHETYPES_DIR,
     CONFIG_FAMILIES_DIR,
     PAUPER_CARDS_INDEX_CACHE_DIR,
@@ -26,6 +27,7 @@ from pauperformance_bot.constant.pauperformance.pauperformance import (
 from pauperformance_bot.entity.academy_video import AcademyVideo
 from pauperformance_bot.entity.deck.archive.abstract import AbstractArchivedDeck
 from pauperformance_bot.entity.deck.playable import PlayableDeck
+from pauperformance_bot.entity.mtg.pauper_card import PauperCard
 from pauperformance_bot.exceptions import PauperformanceException
 from pauperformance_bot.service.arena.youtube import YouTubeService
 from pauperformance_bot.service.mtg.deckstats import DeckstatsService
@@ -36,7 +38,15 @@ from pauperformance_bot.service.nexus.sync.messages_sender import (
 from pauperformance_bot.service.pauperformance.archive.abstract import (
     AbstractArchiveService,
 )
+from pauperformance_bot.service.pauperformance.card_index import (
+    CardIndexColumns,
+    SetCardsCache,
+    build_card_index_from_bulk_data,
+    get_card_index_stamp,
+    load_set_index,
+)
 from pauperformance_bot.service.pauperformance.config_reader import ConfigReader
+from pauperformance_bot.service.pauperformance.set_timeline import SetTimeline
 from pauperformance_bot.service.pauperformance.storage.abstract import (
     AbstractStorageService,
 )
@@ -55,6 +65,8 @@ class PauperformanceService:
         scryfall=ScryfallService(),
         youtube=YouTubeService(),
         config_reader=ConfigReader(),
+        bulk_data_file=None,
+        card_columns_dir=CARDS_INDEX_COLUMNS_DIR,
     ):
         self.storage: AbstractStorageService = storage
         self.archive: AbstractArchiveService = archive
@@ -62,9 +74,34 @@ class PauperformanceService:
         self.youtube = youtube
         self.config_reader = config_reader
         self.players = config_reader.list_creators()
-        self.set_index = self._build_set_index()
-        self.card_index = self._build_card_index()
-        self.incremental_card_index = self._build_incremental_card_index()
+        # set and card indexes are built on first use (see the properties below)
+        self._bulk_data_file = bulk_data_file
+        self._card_columns_dir = card_columns_dir
+
+    @cached_property
+    def set_index(self):
+        return self._build_set_index()
+
+    @cached_property
+    def card_index(self) -> Dict[int, List[PauperCard]]:
+        return self._project_card_index()
+
+    @cached_property
+    def card_columns(self) -> CardIndexColumns:
+        return self._load_card_columns(columns_dir=self._card_columns_dir)
+
+    @cached_property
+    def incremental_card_index(self):
+        return self._build_incremental_card_index()
+
+    @cached_property
+    def set_timeline(self) -> SetTimeline:
+        # the sets that introduced new pauper cards
+        return SetTimeline(
+            s
+            for s in self.set_index.values()
+            if len(self.incremental_card_index.get(s["p12e_code"])) > 0
+        )
 
     def _build_set_index(self, set_index_file=SET_INDEX_FILE):
         try:
@@ -81,15 +118,7 @@ class PauperformanceService:
             scryfall_sets = []
 
         logger.info("Building Pauperformance set index...")
-        with open(set_index_file, "r") as index_f:
-            content_str = index_f.read()
-            json_set_index = json.loads(
-                content_str,
-                object_pairs_hook=collections.OrderedDict,
-            )
-        set_index = collections.OrderedDict(
-            {int(k): dict(v) for k, v in json_set_index.items()}
-        )
+        set_index = load_set_index(set_index_file)
         known_sets = {s["scryfall_code"] for s in set_index.values()}
         p12e_code = max(set_index.keys()) + 1
         need_to_update_file = False
@@ -117,7 +146,18 @@ class PauperformanceService:
         self,
         skip_sets=KNOWN_SETS_WITH_NO_PAUPER_CARDS,
         cards_index_cache_dir=PAUPER_CARDS_INDEX_CACHE_DIR,
+        bulk_data_file=None,
     ) -> Dict[str, List[Dict[str, Any]]]:
+        if bulk_data_file:  # rebuild the cache offline, in one pass
+            card_index = build_card_index_from_bulk_data(
+                bulk_data_file, self.set_index, skip_sets, cards_index_cache_dir
+            )
+        else:
+            card_index = self._load_card_index(skip_sets, cards_index_cache_dir)
+        self._check_known_sets_with_no_pauper_cards(card_index)
+        return card_index
+
+    def _load_card_index(self, skip_sets, cards_index_cache_dir):
         card_index = {}
         os.makedirs(cards_index_cache_dir, exist_ok=True)
         for item in self.set_index.values():
@@ -149,6 +189,9 @@ class PauperformanceService:
                 sleep(REQUESTS_SLEEP_SECONDS)
             finally:
                 card_index[p12e_code] = set_index
+        return card_index
+
+    def _check_known_sets_with_no_pauper_cards(self, card_index):
         today = datetime.now().date().isoformat()
         useless_sets = set(
             i
@@ -168,7 +211,39 @@ class PauperformanceService:
                 f"adding: {sorted(list(to_be_removed_sets))}"
             )
 
-        return card_index
+    def _load_card_columns(
+        self,
+        skip_sets=KNOWN_SETS_WITH_NO_PAUPER_CARDS,
+        cards_index_cache_dir=PAUPER_CARDS_INDEX_CACHE_DIR,
+        columns_dir=CARDS_INDEX_COLUMNS_DIR,
+    ) -> CardIndexColumns:
+        # unless the cache is rebuilt from bulk data, columns are loaded as long as
+        # they match the cache, without parsing it
+        p12e_codes = [
+            p12e_code for p12e_code in self.set_index if p12e_code not in skip_sets
+        ]
+        if not self._bulk_data_file:
+            stamp = get_card_index_stamp(cards_index_cache_dir, p12e_codes)
+            card_columns = CardIndexColumns.load(columns_dir, stamp)
+            if card_columns is not None:
+                return card_columns
+        card_index = self._build_card_index(
+            skip_sets, cards_index_cache_dir, self._bulk_data_file
+        )
+        # the cache may have been updated while building the card index
+        stamp = get_card_index_stamp(cards_index_cache_dir, p12e_codes)
+        CardIndexColumns.from_card_index(card_index).save(columns_dir, stamp)
+        return CardIndexColumns.load(columns_dir, stamp)
+
+    def _project_card_index(
+        self, cards_index_cache_dir=PAUPER_CARDS_INDEX_CACHE_DIR
+    ) -> Dict[int, List[PauperCard]]:
+        # full Scryfall cards are read from the cache only when needed
+        loader = SetCardsCache(cards_index_cache_dir).get_card
+        return {
+            p12e_code: self.card_columns.get_cards(p12e_code, loader)
+            for p12e_code in self.set_index
+        }
 
     def _build_incremental_card_index(
         self,
@@ -192,10 +267,10 @@ class PauperformanceService:
 
             new_cards = []
             for card in cards:
-                if card["name"] in existing_card_names:
+                if card.name in existing_card_names:
                     continue
                 new_cards.append(card)
-                existing_card_names.add(card["name"])
+                existing_card_names.add(card.name)
             incremental_card_index[p12e_code] = new_cards
             logger.debug(f"Found {len(new_cards)} new cards.")
         to_be_removed_sets = useless_sets - set(INCREMENTAL_CARDS_INDEX_SKIP_SETS)
@@ -275,12 +350,7 @@ class PauperformanceService:
 
     def get_set_index_by_date(self, usa_date):
         logger.debug(f"Getting set index for USA date {usa_date}")
-        return [
-            s
-            for s in self.set_index.values()
-            if s["date"] <= usa_date
-            and len(self.incremental_card_index.get(s["p12e_code"])) > 0
-        ][-1]
+        return self.set_timeline.get_set_at(usa_date)
 
     def get_current_set_index(self):
         return self.get_set_index_by_date(datetime.today().strftime(USA_DATE_FORMAT))
@@ -0,0 +1,36 @@
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List
+
+
+class SetTimeline:
+    """Release dates of a sequence of sets, for lookups by date in O(log n).
+
+    get_set_at(date) returns the last set of the sequence released by date, as a
+    scan of the sequence would: sets are not necessarily sorted by date (e.g. in
+    the set index, sets are numbered as they are announced). Results are memoized
+    by date, since many decks share the same date.
+    """
+
+    def __init__(self, sets: Iterable[Dict[str, Any]]):
+        # sets by date, and the last set in sequence order among the first i + 1
+        by_date = sorted(enumerate(sets), key=lambda s: s[1]["date"])
+        self._dates: List[str] = [s["date"] for _, s in by_date]
+        self._last_sets: List[Dict[str, Any]] = []
+        last_position = -1
+        for position, s in by_date:
+            if position > last_position:
+                last_position, last_set = position, s
+            self._last_sets.append(last_set)
+        self._memo: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._dates)
+
+    def get_set_at(self, usa_date: str) -> Dict[str, Any]:
+        s = self._memo.get(usa_date)
+        if s is None:
+            released = bisect_right(self._dates, usa_date)
+            if released == 0:
+                raise IndexError(f"No set released by {usa_date}.")
+            s = self._memo[usa_date] = self._last_sets[released - 1]
+        return s
@@ -0,0 +1,111 @@
+from typing import Optional
+
+import numpy as np
+
+from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+
+
+class ArchetypeRuleIndex:
+    """Must-have and must-not-have cards and signatures of all the archetypes,
+    compiled once.
+
+    Only the cards mentioned by some rule are indexed: each of them is a row of
+    three (cards x archetypes) matrices, flagging the archetypes requiring it,
+    forbidding it and listing it in their signature. The eligibility of a deck is
+    then computed in a single pass over its cards, and the eligibility of a batch
+    of decks with two small matrix products (a third one counts the signature
+    cards of each archetype). Eligibility is equivalent to calling
+    PlayableDeck.can_belong_to_archetype for each deck and each archetype.
+    """
+
+    def __init__(self, archetypes: list[ArchetypeConfig]):
+        self.archetypes: list[ArchetypeConfig] = archetypes
+        self._card_ids: dict[str, int] = {}
+        required_pairs, forbidden_pairs, signature_pairs = [], [], []
+        signature_min_cards = np.full(len(archetypes), np.inf)
+        for archetype_id, archetype in enumerate(archetypes):
+            for card in set(archetype.must_have_cards):
+                required_pairs.append((self._intern(card), archetype_id))
+            for card in set(archetype.must_not_have_cards):
+                forbidden_pairs.append((self._intern(card), archetype_id))
+            if archetype.signature:
+                for card in set(archetype.signature.cards):
+                    signature_pairs.append((self._intern(card), archetype_id))
+                signature_min_cards[archetype_id] = archetype.signature.min_cards
+        shape = (len(self._card_ids), len(archetypes))
+        self._required: np.ndarray = self._to_matrix(required_pairs, shape)
+        self._forbidden: np.ndarray = self._to_matrix(forbidden_pairs, shape)
+        self._signature: np.ndarray = self._to_matrix(signature_pairs, shape)
+        self._required_counts: np.ndarray = self._required.sum(axis=0)
+        self._signature_min_cards: np.ndarray = signature_min_cards
+        # archetypes with a signature, in the order their signatures are checked
+        self._signature_order: np.ndarray = np.array(
+            [
+                archetype_id
+                for _, archetype_id in sorted(
+                    (archetype.signature.priority, archetype_id)
+                    for archetype_id, archetype in enumerate(archetypes)
+                    if archetype.signature
+                )
+            ],
+            dtype=np.intp,
+        )
+
+    def _intern(self, card: str) -> int:
+        return self._card_ids.setdefault(card, len(self._card_ids))
+
+    @staticmethod
+    def _to_matrix(pairs: list[tuple[int, int]], shape: tuple[int, int]) -> np.ndarray:
+        matrix = np.zeros(shape, dtype=np.float64)
+        for card_id, archetype_id in pairs:
+            matrix[card_id, archetype_id] = 1
+        return matrix
+
+    def _presence(self, decks: list[PlayableDeck]) -> np.ndarray:
+        presence = np.zeros((len(decks), len(self._card_ids)), dtype=np.float64)
+        for i, deck in enumerate(decks):
+            card_ids = [
+                card_id
+                for card in deck.card_names
+                if (card_id := self._card_ids.get(card)) is not None
+            ]
+            presence[i, card_ids] = 1
+        return presence
+
+    def _eligibility(self, presence: np.ndarray) -> np.ndarray:
+        return (presence @ self._required == self._required_counts) & (
+            presence @ self._forbidden == 0
+        )
+
+    def eligibility(self, decks: list[PlayableDeck]) -> np.ndarray:
+        """Returns the (decks x archetypes) matrix of allowed archetypes."""
+        return self._eligibility(self._presence(decks))
+
+    def match(
+        self, decks: list[PlayableDeck]
+    ) -> tuple[np.ndarray, list[Optional[ArchetypeConfig]]]:
+        """Returns the eligibility of decks and the archetype of their signature.
+
+        The signature of a deck is the one of the first eligible archetype (by
+        signature priority) whose signature cards it plays, if any.
+        """
+        presence = self._presence(decks)
+        eligible = self._eligibility(presence)
+        if len(self._signature_order) == 0:
+            return eligible, [None] * len(decks)
+        matches = (
+            (presence @ self._signature >= self._signature_min_cards) & eligible
+        )[:, self._signature_order]
+        first_matches = matches.argmax(axis=1)
+        return eligible, [
+            self.archetypes[self._signature_order[first_match]] if matched else None
+            for first_match, matched in zip(first_matches, matches.any(axis=1))
+        ]
+
+    def eligible_archetypes(self, deck: PlayableDeck) -> list[ArchetypeConfig]:
+        return [
+            a
+            for a, is_eligible in zip(self.archetypes, self.eligibility([deck])[0])
+            if is_eligible
+        ]
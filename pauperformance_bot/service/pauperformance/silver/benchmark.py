@@ -0,0 +1,481 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from pathlib import Path
+from typing import Optional
+
+from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.myr import (
+    DPL_DECK_SOURCE,
+    MTGGOLDFISH_DECK_SOURCE,
+    MyrFileSystem,
+)
+from pauperformance_bot.constant.pauperformance.silver import (
+    BENCHMARK_HOLDOUT,
+    BENCHMARK_MAX_QUERIES,
+    BENCHMARK_ROUNDS,
+    REFERENCE_DECKS_THREADS,
+)
+from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.playable import (
+    PlayableDeck,
+    parse_playable_deck_from_text,
+)
+from pauperformance_bot.service.pauperformance.config_reader import ConfigReader
+from pauperformance_bot.service.pauperformance.pauperformance import (
+    PauperformanceService,
+)
+from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.service.pauperformance.silver.micro_batcher import (
+    LatencyStats,
+)
+from pauperformance_bot.util.decorators import auto_repr, auto_str
+from pauperformance_bot.util.log import get_application_logger
+from pauperformance_bot.util.path import posix_path
+from pauperformance_bot.util.time import now
+
+logger = get_application_logger()
+
+
+@auto_repr
+@auto_str
+class PrefilterComparison:
+    """Top-1 accuracy of the classifier, with and without centroid pre-filter."""
+
+    def __init__(
+        self,
+        *,
+        top_n: int,
+        nr_decks: int,
+        exhaustive_accuracy: Optional[float],
+        prefilter_accuracy: Optional[float],
+        agreement: Optional[float],
+    ):
+        self.top_n: int = top_n
+        self.nr_decks: int = nr_decks
+        # rates are None if there are no decks to measure them on
+        self.exhaustive_accuracy: Optional[float] = exhaustive_accuracy
+        self.prefilter_accuracy: Optional[float] = prefilter_accuracy
+        self.agreement: Optional[float] = agreement
+
+    @property
+    def accuracy_loss(self) -> Optional[float]:
+        if self.exhaustive_accuracy is None or self.prefilter_accuracy is None:
+            return None
+        return self.exhaustive_accuracy - self.prefilter_accuracy
+
+
+def get_labelled_decks(
+    decklassifier: Decklassifier,
+) -> list[tuple[PlayableDeck, ArchetypeConfig]]:
+    """Returns copies of the decks in the training data, with their labels."""
+    return [
+        (deck.to_playable(), archetype)
+        for archetype, decks in decklassifier.known_decks.items()
+        for deck in decks
+    ]
+
+
+def compare_centroid_prefilter(
+    decklassifier: Decklassifier, top_n: int
+) -> PrefilterComparison:
+    """Classifies the training data with and without the centroid pre-filter.
+
+    Training decks are part of the model they are classified with, so the
+    exhaustive scan finds them (ties aside): the comparison measures the decks
+    lost by the pre-filter rather than the accuracy on unseen decks.
+    """
+    logger.info(f"Comparing centroid pre-filter (top {top_n}) with full scan...")
+    labelled = get_labelled_decks(decklassifier)
+    labels = [archetype for _, archetype in labelled]
+    centroid_prefilter = decklassifier.centroid_prefilter
+    try:
+        decklassifier.centroid_prefilter = None
+        exhaustive = _classify(decklassifier, labelled)
+        decklassifier.centroid_prefilter = top_n
+        prefiltered = _classify(decklassifier, labelled)
+    finally:
+        decklassifier.centroid_prefilter = centroid_prefilter
+    comparison = PrefilterComparison(
+        top_n=top_n,
+        nr_decks=len(labelled),
+        exhaustive_accuracy=_rate(exhaustive, labels),
+        prefilter_accuracy=_rate(prefiltered, labels),
+        agreement=_rate(prefiltered, exhaustive),
+    )
+    logger.info(f"Compared centroid pre-filter with full scan: {comparison}")
+    return comparison
+
+
+def _classify(
+    decklassifier: Decklassifier, labelled: list[tuple[PlayableDeck, ArchetypeConfig]]
+) -> list[Optional[ArchetypeConfig]]:
+    # training decks are simplified already: classifying them is idempotent
+    return [
+        archetype
+        for archetype, _ in decklassifier.classify_decks([d for d, _ in labelled])
+    ]
+
+
+def _rate(actual: list, expected: list) -> Optional[float]:
+    # a rate over no decks is undefined, not perfect
+    if not expected:
+        return None
+    return sum(a == e for a, e in zip(actual, expected)) / len(expected)
+
+
+# (source, deck id, archetype name, deck file text) of a labelled deck
+LabelledDeckText = tuple[str, str, str, str]
+
+
+class BenchmarkFixture:
+    """A frozen copy of the decks the classifier benchmark runs on.
+
+    Decks are stored as the text of their files, so the benchmark needs neither
+    the Academy nor the network: results of the same fixture (see digest) are
+    comparable across commits.
+    """
+
+    def __init__(
+        self,
+        *,
+        labelled_decks: list[LabelledDeckText],
+        reference_decks: dict[str, str],
+        queries: list[tuple[str, str]],
+    ):
+        # the training data, in the order of the labelled CSVs
+        self.labelled_decks: list[LabelledDeckText] = labelled_decks
+        # deck file text by reference deck name
+        self.reference_decks: dict[str, str] = reference_decks
+        # (deck id, deck file text) of unlabelled decks
+        self.queries: list[tuple[str, str]] = queries
+
+    def _to_json(self) -> dict:
+        return {
+            "labelled_decks": [list(d) for d in self.labelled_decks],
+            "reference_decks": self.reference_decks,
+            "queries": [list(q) for q in self.queries],
+        }
+
+    @property
+    def digest(self) -> str:
+        fixture = json.dumps(self._to_json(), sort_keys=True)
+        return hashlib.sha1(fixture.encode("utf-8")).hexdigest()
+
+    def save(self, fixture_file: str):
+        logger.info(f"Storing benchmark fixture in {fixture_file}...")
+        os.makedirs(path.dirname(fixture_file) or ".", exist_ok=True)
+        tmp_file = f"{fixture_file}.tmp"
+        with open(tmp_file, "w") as out_f:
+            json.dump(self._to_json(), out_f)
+        os.replace(tmp_file, fixture_file)
+        logger.info(f"Stored benchmark fixture in {fixture_file}.")
+
+    @classmethod
+    def load(cls, fixture_file: str) -> "BenchmarkFixture":
+        logger.info(f"Loading benchmark fixture from {fixture_file}...")
+        with open(fixture_file) as in_f:
+            fixture = json.load(in_f)
+        logger.info(f"Loaded benchmark fixture from {fixture_file}.")
+        return cls(
+            labelled_decks=[tuple(d) for d in fixture["labelled_decks"]],
+            reference_decks=fixture["reference_decks"],
+            queries=[tuple(q) for q in fixture["queries"]],
+        )
+
+
+@auto_repr
+@auto_str
+class ClassifierBenchmark:
+    """Performance and top-1 agreement of the classifier on a benchmark fixture."""
+
+    def __init__(
+        self,
+        *,
+        fixture_digest: str,
+        nr_training_decks: int,
+        nr_test_decks: int,
+        nr_queries: int,
+        load_time: float,
+        latency_ms: dict[str, float],
+        throughput: float,
+        peak_memory_mb: float,
+        top1_agreement: Optional[float],
+    ):
+        self.fixture_digest: str = fixture_digest
+        self.nr_training_decks: int = nr_training_decks
+        self.nr_test_decks: int = nr_test_decks
+        self.nr_queries: int = nr_queries
+        # seconds to load the training data and the reference decks
+        self.load_time: float = load_time
+        # percentiles of the latency of classify_deck
+        self.latency_ms: dict[str, float] = latency_ms
+        # decks per second classified by classify_decks
+        self.throughput: float = throughput
+        # peak memory allocated by Python to load the model and classify the queries
+        self.peak_memory_mb: float = peak_memory_mb
+        # rate of held-out decks classified as labelled (None if none is held out)
+        self.top1_agreement: Optional[float] = top1_agreement
+
+    def save(self, results_file: str):
+        """Appends the benchmark (as a JSON line) to results_file."""
+        os.makedirs(path.dirname(results_file) or ".", exist_ok=True)
+        with open(results_file, "a") as out_f:
+            out_f.write(json.dumps({"date": now(), **vars(self)}) + "\n")
+
+
+def build_benchmark_fixture(
+    pauperformance: PauperformanceService,
+    academy_fs: AcademyFileSystem,
+    max_queries: int = BENCHMARK_MAX_QUERIES,
+) -> BenchmarkFixture:
+    """Freezes the training data, the reference decks and the cached decks.
+
+    Training decks are looked up in the Academy and, for MTGGoldfish ones, in the
+    local cache of tournament decks: the ones found nowhere are skipped. Up to
+    max_queries cached tournament decks not in the training data become the
+    unlabelled queries.
+    """
+    logger.info("Building benchmark fixture...")
+    myr_fs = pauperformance.config_reader.myr_file_system
+    training_data_sources = [
+        (
+            MTGGOLDFISH_DECK_SOURCE,
+            myr_fs.MTGGOLDFISH_DECK_TRAINING_DATA,
+            [
+                academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
+                myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR,
+            ],
+        ),
+        (
+            DPL_DECK_SOURCE,
+            myr_fs.DPL_DECK_TRAINING_DATA,
+            [academy_fs.ASSETS_DATA_DECK_DPL_DIR],
+        ),
+    ]
+    labelled_decks = []
+    for source, training_file, decks_dirs in training_data_sources:
+        training_data = Decklassifier._read_training_data(training_file)
+        for deck_id, archetype_name in training_data:
+            deck_text = _read_deck_file(deck_id, decks_dirs)
+            if deck_text is not None:
+                labelled_decks.append((source, deck_id, archetype_name, deck_text))
+        nr_found = sum(d[0] == source for d in labelled_decks)
+        if nr_found < len(training_data):
+            logger.warning(
+                f"Skipped {len(training_data) - nr_found} {source} training decks "
+                f"not found locally."
+            )
+    training_ids = {
+        deck_id
+        for source, deck_id, _, _ in labelled_decks
+        if source == MTGGOLDFISH_DECK_SOURCE
+    }
+    queries = []
+    for deck_file in sorted(Path(myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR).glob("*.txt")):
+        if len(queries) == max_queries:
+            break
+        if deck_file.stem not in training_ids:
+            deck_text = deck_file.read_text()
+            if _parse_deck_text(deck_text) is not None:
+                queries.append((deck_file.stem, deck_text))
+    reference_decks = _read_reference_decks(pauperformance)
+    fixture = BenchmarkFixture(
+        labelled_decks=labelled_decks,
+        reference_decks=reference_decks,
+        queries=queries,
+    )
+    logger.info(
+        f"Built benchmark fixture: {len(labelled_decks)} labelled decks, "
+        f"{len(reference_decks)} reference decks, {len(queries)} queries."
+    )
+    return fixture
+
+
+def _read_deck_file(deck_id: str, decks_dirs: list[str]) -> Optional[str]:
+    for decks_dir in decks_dirs:
+        deck_file = posix_path(decks_dir, f"{deck_id}.txt")
+        if path.exists(deck_file):
+            with open(deck_file) as in_f:
+                return in_f.read()
+    return None
+
+
+def _read_reference_decks(pauperformance: PauperformanceService) -> dict[str, str]:
+    def load_reference_deck(reference_deck):
+        try:
+            return _to_deck_text(pauperformance.get_playable_deck(reference_deck))
+        except Exception as e:
+            logger.warning(f"Unable to load reference list {reference_deck}: {e}")
+            return None
+
+    reference_decks = sorted(
+        {
+            reference_deck
+            for archetype in pauperformance.config_reader.list_archetypes()
+            for reference_deck in archetype.reference_decks
+        }
+    )
+    with ThreadPoolExecutor(max_workers=REFERENCE_DECKS_THREADS) as executor:
+        deck_texts = list(executor.map(load_reference_deck, reference_decks))
+    return {
+        reference_deck: deck_text
+        for reference_deck, deck_text in zip(reference_decks, deck_texts)
+        if deck_text is not None
+    }
+
+
+def _to_deck_text(deck: PlayableDeck) -> str:
+    lines = [f"{c.quantity} {c.card_name}" for c in deck.mainboard]
+    lines += [""]
+    lines += [f"{c.quantity} {c.card_name}" for c in deck.sideboard]
+    return "\n".join(lines) + "\n"
+
+
+def _parse_deck_text(deck_text: str) -> Optional[PlayableDeck]:
+    try:
+        return parse_playable_deck_from_text(deck_text)
+    except (IndexError, ValueError):
+        return None
+
+
+class _FixtureConfigReader(ConfigReader):
+    def __init__(self, myr_file_system: MyrFileSystem, archetypes):
+        super().__init__(myr_file_system)
+        self._archetypes: list[ArchetypeConfig] = archetypes
+
+    def list_archetypes(self) -> list[ArchetypeConfig]:
+        return self._archetypes
+
+
+class _FixtureService:
+    """The parts of PauperformanceService used by Decklassifier, on a fixture."""
+
+    def __init__(self, config_reader: ConfigReader, reference_decks: dict[str, str]):
+        self.config_reader: ConfigReader = config_reader
+        self._reference_decks: dict[str, str] = reference_decks
+
+    def get_playable_deck(self, deck_name: str) -> Optional[PlayableDeck]:
+        return _parse_deck_text(self._reference_decks[deck_name])
+
+
+def _write_training_data(
+    root_dir: str, labelled_decks: list[LabelledDeckText]
+) -> tuple[AcademyFileSystem, MyrFileSystem]:
+    myr_fs = MyrFileSystem(root_dir, posix_path(root_dir, "resources"))
+    academy_fs = AcademyFileSystem(root_dir)
+    training_data_sources = {
+        MTGGOLDFISH_DECK_SOURCE: (
+            myr_fs.MTGGOLDFISH_DECK_TRAINING_DATA,
+            academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
+        ),
+        DPL_DECK_SOURCE: (
+            myr_fs.DPL_DECK_TRAINING_DATA,
+            academy_fs.ASSETS_DATA_DECK_DPL_DIR,
+        ),
+    }
+    for source, (training_file, decks_dir) in training_data_sources.items():
+        os.makedirs(path.dirname(training_file), exist_ok=True)
+        os.makedirs(decks_dir, exist_ok=True)
+        with open(training_file, "w") as out_f:
+            for deck_source, deck_id, archetype_name, deck_text in labelled_decks:
+                if deck_source != source:
+                    continue
+                out_f.write(f"{deck_id},{archetype_name}\n")
+                with open(posix_path(decks_dir, f"{deck_id}.txt"), "w") as deck_f:
+                    deck_f.write(deck_text)
+    return academy_fs, myr_fs
+
+
+def run_benchmark(
+    fixture: BenchmarkFixture,
+    archetypes: Optional[list[ArchetypeConfig]] = None,
+    holdout: int = BENCHMARK_HOLDOUT,
+    rounds: int = BENCHMARK_ROUNDS,
+) -> ClassifierBenchmark:
+    """Benchmarks a classifier trained on the fixture, with the given archetypes.
+
+    Every holdout-th labelled deck is held out of the training data: top-1
+    agreement is measured on them. Latency (deck by deck) and throughput (the
+    best of rounds batches) are measured on them and on the unlabelled queries.
+    Peak memory is measured apart, because tracing allocations slows Python down.
+    """
+    if archetypes is None:
+        archetypes = ConfigReader().list_archetypes()
+    archetype_names = {a.name for a in archetypes}
+    training, test = [], []
+    for i, labelled_deck in enumerate(fixture.labelled_decks):
+        if labelled_deck[2] not in archetype_names:
+            logger.warning(f"Skipping deck labelled with unknown {labelled_deck[2]}.")
+            continue
+        (test if i % holdout == 0 else training).append(labelled_deck)
+    query_texts = [deck_text for *_, deck_text in test]
+    query_texts += [deck_text for _, deck_text in fixture.queries]
+    logger.info(
+        f"Benchmarking classifier: {len(training)} training decks, "
+        f"{len(test)} test decks, {len(query_texts)} queries..."
+    )
+    with tempfile.TemporaryDirectory() as root_dir:
+        academy_fs, myr_fs = _write_training_data(root_dir, training)
+        pauperformance = _FixtureService(
+            _FixtureConfigReader(myr_fs, archetypes), fixture.reference_decks
+        )
+
+        def load_decklassifier():
+            decklassifier = Decklassifier(
+                pauperformance, academy_fs, model_dir=None, results_cache_file=None
+            )
+            decklassifier.warm_up()
+            return decklassifier
+
+        start = time.perf_counter()
+        decklassifier = load_decklassifier()
+        load_time = time.perf_counter() - start
+
+        latencies = LatencyStats(window=max(len(query_texts), 1))
+        for deck_text in query_texts:
+            deck = _parse_deck_text(deck_text)
+            start = time.perf_counter()
+            decklassifier.classify_deck(deck)
+            latencies.record([time.perf_counter() - start])
+
+        batch_time = float("inf")
+        for _ in range(rounds):
+            decks = [_parse_deck_text(deck_text) for deck_text in query_texts]
+            start = time.perf_counter()
+            decklassifier.classify_decks(decks)
+            batch_time = min(batch_time, time.perf_counter() - start)
+
+        classifications = decklassifier.classify_decks(
+            [_parse_deck_text(deck_text) for *_, deck_text in test]
+        )
+        # the top-1 archetype, no matter how similar (see BREW_CLASSIFICATION_THRESHOLD)
+        predicted = [a.name if a else None for a, _ in classifications]
+
+        tracemalloc.start()
+        try:
+            load_decklassifier().classify_decks(
+                [_parse_deck_text(deck_text) for deck_text in query_texts]
+            )
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    benchmark = ClassifierBenchmark(
+        fixture_digest=fixture.digest,
+        nr_training_decks=len(training),
+        nr_test_decks=len(test),
+        nr_queries=len(query_texts),
+        load_time=load_time,
+        latency_ms=latencies.percentiles(),
+        throughput=len(query_texts) / batch_time if batch_time > 0 else 0.0,
+        peak_memory_mb=peak_memory / 2**20,
+        top1_agreement=_rate(predicted, [d[2] for d in test]),
+    )
+    logger.info(f"Benchmarked classifier: {benchmark}")
+    return benchmark
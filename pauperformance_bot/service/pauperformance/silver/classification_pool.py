@@ -0,0 +1,103 @@
+import multiprocessing
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, Optional
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    CLASSIFICATION_CHUNK_SIZE,
+)
+from pauperformance_bot.entity.deck.playable import (
+    PlayableDeck,
+    parse_playable_deck_from_file,
+)
+from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+# archetype name (None if unknown) and similarity score of a deck
+Classification = tuple[Optional[str], float]
+DeckLoader = Callable[[str], Optional[PlayableDeck]]
+
+# state of worker processes, set once when they start
+_decklassifier: Optional[Decklassifier] = None
+_load_deck: Optional[DeckLoader] = None
+
+
+def load_playable_deck_file(playable_deck_file: str) -> Optional[PlayableDeck]:
+    try:
+        return parse_playable_deck_from_file(playable_deck_file)
+    except (IndexError, ValueError):
+        logger.warning(f"Unable to parse deck {playable_deck_file}...")
+        return None
+
+
+def create_classification_pool(
+    decklassifier: Decklassifier,
+    max_workers: Optional[int] = None,
+    load_deck: DeckLoader = load_playable_deck_file,
+) -> Executor:
+    """Returns a pool of processes classifying decks with decklassifier.
+
+    Workers are forked once the model is complete, so they inherit it instead of
+    loading or unpickling it, and never change it: they load deck files with
+    load_deck (None for decks to skip), and return archetype names and scores.
+    Where processes cannot be forked, a single thread classifies decks.
+    """
+    decklassifier.warm_up()
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(decklassifier, load_deck),
+        )
+    _init_worker(decklassifier, load_deck)
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def submit_decks(executor: Executor, decks: list[PlayableDeck]) -> Future:
+    """Classifies decks in a worker of a classification pool, as a batch."""
+    return executor.submit(_classify_decks, decks)
+
+
+def classify_deck_files(
+    decklassifier: Decklassifier,
+    deck_files: list[str],
+    load_deck: DeckLoader = load_playable_deck_file,
+    chunk_size: int = CLASSIFICATION_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> list[Optional[Classification]]:
+    """Loads and classifies deck files, by chunks, in a classification pool."""
+    logger.info(f"Classifying {len(deck_files)} deck files...")
+    chunks = [
+        deck_files[start : start + chunk_size]
+        for start in range(0, len(deck_files), chunk_size)
+    ]
+    with create_classification_pool(decklassifier, max_workers, load_deck) as pool:
+        results = list(pool.map(_classify_deck_files, chunks))
+    logger.info(f"Classified {len(deck_files)} deck files.")
+    return [classification for result in results for classification in result]
+
+
+def _init_worker(decklassifier: Decklassifier, load_deck: DeckLoader):
+    global _decklassifier, _load_deck
+    _decklassifier = decklassifier
+    _load_deck = load_deck
+
+
+def _classify_decks(decks: list[PlayableDeck]) -> list[Classification]:
+    return [
+        (archetype.name if archetype else None, score)
+        for archetype, score in _decklassifier.classify_decks(decks)
+    ]
+
+
+def _classify_deck_files(deck_files: list[str]) -> list[Optional[Classification]]:
+    decks = [_load_deck(deck_file) for deck_file in deck_files]
+    classifications = iter(_classify_decks([d for d in decks if d]))
+    return [next(classifications) if deck else None for deck in decks]
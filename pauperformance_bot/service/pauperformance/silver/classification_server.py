@@ -0,0 +1,227 @@
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import jsonpickle
+from aiohttp import web
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    BREW_CLASSIFICATION_THRESHOLD,
+    CLASSIFICATION_SERVER_BATCH_SIZE,
+    CLASSIFICATION_SERVER_MAX_WAIT,
+)
+from pauperformance_bot.entity.api.miscellanea import DPLMeta
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+from pauperformance_bot.service.pauperformance.silver.classification_pool import (
+    create_classification_pool,
+    submit_decks,
+)
+from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.service.pauperformance.silver.micro_batcher import MicroBatcher
+from pauperformance_bot.util.json_stream import aiter_json_array
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+
+class ClassificationServer:
+    """Asyncio front end of a pool of processes classifying APL and DPL decks.
+
+    The model is built by decklassifier_factory in the background once the server
+    starts, and /health answers 503 until it is ready. Decks are decoded while
+    request bodies are still being read.
+
+    By default, decks are classified one at a time, in the order they are read,
+    and confidently classified decks are learned (as get_dpl_metagame does): they
+    are compared with the following decks, across requests. Without
+    learn_on_the_fly, the model stays the same across requests, and the decks of
+    concurrent requests are classified together by a pool of processes (see
+    MicroBatcher), one batch per worker at a time: /stats reports batches and
+    latency percentiles.
+    """
+
+    def __init__(
+        self,
+        decklassifier_factory: Callable[[], Decklassifier],
+        max_workers: Optional[int] = None,
+        batch_size: int = CLASSIFICATION_SERVER_BATCH_SIZE,
+        max_wait: float = CLASSIFICATION_SERVER_MAX_WAIT,
+        brew_threshold: float = BREW_CLASSIFICATION_THRESHOLD,
+        learn_on_the_fly: bool = True,
+    ):
+        self.decklassifier_factory: Callable[[], Decklassifier] = decklassifier_factory
+        self.max_workers: Optional[int] = max_workers
+        self.batch_size: int = batch_size
+        self.max_wait: float = max_wait
+        self.brew_threshold: float = brew_threshold
+        self.learn_on_the_fly: bool = learn_on_the_fly
+        self.decklassifier: Optional[Decklassifier] = None
+        self._pool: Optional[Executor] = None
+        self._batcher: Optional[MicroBatcher] = None
+        self._submit: Optional[Callable[[PlayableDeck], Future]] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._submit is not None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/health", self.health),
+                web.get("/stats", self.stats),
+                web.post("/dpl", self.dpl_classifier),
+                web.post("/apl", self.apl_classifier),
+            ]
+        )
+        app.on_startup.append(self._start)
+        app.on_cleanup.append(self._stop)
+        return app
+
+    def run(self, port: int):
+        web.run_app(self.create_app(), port=port)
+
+    async def _start(self, _):
+        self._loading = asyncio.create_task(self._load())
+
+    async def _load(self):
+        logger.info("Loading classification model...")
+        loop = asyncio.get_running_loop()
+        create_pool = (
+            self._create_learner if self.learn_on_the_fly else self._create_pool
+        )
+        try:
+            self.decklassifier, self._pool = await loop.run_in_executor(
+                None, create_pool
+            )
+        except Exception as e:
+            logger.error(f"Unable to load classification model: {e}")
+            raise
+        if self.learn_on_the_fly:
+            self._submit = lambda deck: self._pool.submit(
+                self._classify_and_learn, deck
+            )
+        else:
+            self._batcher = MicroBatcher(
+                lambda decks: submit_decks(self._pool, decks).result(),
+                self.batch_size,
+                self.max_wait,
+                concurrency=self.max_workers or os.cpu_count() or 1,
+            )
+            self._submit = self._batcher.submit
+        logger.info("Loaded classification model.")
+
+    def _create_pool(self) -> tuple[Decklassifier, Executor]:
+        decklassifier = self.decklassifier_factory()
+        return decklassifier, create_classification_pool(
+            decklassifier, self.max_workers
+        )
+
+    def _create_learner(self) -> tuple[Decklassifier, Executor]:
+        # a single thread owns the model, which changes with every learned deck
+        decklassifier = self.decklassifier_factory()
+        decklassifier.warm_up()
+        return decklassifier, ThreadPoolExecutor(max_workers=1)
+
+    def _classify_and_learn(self, deck: PlayableDeck) -> tuple[Optional[str], float]:
+        archetype, similarity = self.decklassifier.classify_and_learn_deck(
+            deck, self.brew_threshold
+        )
+        return archetype.name if archetype else None, similarity
+
+    async def _stop(self, _):
+        if self._loading:
+            self._loading.cancel()
+            await asyncio.gather(self._loading, return_exceptions=True)
+        if self._batcher:
+            await asyncio.get_running_loop().run_in_executor(None, self._batcher.close)
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def health(self, _: web.Request) -> web.Response:
+        if not self.ready:
+            return web.json_response({"status": "loading"}, status=503)
+        return web.json_response({"status": "ready"})
+
+    async def stats(self, _: web.Request) -> web.Response:
+        if not self.ready:
+            return web.json_response({"error": "Model not loaded yet"}, status=503)
+        if self._batcher is None:
+            return web.json_response(
+                {"learned_decks": len(self.decklassifier.learned_index)}
+            )
+        return web.json_response(self._batcher.stats())
+
+    async def dpl_classifier(self, request: web.Request) -> web.Response:
+        def respond(classified):
+            dpl_meta = DPLMeta(
+                name="DPL metagame",
+                dpl_decks=[
+                    Decklassifier.get_dpl_deck(
+                        deck_id, archetype_name, similarity, self.brew_threshold
+                    )
+                    for deck_id, (archetype_name, similarity) in classified
+                ],
+            )
+            return web.Response(
+                text=jsonpickle.encode(dpl_meta, make_refs=False, warn=True),
+                content_type="application/json",
+            )
+
+        return await self._handle(request, None, lambda deck: deck, respond)
+
+    async def apl_classifier(self, request: web.Request) -> web.Response:
+        def respond(classified):
+            return web.json_response(
+                {
+                    deck_id: Decklassifier.get_dpl_deck(
+                        deck_id, archetype_name, similarity, self.brew_threshold
+                    ).archetype
+                    for deck_id, (archetype_name, similarity) in classified
+                }
+            )
+
+        def to_dpl_deck(deck):
+            return {
+                "id": deck["id"],
+                "cards": {
+                    "mainboard": deck["mainDeck"],
+                    "sideboard": deck["sideboard"],
+                },
+            }
+
+        return await self._handle(request, "decks", to_dpl_deck, respond)
+
+    async def _handle(self, request, key, to_dpl_deck, respond) -> web.Response:
+        if not self.ready:
+            return web.json_response({"error": "Model not loaded yet"}, status=503)
+        try:
+            deck_ids, classifications = await self._read_decks(
+                request, key, to_dpl_deck
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            return web.json_response({"error": f"Invalid request: {e}"}, status=400)
+        try:
+            return respond(zip(deck_ids, await asyncio.gather(*classifications)))
+        except Exception as e:
+            return web.json_response({"error": str(e)}, status=500)
+
+    async def _read_decks(
+        self, request: web.Request, key: Optional[str], to_dpl_deck: Callable
+    ) -> tuple[list[str], list[asyncio.Future]]:
+        deck_ids, classifications = [], []
+        try:
+            # decks are classified while the rest of the request is still read
+            async for deck in aiter_json_array(request.content.iter_any(), key):
+                deck_id, playable_deck = self.decklassifier.parse_dpl_deck(
+                    to_dpl_deck(deck)
+                )
+                deck_ids.append(deck_id)
+                classifications.append(asyncio.wrap_future(self._submit(playable_deck)))
+        except BaseException:
+            for classification in classifications:
+                classification.cancel()
+            raise
+        return deck_ids, classifications
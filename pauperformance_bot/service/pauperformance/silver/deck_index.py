@@ -0,0 +1,791 @@
+import math
+from threading import RLock
+from typing import Hashable, Iterable, Iterator, Optional
+
+import numpy as np
+from scipy import sparse
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    MAINBOARD_SIMILARITY_WEIGHT,
+    MAINBOARD_WEIGHT,
+    SIDEBOARD_SIMILARITY_WEIGHT,
+    SIDEBOARD_WEIGHT,
+)
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+
+
+class CardVocabulary:
+    """Interns card names to contiguous integer ids, i.e. matrix columns."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: dict[str, int] = {}
+        self.names: list[str] = []
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def intern(self, name: str) -> int:
+        card_id = self._ids.get(name)
+        if card_id is None:
+            card_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return card_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+
+def _magnitude(cards_map: dict) -> float:
+    return math.sqrt(sum(qty * qty for qty in cards_map.values()))
+
+
+def _cosine(dots: np.ndarray, mags1: np.ndarray, mags2: np.ndarray, w: float):
+    # Mirrors Decklassifier._sparse_cosine_similarity, one matrix at a time.
+    if w == 0:
+        return np.ones_like(dots)
+    denominators = np.outer(mags1, mags2)
+    return np.divide(
+        dots, denominators, out=np.zeros_like(dots), where=denominators != 0
+    )
+
+
+class DeckFingerprints:
+    """Sparse mainboard/sideboard fingerprints of a batch of decks."""
+
+    def __init__(
+        self,
+        mainboard: sparse.csr_matrix,
+        mainboard_magnitudes: np.ndarray,
+        sideboard: sparse.csr_matrix,
+        sideboard_magnitudes: np.ndarray,
+    ):
+        self.mainboard: sparse.csr_matrix = mainboard
+        self.mainboard_magnitudes: np.ndarray = mainboard_magnitudes
+        self.sideboard: sparse.csr_matrix = sideboard
+        self.sideboard_magnitudes: np.ndarray = sideboard_magnitudes
+
+    def __len__(self):
+        return self.mainboard.shape[0]
+
+    def __getitem__(self, rows: slice) -> "DeckFingerprints":
+        return DeckFingerprints(
+            self.mainboard[rows],
+            self.mainboard_magnitudes[rows],
+            self.sideboard[rows],
+            self.sideboard_magnitudes[rows],
+        )
+
+
+class DeckFingerprintIndex:
+    """Known decks stored as CSR card-quantity matrices, one row per deck.
+
+    Rows hold raw card quantities and the per-row magnitudes are precomputed, so
+    that a whole batch of queries is scored with one sparse product per board.
+    Scores are bit-for-bit identical to the pairwise cosine similarity computed by
+    Decklassifier, because both compute integer dot products first and divide by
+    the same magnitudes afterwards.
+
+    Rows are visited grouped by label (labels in first-seen order, rows in
+    insertion order): this is the order Decklassifier has always used to walk
+    its known decks, and it decides which row wins a tie.
+    """
+
+    def __init__(self, vocabulary: Optional[CardVocabulary] = None):
+        self.vocabulary: CardVocabulary = (
+            vocabulary if vocabulary is not None else CardVocabulary()
+        )
+        self.labels: list[Hashable] = []
+        self._label_ids: dict[Hashable, int] = {}
+        self._row_labels: list[int] = []
+        self._main_rows: list[tuple[list[int], list[int]]] = []
+        self._side_rows: list[tuple[list[int], list[int]]] = []
+        self._main_magnitudes: list[float] = []
+        self._side_magnitudes: list[float] = []
+        # rows restored by from_arrays, stored before the rows above
+        self._base: Optional[tuple[DeckFingerprints, np.ndarray]] = None
+        self._matrices: Optional[tuple[DeckFingerprints, np.ndarray, np.ndarray]] = None
+        self._postings: Optional[tuple[CardPostings, CardPostings, np.ndarray]] = None
+
+    def __len__(self):
+        return self._base_size + len(self._row_labels)
+
+    @property
+    def _base_size(self) -> int:
+        return len(self._base[0]) if self._base is not None else 0
+
+    def add(self, deck: PlayableDeck, label: Hashable) -> int:
+        if label not in self._label_ids:
+            self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        main = deck.mainboard_cards_map
+        side = deck.sideboard_cards_map
+        self._main_rows.append(self._intern_row(main))
+        self._side_rows.append(self._intern_row(side))
+        self._main_magnitudes.append(_magnitude(main))
+        self._side_magnitudes.append(_magnitude(side))
+        self._row_labels.append(self._label_ids[label])
+        self._matrices = None
+        self._postings = None
+        return len(self) - 1
+
+    def _intern_row(self, cards_map: dict) -> tuple[list[int], list[int]]:
+        return [self.vocabulary.intern(c) for c in cards_map], list(cards_map.values())
+
+    def _to_csr(self, rows: list[tuple[list[int], list[int]]]) -> sparse.csr_matrix:
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids, _ in rows], out=indptr[1:])
+        indices = np.fromiter(
+            (i for ids, _ in rows for i in ids), dtype=np.int32, count=indptr[-1]
+        )
+        data = np.fromiter(
+            (q for _, qty in rows for q in qty), dtype=np.float64, count=indptr[-1]
+        )
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(rows), len(self.vocabulary))
+        )
+
+    def _build(self) -> tuple[DeckFingerprints, np.ndarray, np.ndarray]:
+        if self._matrices is None:
+            fingerprints = DeckFingerprints(
+                self._to_csr(self._main_rows),
+                np.array(self._main_magnitudes, dtype=np.float64),
+                self._to_csr(self._side_rows),
+                np.array(self._side_magnitudes, dtype=np.float64),
+            )
+            row_labels = np.array(self._row_labels, dtype=np.int64)
+            if self._base is not None:
+                base, base_row_labels = self._base
+                self._fit_columns(base)
+                if len(fingerprints) > 0:
+                    fingerprints = _stack(base, fingerprints)
+                else:
+                    fingerprints = base
+                row_labels = np.concatenate((base_row_labels, row_labels))
+            row_order = np.argsort(row_labels, kind="stable")
+            self._matrices = fingerprints, row_labels, row_order
+        return self._matrices
+
+    @property
+    def fingerprints(self) -> DeckFingerprints:
+        """Fingerprints of all the rows, in the current column space."""
+        fingerprints = self._build()[0]
+        self._fit_columns(fingerprints)
+        return fingerprints
+
+    @property
+    def row_label_ids(self) -> np.ndarray:
+        return self._build()[1]
+
+    @property
+    def row_order(self) -> np.ndarray:
+        """Permutation of the rows in visiting order (see class docstring)."""
+        return self._build()[2]
+
+    @property
+    def ordered_label_ids(self) -> np.ndarray:
+        _, row_labels, row_order = self._build()
+        return row_labels[row_order]
+
+    def fingerprint(self, decks: list[PlayableDeck]) -> DeckFingerprints:
+        """Builds query fingerprints in the column space of this index.
+
+        Cards missing from the vocabulary cannot contribute to any dot product,
+        so they are skipped; they still count towards the magnitudes.
+        """
+        rows_main, rows_side, mags_main, mags_side = [], [], [], []
+        for deck in decks:
+            main = deck.mainboard_cards_map
+            side = deck.sideboard_cards_map
+            rows_main.append(self._lookup_row(main))
+            rows_side.append(self._lookup_row(side))
+            mags_main.append(_magnitude(main))
+            mags_side.append(_magnitude(side))
+        return DeckFingerprints(
+            self._to_csr(rows_main),
+            np.array(mags_main, dtype=np.float64),
+            self._to_csr(rows_side),
+            np.array(mags_side, dtype=np.float64),
+        )
+
+    def _lookup_row(self, cards_map: dict) -> tuple[list[int], list[int]]:
+        ids, quantities = [], []
+        for card, qty in cards_map.items():
+            card_id = self.vocabulary.get(card)
+            if card_id is not None:
+                ids.append(card_id)
+                quantities.append(qty)
+        return ids, quantities
+
+    def similarities(self, queries: DeckFingerprints) -> np.ndarray:
+        """Returns the (queries x rows) matrix of deck similarities."""
+        known = self._build()[0]
+        if len(known) == 0 or len(queries) == 0:
+            return np.zeros((len(queries), len(known)), dtype=np.float64)
+        # The vocabulary may be shared and may have grown after either side was
+        # built: new columns are empty, so they can be appended for free.
+        self._fit_columns(known)
+        self._fit_columns(queries)
+        return _similarities(queries, known)
+
+    def top_k(
+        self,
+        queries: DeckFingerprints,
+        k: int,
+        label_mask: Optional[np.ndarray] = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Returns, for each query, its k most similar rows with their scores.
+
+        Neighbours are sorted by decreasing score, ties in visiting order, and
+        only rows with a positive score are returned: the first neighbour is the
+        one masked_similarities and best_matches would pick, with the same score.
+        label_mask is as in masked_similarities.
+
+        Rows are retrieved in the style of MaxScore: the cards of a query are
+        visited by decreasing upper bound of their contribution to any score,
+        accumulating dot products through the postings of each card, until the
+        bound of the cards left cannot lift an unseen row into the top k. The
+        cards left are then only accumulated for the rows that can still make it.
+        """
+        known = self._build()[0]
+        if len(known) == 0:
+            return [[] for _ in range(len(queries))]
+        self._fit_columns(known)
+        self._fit_columns(queries)
+        main_postings, side_postings, row_positions = self._get_postings()
+        row_label_ids = self.row_label_ids
+        neighbours = []
+        for i in range(len(queries)):
+            if label_mask is not None:
+                eligible = label_mask[i, row_label_ids]
+            else:
+                eligible = np.ones(len(known), dtype=bool)
+            candidates, (main_dots, side_dots) = _retrieve(
+                _query_terms(
+                    queries.mainboard,
+                    queries.mainboard_magnitudes[i],
+                    i,
+                    main_postings,
+                    _MAINBOARD,
+                )
+                + _query_terms(
+                    queries.sideboard,
+                    queries.sideboard_magnitudes[i],
+                    i,
+                    side_postings,
+                    _SIDEBOARD,
+                ),
+                (main_postings, side_postings),
+                eligible,
+                k,
+            )
+            scores = _combine(
+                _cosine(
+                    main_dots[np.newaxis, candidates],
+                    queries.mainboard_magnitudes[[i]],
+                    known.mainboard_magnitudes[candidates],
+                    MAINBOARD_WEIGHT,
+                ),
+                _cosine(
+                    side_dots[np.newaxis, candidates],
+                    queries.sideboard_magnitudes[[i]],
+                    known.sideboard_magnitudes[candidates],
+                    SIDEBOARD_WEIGHT,
+                ),
+            )[0]
+            ranking = np.lexsort((row_positions[candidates], -scores))[:k]
+            neighbours.append(
+                [
+                    (int(candidates[j]), float(scores[j]))
+                    for j in ranking
+                    if scores[j] > 0
+                ]
+            )
+        return neighbours
+
+    def _get_postings(self) -> tuple["CardPostings", "CardPostings", np.ndarray]:
+        if self._postings is None:
+            known = self._build()[0]
+            row_positions = np.empty(len(known), dtype=np.int64)
+            row_positions[self.row_order] = np.arange(len(known))
+            self._postings = (
+                CardPostings(known.mainboard, known.mainboard_magnitudes),
+                CardPostings(known.sideboard, known.sideboard_magnitudes),
+                row_positions,
+            )
+        return self._postings
+
+    def masked_similarities(
+        self, queries: DeckFingerprints, label_mask: np.ndarray
+    ) -> np.ndarray:
+        """Returns the (queries x rows) similarities with rows in visiting order.
+
+        label_mask is a (queries x labels) boolean matrix: the similarity of a
+        query with a row whose label is masked out is zero.
+        """
+        scores = self.similarities(queries)[:, self.row_order]
+        return np.where(label_mask[:, self.ordered_label_ids], scores, 0.0)
+
+    def rows(self) -> Iterator[tuple[Hashable, dict[str, int], dict[str, int]]]:
+        """Yields label, mainboard and sideboard cards maps of rows, in order."""
+        fingerprints, row_labels, _ = self._build()
+        names = self.vocabulary.names
+        for i, label_id in enumerate(row_labels):
+            yield (
+                self.labels[label_id],
+                _cards_map(fingerprints.mainboard, i, names),
+                _cards_map(fingerprints.sideboard, i, names),
+            )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Returns the arrays from_arrays needs to restore this index."""
+        fingerprints, row_labels, _ = self._build()
+        return {
+            "main_data": fingerprints.mainboard.data,
+            "main_indices": fingerprints.mainboard.indices,
+            "main_indptr": fingerprints.mainboard.indptr,
+            "main_magnitudes": fingerprints.mainboard_magnitudes,
+            "side_data": fingerprints.sideboard.data,
+            "side_indices": fingerprints.sideboard.indices,
+            "side_indptr": fingerprints.sideboard.indptr,
+            "side_magnitudes": fingerprints.sideboard_magnitudes,
+            "row_labels": row_labels,
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        arrays: dict[str, np.ndarray],
+        labels: list[Hashable],
+        vocabulary: CardVocabulary,
+    ) -> "DeckFingerprintIndex":
+        """Restores an index saved with to_arrays, without copying its arrays.
+
+        Column ids in arrays must refer to vocabulary.
+        """
+        index = cls(vocabulary)
+        for label in labels:
+            index._label_ids[label] = len(index.labels)
+            index.labels.append(label)
+        nr_rows = len(arrays["row_labels"])
+        shape = (nr_rows, len(vocabulary))
+        index._base = (
+            DeckFingerprints(
+                sparse.csr_matrix(
+                    (
+                        arrays["main_data"],
+                        arrays["main_indices"],
+                        arrays["main_indptr"],
+                    ),
+                    shape=shape,
+                ),
+                arrays["main_magnitudes"],
+                sparse.csr_matrix(
+                    (
+                        arrays["side_data"],
+                        arrays["side_indices"],
+                        arrays["side_indptr"],
+                    ),
+                    shape=shape,
+                ),
+                arrays["side_magnitudes"],
+            ),
+            arrays["row_labels"],
+        )
+        return index
+
+    def _fit_columns(self, fingerprints: DeckFingerprints):
+        _fit_columns(fingerprints, len(self.vocabulary))
+
+
+class CentroidIndex:
+    """One centroid per label, summing the normalized rows of that label.
+
+    The centroid of a label points in the average direction of its decks, so the
+    similarity of a query with it estimates how close the query is to the label
+    as a whole, at the cost of one product with a (labels x cards) matrix.
+    """
+
+    def __init__(self, labels: list[Hashable], indexes: list[DeckFingerprintIndex]):
+        self.labels: list[Hashable] = labels
+        label_ids = {label: i for i, label in enumerate(labels)}
+        self.vocabulary: CardVocabulary = indexes[0].vocabulary
+        shape = (len(labels), len(self.vocabulary))
+        mainboard = sparse.csr_matrix(shape, dtype=np.float64)
+        sideboard = sparse.csr_matrix(shape, dtype=np.float64)
+        for index in indexes:
+            if len(index) == 0:
+                continue
+            known = index.fingerprints
+            row_labels = [label_ids[index.labels[i]] for i in index.row_label_ids]
+            membership = sparse.csr_matrix(
+                (np.ones(len(known)), (row_labels, np.arange(len(known)))),
+                shape=(len(labels), len(known)),
+            )
+            mainboard = mainboard + membership @ _normalize(
+                known.mainboard, known.mainboard_magnitudes
+            )
+            sideboard = sideboard + membership @ _normalize(
+                known.sideboard, known.sideboard_magnitudes
+            )
+        self.fingerprints: DeckFingerprints = DeckFingerprints(
+            mainboard.tocsr(),
+            _row_norms(mainboard),
+            sideboard.tocsr(),
+            _row_norms(sideboard),
+        )
+
+    def similarities(self, queries: DeckFingerprints) -> np.ndarray:
+        """Returns the (queries x labels) matrix of similarities with centroids."""
+        if len(queries) == 0:
+            return np.zeros((0, len(self.labels)), dtype=np.float64)
+        _fit_columns(self.fingerprints, len(self.vocabulary))
+        _fit_columns(queries, len(self.vocabulary))
+        return _similarities(queries, self.fingerprints)
+
+    def top_labels(
+        self, queries: DeckFingerprints, n: int, label_mask: np.ndarray
+    ) -> np.ndarray:
+        """Restricts label_mask, a (queries x labels) mask, to the n best labels."""
+        if n >= len(self.labels):
+            return label_mask
+        scores = np.where(label_mask, self.similarities(queries), -np.inf)
+        best = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top = np.zeros_like(label_mask, dtype=bool)
+        np.put_along_axis(top, best, True, axis=1)
+        return label_mask & top
+
+
+class LearnedDeckIndex:
+    """Bounded tier of decks learned while classifying, cheap to update.
+
+    Rows are appended to slots of arrays that double in size up to capacity: once
+    full, each new row replaces the oldest one. Instead of matrices, each board
+    keeps per-card postings (slot to quantity), updated by every insert and
+    eviction in time proportional to the size of the deck, and queries accumulate
+    integer dot products through them. Scores are then the same as the ones of
+    DeckFingerprintIndex, and rows are visited oldest first.
+    """
+
+    def __init__(self, vocabulary: CardVocabulary, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Invalid capacity for learned decks: {capacity}.")
+        self.vocabulary: CardVocabulary = vocabulary
+        self.capacity: int = capacity
+        self.labels: list[Hashable] = []
+        self._label_ids: dict[Hashable, int] = {}
+        self._size: int = 0
+        self._oldest: int = 0  # slot of the oldest row, once full
+        self._row_labels: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._magnitudes: np.ndarray = np.zeros((2, 0), dtype=np.float64)
+        self._rows: list[tuple[dict[int, int], dict[int, int]]] = []
+        self._postings: tuple[dict[int, dict[int, int]], ...] = ({}, {})
+        self._lock: RLock = RLock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def row_label_ids(self) -> np.ndarray:
+        """Label ids of the rows, by slot."""
+        return self._row_labels
+
+    @property
+    def ordered_label_ids(self) -> np.ndarray:
+        return self._row_labels[self._ordered_slots()]
+
+    def add(self, deck: PlayableDeck, label: Hashable) -> int:
+        """Stores deck as a row, evicting the oldest row if full: returns its slot."""
+        with self._lock:
+            if label not in self._label_ids:
+                self._label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            if self._size < self.capacity:
+                slot = self._size
+                if slot == len(self._row_labels):
+                    self._grow()
+                self._rows.append(({}, {}))
+                self._size += 1
+            else:
+                slot = self._oldest
+                self._oldest = (slot + 1) % self.capacity
+                for row, postings in zip(self._rows[slot], self._postings):
+                    for card_id in row:
+                        del postings[card_id][slot]
+            rows = tuple(
+                {self.vocabulary.intern(c): q for c, q in cards_map.items()}
+                for cards_map in (deck.mainboard_cards_map, deck.sideboard_cards_map)
+            )
+            for board, (row, postings) in enumerate(zip(rows, self._postings)):
+                for card_id, qty in row.items():
+                    postings.setdefault(card_id, {})[slot] = qty
+                self._magnitudes[board, slot] = _magnitude(row)
+            self._rows[slot] = rows
+            self._row_labels[slot] = self._label_ids[label]
+            return slot
+
+    def _grow(self):
+        size = min(self.capacity, max(16, 2 * len(self._row_labels)))
+        row_labels = np.zeros(size, dtype=np.int64)
+        row_labels[: len(self._row_labels)] = self._row_labels
+        magnitudes = np.zeros((2, size), dtype=np.float64)
+        magnitudes[:, : self._magnitudes.shape[1]] = self._magnitudes
+        self._row_labels, self._magnitudes = row_labels, magnitudes
+
+    def _ordered_slots(self) -> np.ndarray:
+        slots = np.arange(self._size)
+        return np.roll(slots, -self._oldest) if self._size == self.capacity else slots
+
+    def rows(self) -> Iterator[tuple[Hashable, dict[str, int], dict[str, int]]]:
+        """As DeckFingerprintIndex.rows, oldest first."""
+        with self._lock:
+            names = self.vocabulary.names
+            rows = [
+                (
+                    self.labels[self._row_labels[slot]],
+                    *(
+                        {names[card_id]: qty for card_id, qty in board.items()}
+                        for board in self._rows[slot]
+                    ),
+                )
+                for slot in self._ordered_slots()
+            ]
+        yield from rows
+
+    def masked_similarities(
+        self, queries: DeckFingerprints, label_mask: np.ndarray
+    ) -> np.ndarray:
+        """As DeckFingerprintIndex.masked_similarities, rows oldest first."""
+        with self._lock:
+            slots = self._ordered_slots()
+            if len(slots) == 0 or len(queries) == 0:
+                return np.zeros((len(queries), len(slots)), dtype=np.float64)
+            main_dots, side_dots = self._dots(queries)[:, :, slots]
+            scores = _combine(
+                _cosine(
+                    main_dots,
+                    queries.mainboard_magnitudes,
+                    self._magnitudes[_MAINBOARD, slots],
+                    MAINBOARD_WEIGHT,
+                ),
+                _cosine(
+                    side_dots,
+                    queries.sideboard_magnitudes,
+                    self._magnitudes[_SIDEBOARD, slots],
+                    SIDEBOARD_WEIGHT,
+                ),
+            )
+            return np.where(label_mask[:, self._row_labels[slots]], scores, 0.0)
+
+    def top_k(
+        self, queries: DeckFingerprints, k: int, label_mask: np.ndarray
+    ) -> list[list[tuple[int, float]]]:
+        """As DeckFingerprintIndex.top_k, with rows identified by their slots."""
+        with self._lock:
+            slots = self._ordered_slots()
+            scores = self.masked_similarities(queries, label_mask)
+        neighbours = []
+        for query_scores in scores:
+            ranking = np.lexsort((np.arange(len(slots)), -query_scores))[:k]
+            neighbours.append(
+                [
+                    (int(slots[j]), float(query_scores[j]))
+                    for j in ranking
+                    if query_scores[j] > 0
+                ]
+            )
+        return neighbours
+
+    def _dots(self, queries: DeckFingerprints) -> np.ndarray:
+        # (boards x queries x slots) integer dot products, in floating point
+        dots = np.zeros((2, len(queries), len(self._row_labels)), dtype=np.float64)
+        boards = (queries.mainboard, queries.sideboard)
+        for board, (matrix, postings) in enumerate(zip(boards, self._postings)):
+            for i in range(len(queries)):
+                start, end = matrix.indptr[i], matrix.indptr[i + 1]
+                for card_id, qty in zip(
+                    matrix.indices[start:end], matrix.data[start:end]
+                ):
+                    posting = postings.get(card_id)
+                    if posting:
+                        slots = np.fromiter(posting, dtype=np.int64, count=len(posting))
+                        quantities = np.fromiter(
+                            posting.values(), dtype=np.float64, count=len(posting)
+                        )
+                        dots[board, i, slots] += qty * quantities
+        return dots
+
+
+def _fit_columns(fingerprints: DeckFingerprints, columns: int):
+    for matrix in (fingerprints.mainboard, fingerprints.sideboard):
+        if matrix.shape[1] < columns:
+            matrix.resize((matrix.shape[0], columns))
+
+
+def _inverse_magnitudes(magnitudes: np.ndarray) -> np.ndarray:
+    return np.divide(
+        1.0,
+        magnitudes,
+        out=np.zeros(len(magnitudes), dtype=np.float64),
+        where=magnitudes != 0,
+    )
+
+
+def _normalize(matrix: sparse.csr_matrix, magnitudes: np.ndarray) -> sparse.csr_matrix:
+    return sparse.diags(_inverse_magnitudes(magnitudes)) @ matrix
+
+
+def _row_norms(matrix: sparse.csr_matrix) -> np.ndarray:
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+
+class CardPostings:
+    """Inverted index of a board: for each card, the rows playing it.
+
+    Each posting holds the quantity of the card in the row and that quantity
+    over the magnitude of the row, i.e. the row side of its contribution to a
+    cosine similarity: the largest of them bounds that contribution.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, magnitudes: np.ndarray):
+        postings = sparse.csc_matrix(matrix, dtype=np.float64)
+        postings.sort_indices()
+        self.indptr: np.ndarray = postings.indptr
+        self.rows: np.ndarray = postings.indices
+        self.quantities: np.ndarray = postings.data
+        self.weights: np.ndarray = (
+            self.quantities * _inverse_magnitudes(magnitudes)[self.rows]
+        )
+        self.upper_bounds: np.ndarray = np.zeros(postings.shape[1], dtype=np.float64)
+        non_empty = np.diff(self.indptr) > 0
+        self.upper_bounds[non_empty] = np.maximum.reduceat(
+            self.weights, self.indptr[:-1][non_empty]
+        )
+
+    def __len__(self):
+        return len(self.upper_bounds)
+
+    def get(self, card_id: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        start, end = self.indptr[card_id], self.indptr[card_id + 1]
+        return (
+            self.rows[start:end],
+            self.quantities[start:end],
+            self.weights[start:end],
+        )
+
+
+# tolerance on the bounds, for the rounding errors of partial scores
+_BOUND_TOLERANCE = 1e-9
+_MAINBOARD, _SIDEBOARD = 0, 1
+_BOARD_WEIGHTS = (MAINBOARD_SIMILARITY_WEIGHT, SIDEBOARD_SIMILARITY_WEIGHT)
+
+
+def _query_terms(
+    matrix: sparse.csr_matrix,
+    magnitude: float,
+    row: int,
+    postings: CardPostings,
+    board: int,
+) -> list[tuple[float, float, float, int, int]]:
+    # (upper bound, weight, quantity, card, board) of the cards of a board
+    if magnitude == 0:
+        return []
+    weight = _BOARD_WEIGHTS[board] / (sum(_BOARD_WEIGHTS) * magnitude)
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    return [
+        (
+            qty * weight * postings.upper_bounds[card_id],
+            qty * weight,
+            qty,
+            card_id,
+            board,
+        )
+        for card_id, qty in zip(matrix.indices[start:end], matrix.data[start:end])
+        if card_id < len(postings) and postings.upper_bounds[card_id] > 0
+    ]
+
+
+def _retrieve(
+    terms: list,
+    postings: tuple[CardPostings, CardPostings],
+    eligible: np.ndarray,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the rows that can be among the k best and their dot products.
+
+    Dot products (one row per board) are exact for the returned rows.
+    """
+    dots = np.zeros((len(postings), len(eligible)), dtype=np.float64)
+    terms = sorted(terms, key=lambda term: -term[0])
+    left_bounds = np.cumsum([term[0] for term in reversed(terms)])[::-1].tolist()
+    partial_scores = np.where(eligible, 0.0, -np.inf)
+    nr_eligible = int(eligible.sum())
+    threshold, left_bound, nr_visited = -np.inf, 0.0, len(terms)
+    for i, (_, weight, qty, card_id, board) in enumerate(terms):
+        if left_bounds[i] + _BOUND_TOLERANCE < threshold:
+            # no row can gain enough from the cards left to enter the top k
+            left_bound, nr_visited = left_bounds[i], i
+            break
+        rows, quantities, row_weights = postings[board].get(card_id)
+        partial_scores[rows] += weight * row_weights
+        dots[board, rows] += qty * quantities
+        if nr_eligible >= k:
+            threshold = np.partition(partial_scores, -k)[-k]
+    # rows no card was visited for are either bounded out or share no card
+    is_candidate = (partial_scores > 0) & (
+        partial_scores + left_bound + _BOUND_TOLERANCE >= threshold
+    )
+    for _, _, qty, card_id, board in terms[nr_visited:]:
+        rows, quantities, _ = postings[board].get(card_id)
+        visible = is_candidate[rows]
+        dots[board, rows[visible]] += qty * quantities[visible]
+    return np.flatnonzero(is_candidate), dots
+
+
+def _similarities(queries: DeckFingerprints, known: DeckFingerprints) -> np.ndarray:
+    sim_main = _cosine(
+        (queries.mainboard @ known.mainboard.T).toarray(),
+        queries.mainboard_magnitudes,
+        known.mainboard_magnitudes,
+        MAINBOARD_WEIGHT,
+    )
+    sim_side = _cosine(
+        (queries.sideboard @ known.sideboard.T).toarray(),
+        queries.sideboard_magnitudes,
+        known.sideboard_magnitudes,
+        SIDEBOARD_WEIGHT,
+    )
+    return _combine(sim_main, sim_side)
+
+
+def _combine(sim_main: np.ndarray, sim_side: np.ndarray) -> np.ndarray:
+    return (
+        MAINBOARD_SIMILARITY_WEIGHT * sim_main + SIDEBOARD_SIMILARITY_WEIGHT * sim_side
+    ) / (MAINBOARD_SIMILARITY_WEIGHT + SIDEBOARD_SIMILARITY_WEIGHT)
+
+
+def _stack(top: DeckFingerprints, bottom: DeckFingerprints) -> DeckFingerprints:
+    return DeckFingerprints(
+        sparse.vstack((top.mainboard, bottom.mainboard), format="csr"),
+        np.concatenate((top.mainboard_magnitudes, bottom.mainboard_magnitudes)),
+        sparse.vstack((top.sideboard, bottom.sideboard), format="csr"),
+        np.concatenate((top.sideboard_magnitudes, bottom.sideboard_magnitudes)),
+    )
+
+
+def _cards_map(matrix: sparse.csr_matrix, row: int, names: list[str]) -> dict:
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    return {
+        names[card_id]: int(qty)
+        for card_id, qty in zip(matrix.indices[start:end], matrix.data[start:end])
+    }
+
+
+def best_matches(scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns, for each row of scores, the first column holding its maximum."""
+    columns = np.argmax(scores, axis=1)
+    return columns, scores[np.arange(scores.shape[0]), columns]
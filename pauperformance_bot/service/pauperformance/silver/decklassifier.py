@@ -1,13 +1,30 @@
 import itertools
 import math
 from collections import defaultdict
-from typing import DefaultDict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from types import MappingProxyType
+from typing import DefaultDict, Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
 
 from pauperformance_bot.constant.mtg.game import BASIC_LANDS
 from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.myr import (
+    DECKLASSIFIER_MODEL_CACHE_DIR,
+    DECKLASSIFIER_RESULTS_CACHE_FILE,
+)
 from pauperformance_bot.constant.pauperformance.silver import (
     BREW_CLASSIFICATION_THRESHOLD,
+    CENTROID_PREFILTER_ARCHETYPES,
+    CLASSIFICATION_BATCH_SIZE,
+    DECKLASSIFIER_RESULTS_CACHE_MAX_AGE,
+    DECKLASSIFIER_RESULTS_CACHE_MAX_SIZE,
+    LEARNED_DECKS_CAPACITY,
+    MAINBOARD_SIMILARITY_WEIGHT,
     MAINBOARD_WEIGHT,
+    REFERENCE_DECKS_THREADS,
+    SIDEBOARD_SIMILARITY_WEIGHT,
     SIDEBOARD_WEIGHT,
 )
 from pauperformance_bot.entity.api.miscellanea import (
@@ -17,15 +34,39 @@ from pauperformance_bot.entity.api.miscellanea import (
     MetaShare,
 )
 from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.compact import CompactDeck
 from pauperformance_bot.entity.deck.playable import (
     PlayableDeck,
     PlayedCard,
+    parse_playable_deck_from_file,
     parse_playable_deck_from_lines,
 )
 from pauperformance_bot.service.mtg.mtggoldfish import MTGGoldfish
 from pauperformance_bot.service.pauperformance.pauperformance import (
     PauperformanceService,
 )
+from pauperformance_bot.service.pauperformance.silver.archetype_rules import (
+    ArchetypeRuleIndex,
+)
+from pauperformance_bot.service.pauperformance.silver.deck_index import (
+    CardVocabulary,
+    CentroidIndex,
+    DeckFingerprintIndex,
+    DeckFingerprints,
+    LearnedDeckIndex,
+    best_matches,
+)
+from pauperformance_bot.service.pauperformance.silver.model_snapshot import (
+    get_model_key,
+    load_model_snapshot,
+    save_model_snapshot,
+)
+from pauperformance_bot.service.pauperformance.silver.result_cache import (
+    ClassificationResultCache,
+    get_classified_deck_digest,
+    get_classifier_key,
+    get_learned_version,
+)
 from pauperformance_bot.util.log import get_application_logger
 from pauperformance_bot.util.math import truncate
 from pauperformance_bot.util.path import posix_path
@@ -38,53 +79,184 @@ class Decklassifier:
         self,
         pauperformance: PauperformanceService,
         academy_fs: AcademyFileSystem,
+        model_dir: Optional[str] = DECKLASSIFIER_MODEL_CACHE_DIR,
+        centroid_prefilter: Optional[int] = CENTROID_PREFILTER_ARCHETYPES,
+        results_cache_file: Optional[str] = DECKLASSIFIER_RESULTS_CACHE_FILE,
     ):
         self.pauperformance: PauperformanceService = pauperformance
         self.archetypes: list[ArchetypeConfig] = (
             self.pauperformance.config_reader.list_archetypes()
         )
+        self._archetype_ids: dict[ArchetypeConfig, int] = {
+            a: i for i, a in enumerate(self.archetypes)
+        }
+        self._archetypes_by_name: dict[str, ArchetypeConfig] = {
+            a.name: a for a in self.archetypes
+        }
+        self.archetype_rules: ArchetypeRuleIndex = ArchetypeRuleIndex(self.archetypes)
         self.academy_fs: AcademyFileSystem = academy_fs
-        self.known_decks: dict[
-            ArchetypeConfig, list[tuple[PlayableDeck, dict, float, dict, float]]
-        ] = {}
-        self._decks_cache: dict[str, tuple[PlayableDeck, dict, float, dict, float]] = {}
+        # where model snapshots are stored (None to always train from scratch)
+        self.model_dir: Optional[str] = model_dir
+        self._known_decks: Optional[dict[ArchetypeConfig, list[CompactDeck]]] = {}
+        # reference decks, read-only once preloaded (see preload_reference_decks)
+        self._decks_cache: Mapping[str, PlayableDeck] = {}
+        self._decks_cache_lock: Lock = Lock()
+        self._reference_decks_preloaded: bool = False
+        self.missing_reference_decks: set[str] = set()
+        # Card names are interned once and shared by all the fingerprint indexes.
+        self.vocabulary: CardVocabulary = CardVocabulary()
+        self.known_index: DeckFingerprintIndex = DeckFingerprintIndex(self.vocabulary)
+        self._reference_index: Optional[DeckFingerprintIndex] = None
+        # decks learned while classifying, oldest ones evicted first
+        self.learned_index: LearnedDeckIndex = LearnedDeckIndex(
+            self.vocabulary, LEARNED_DECKS_CAPACITY
+        )
+        # digest of the decks learned so far, in order (None until one is learned)
+        self._learned_version: Optional[str] = None
+        # number of candidate archetypes picked by centroids (None to compare all)
+        self.centroid_prefilter: Optional[int] = centroid_prefilter
+        self._centroids: Optional[CentroidIndex] = None
+        self._centroids_key: Optional[tuple] = None
+        # where classifications are cached (None to always classify from scratch)
+        self.results_cache: Optional[ClassificationResultCache] = (
+            ClassificationResultCache(results_cache_file)
+            if results_cache_file
+            else None
+        )
+        self._model_key: Optional[str] = None
+        self._classifier_keys: dict[Optional[int], str] = {}
         self.load_training_data()
+        if self.results_cache is not None:
+            self.results_cache.evict(
+                DECKLASSIFIER_RESULTS_CACHE_MAX_AGE,
+                DECKLASSIFIER_RESULTS_CACHE_MAX_SIZE,
+            )
+
+    @property
+    def known_decks(self) -> dict[ArchetypeConfig, list[CompactDeck]]:
+        """Training decks, followed by the decks learned so far, by archetype."""
+        if self._known_decks is None:
+            # the known decks of a model snapshot are rebuilt from its index
+            self._known_decks = {}
+            for archetype, mainboard, sideboard in self.known_index.rows():
+                self._known_decks.setdefault(archetype, []).append(
+                    CompactDeck.from_cards_maps(mainboard, sideboard)
+                )
+        if len(self.learned_index) == 0:
+            return self._known_decks
+        known_decks = {a: list(decks) for a, decks in self._known_decks.items()}
+        for archetype, mainboard, sideboard in self.learned_index.rows():
+            known_decks.setdefault(archetype, []).append(
+                CompactDeck.from_cards_maps(mainboard, sideboard)
+            )
+        return known_decks
 
     def load_training_data(self):
+        model_key = None
+        if self.model_dir or self.results_cache is not None:
+            model_key = get_model_key(self._list_training_files())
+            self._model_key = model_key
+            self._classifier_keys = {}
+        if self.model_dir:
+            known_index = load_model_snapshot(
+                self.model_dir,
+                model_key,
+                self._archetypes_by_name,
+                self.vocabulary,
+            )
+            if known_index is not None:
+                self.known_index = known_index
+                self._known_decks = None
+                return
         flat = self._load_mtggoldfish_tournament_training_data()
         flat += self._load_dpl_training_data()
-        # For better similarity results, we apply some assumptions on the decks.
-        # Upon classification, we'll apply the same assumptions.
-        for deck, _ in flat:
-            self._simplify_deck(deck)
-        self.known_decks = {}
+        self._known_decks = {}
+        self.known_index = DeckFingerprintIndex(self.vocabulary)
         for deck, archetype in flat:
-            self.known_decks.setdefault(archetype, []).append(
-                (deck, *self._deck_fingerprint(deck))
-            )
+            self.add_known_deck(deck, archetype)
+        if self.model_dir:
+            save_model_snapshot(self.model_dir, model_key, self.known_index)
 
-    def _load_training_data(
-        self, training_file, assets_data_deck_dir
-    ) -> list[tuple[PlayableDeck, ArchetypeConfig]]:
-        # Note: this method assumes all the decks in the training data are available in
-        # the academy as .txt to load and parse.
-        known_decks: list[tuple[PlayableDeck, ArchetypeConfig]] = []
-        training_data = [
+    def add_known_deck(
+        self, deck: Union[PlayableDeck, CompactDeck], archetype: ArchetypeConfig
+    ):
+        # deck is expected to be simplified already
+        if self._known_decks is not None:
+            if isinstance(deck, PlayableDeck):
+                deck = CompactDeck.from_playable(deck)
+            self._known_decks.setdefault(archetype, []).append(deck)
+        self.known_index.add(deck, archetype)
+
+    def classify_and_learn_deck(
+        self, deck: PlayableDeck, brew_threshold=BREW_CLASSIFICATION_THRESHOLD
+    ) -> Tuple[ArchetypeConfig, Optional[float]]:
+        # decks classified as brews are not learned
+        most_similar_archetype, highest_similarity = self.classify_deck(deck)
+        if highest_similarity >= brew_threshold:
+            self.learn_deck(deck, most_similar_archetype)
+        return most_similar_archetype, highest_similarity
+
+    def learn_deck(self, deck: PlayableDeck, archetype: ArchetypeConfig):
+        # deck is expected to be simplified already
+        self.learned_index.add(deck, archetype)
+        self._learned_version = get_learned_version(
+            self._learned_version, get_classified_deck_digest(deck), archetype.name
+        )
+
+    def _list_training_files(self) -> list[str]:
+        training_files = []
+        for training_file, assets_data_deck_dir in self._get_training_data_sources():
+            training_files.append(training_file)
+            training_files += [
+                posix_path(assets_data_deck_dir, f"{deck_id}.txt")
+                for deck_id, _ in self._read_training_data(training_file)
+            ]
+        return training_files
+
+    def _get_training_data_sources(self) -> list[tuple[str, str]]:
+        myr_file_system = self.pauperformance.config_reader.myr_file_system
+        return [
+            (
+                myr_file_system.MTGGOLDFISH_DECK_TRAINING_DATA,
+                self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
+            ),
+            (
+                myr_file_system.DPL_DECK_TRAINING_DATA,
+                self.academy_fs.ASSETS_DATA_DECK_DPL_DIR,
+            ),
+        ]
+
+    @staticmethod
+    def _read_training_data(training_file) -> list[tuple[str, str]]:
+        return [
             tuple(line.split(","))
             for line in open(training_file, "r").read().splitlines()
             if line != "" and not line.startswith("#")
         ]
+
+    def _load_training_data(
+        self, training_file, assets_data_deck_dir
+    ) -> list[tuple[CompactDeck, ArchetypeConfig]]:
+        # Note: this method assumes all the decks in the training data are available in
+        # the academy as .txt to load and parse.
+        known_decks: list[tuple[CompactDeck, ArchetypeConfig]] = []
+        training_data = self._read_training_data(training_file)
         for deck_id, archetype_name in training_data:
             playable_deck_path = posix_path(
                 assets_data_deck_dir,
                 f"{deck_id}.txt",
             )
-            playable_deck: PlayableDeck = parse_playable_deck_from_lines(
-                [line.strip() for line in open(playable_deck_path).readlines()]
+            playable_deck: PlayableDeck = parse_playable_deck_from_file(
+                playable_deck_path
             )
             try:
                 archetype = next(a for a in self.archetypes if a.name == archetype_name)
-                known_decks.append((playable_deck, archetype))
+                # For better similarity results, we apply some assumptions on the
+                # decks. Upon classification, we'll apply the same assumptions.
+                self._simplify_deck(playable_deck)
+                known_decks.append(
+                    (CompactDeck.from_playable(playable_deck), archetype)
+                )
             except StopIteration:
                 logger.error(
                     f"Unrecognized archetype label '{archetype_name}' for deck with "
@@ -95,20 +267,13 @@ class Decklassifier:
 
     def _load_mtggoldfish_tournament_training_data(
         self,
-    ) -> list[tuple[PlayableDeck, ArchetypeConfig]]:
-        config_reader = self.pauperformance.config_reader
-        return self._load_training_data(
-            config_reader.myr_file_system.MTGGOLDFISH_DECK_TRAINING_DATA,
-            self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
-        )
+    ) -> list[tuple[CompactDeck, ArchetypeConfig]]:
+        return self._load_training_data(*self._get_training_data_sources()[0])
 
     def _load_dpl_training_data(
         self,
-    ) -> list[tuple[PlayableDeck, ArchetypeConfig]]:
-        return self._load_training_data(
-            self.pauperformance.config_reader.myr_file_system.DPL_DECK_TRAINING_DATA,
-            self.academy_fs.ASSETS_DATA_DECK_DPL_DIR,
-        )
+    ) -> list[tuple[CompactDeck, ArchetypeConfig]]:
+        return self._load_training_data(*self._get_training_data_sources()[1])
 
     @staticmethod
     def _magnitude(cards_map: dict) -> float:
@@ -151,8 +316,8 @@ class Decklassifier:
             side1, mag_side1, side2, mag_side2, SIDEBOARD_WEIGHT
         )
         logger.debug(f"Sideboard similarity: {sim_side}")
-        w_sim_main = 3
-        w_sim_side = 1
+        w_sim_main = MAINBOARD_SIMILARITY_WEIGHT
+        w_sim_side = SIDEBOARD_SIMILARITY_WEIGHT
         return (w_sim_main * sim_main + w_sim_side * sim_side) / (
             w_sim_main + w_sim_side
         )
@@ -165,177 +330,394 @@ class Decklassifier:
         logger.debug(f"Computed similarity between decks: {sim}.")
         return sim
 
-    def _is_flicker_tron(self, deck: PlayableDeck) -> bool:
-        return all(
-            c in deck
-            for c in (
-                "Urza's Mine",
-                "Urza's Tower",
-                "Urza's Power Plant",
-                "Ghostly Flicker",
-            )
+    def classify_deck(
+        self,
+        deck: PlayableDeck,
+    ) -> Tuple[ArchetypeConfig, Optional[float]]:
+        # for better similarity results, we are going to make some assumptions on deck
+        self._simplify_deck(deck)
+        digests = [get_classified_deck_digest(deck)]
+        (classification,) = self._get_cached_classifications(digests)
+        if classification is None:
+            classification = self._classify_simplified_deck(deck)
+            self._cache_classifications(digests, [classification])
+        return classification
+
+    def _classify_simplified_deck(
+        self, deck: PlayableDeck
+    ) -> Tuple[ArchetypeConfig, Optional[float]]:
+        eligible, (signature,) = self.archetype_rules.match([deck])
+        # TODO: remove this step in the future if it becomes useless
+        # first, check if archetype can be detected with rules
+        if signature:
+            logger.debug(f"Deck is {signature.name}.")
+            return signature, 1.0
+        # second and third, look for the closest reference or known deck
+        neighbours = self._get_nearest_neighbours(deck, eligible, 1)
+        return neighbours[0] if neighbours else (None, 0)
+
+    def get_nearest_neighbours(
+        self, deck: PlayableDeck, k: int = 5
+    ) -> list[Tuple[ArchetypeConfig, float]]:
+        """Returns the archetypes of the k reference, known or learned decks closest
+        to deck.
+
+        Neighbours are sorted by decreasing similarity: the first one is the
+        archetype the deck would be classified as, unless rules detect another
+        archetype.
+        """
+        self._simplify_deck(deck)
+        return self._get_nearest_neighbours(
+            deck, self.archetype_rules.eligibility([deck]), k
         )
 
-    def _is_empty_the_warrens_storm(self, deck: PlayableDeck) -> bool:
-        return all(
-            c in deck for c in ("Empty the Warrens", "Dark Ritual", "Cabal Ritual")
-        )
+    def _get_nearest_neighbours(
+        self, deck: PlayableDeck, eligible: np.ndarray, k: int
+    ) -> list[Tuple[ArchetypeConfig, float]]:
+        query = self.known_index.fingerprint([deck])
+        eligible = self._prefilter_archetypes(query, eligible)
+        self._resolve_eligible_reference_decks(eligible)
+        neighbours = []
+        for source, index in enumerate(self._get_similarity_indexes()):
+            (index_neighbours,) = index.top_k(
+                query, k, self._get_label_mask(index, eligible)
+            )
+            neighbours += [
+                (-score, source, rank, index.labels[index.row_label_ids[row]])
+                for rank, (row, score) in enumerate(index_neighbours)
+            ]
+        return [
+            (archetype, -negated_score)
+            for negated_score, _, _, archetype in sorted(
+                neighbours, key=lambda n: n[:3]
+            )[:k]
+        ]
 
-    def _is_goblins(self, deck: PlayableDeck) -> bool:
-        return all(
-            c in deck
-            for c in ("Sparksmith", "Mountain", "Goblin Bushwhacker", "Mogg Conscripts")
-        )
+    def classify_decks(
+        self,
+        decks: list[PlayableDeck],
+        batch_size: int = CLASSIFICATION_BATCH_SIZE,
+    ) -> list[Tuple[ArchetypeConfig, Optional[float]]]:
+        logger.debug(f"Classifying {len(decks)} decks...")
+        classifications: list = []
+        for start in range(0, len(decks), batch_size):
+            classifications += self._classify_batch(decks[start : start + batch_size])
+        logger.debug(f"Classified {len(decks)} decks.")
+        return classifications
+
+    def warm_up(self):
+        """Builds now whatever classification would build lazily.
+
+        After this, classifying decks only reads the model: e.g. processes forked
+        afterwards share it and never load reference decks on their own.
+        """
+        logger.debug("Warming up classifier...")
+        self.preload_reference_decks()
+        for index in (self._get_reference_index(), self.known_index):
+            index.fingerprints
+        if self.centroid_prefilter:
+            self._get_centroids()
+        logger.debug("Warmed up classifier.")
+
+    def _classify_batch(
+        self, decks: list[PlayableDeck]
+    ) -> list[Tuple[ArchetypeConfig, Optional[float]]]:
+        # for better similarity results, we are going to make some assumptions on decks
+        for deck in decks:
+            self._simplify_deck(deck)
+        digests = [get_classified_deck_digest(deck) for deck in decks]
+        classifications = self._get_cached_classifications(digests)
+        # identical decks are classified once
+        to_be_classified: dict[str, int] = {}
+        for i, (digest, classification) in enumerate(zip(digests, classifications)):
+            if classification is None:
+                to_be_classified.setdefault(digest, i)
+        if to_be_classified:
+            new_classifications = dict(
+                zip(
+                    to_be_classified,
+                    self._classify_simplified_decks(
+                        [decks[i] for i in to_be_classified.values()]
+                    ),
+                )
+            )
+            classifications = [
+                (
+                    new_classifications[digest]
+                    if classification is None
+                    else classification
+                )
+                for digest, classification in zip(digests, classifications)
+            ]
+            self._cache_classifications(
+                list(new_classifications), list(new_classifications.values())
+            )
+        return classifications
+
+    def classify_held_out_decks(
+        self, decks: list[PlayableDeck], held_out: np.ndarray
+    ) -> list[Tuple[ArchetypeConfig, Optional[float]]]:
+        """Classifies decks as if some known decks were not known.
+
+        held_out is a (decks x known decks) boolean matrix, known decks in the
+        order they were added: a deck is not compared with the known decks it
+        flags. Decks are expected to be simplified already, and classifications
+        are not cached. Used to cross-validate the classifier (see evaluation).
+        """
+        return self._classify_simplified_decks(decks, held_out)
+
+    def _classify_simplified_decks(
+        self, decks: list[PlayableDeck], held_out: Optional[np.ndarray] = None
+    ) -> list[Tuple[ArchetypeConfig, Optional[float]]]:
+        # rules are evaluated once per deck and shared by all the steps below
+        eligible, signatures = self.archetype_rules.match(decks)
+
+        classifications: list = [None] * len(decks)
+        to_be_compared = []
+        for i, signature in enumerate(signatures):
+            # TODO: remove this step in the future if it becomes useless
+            # first, check if archetype can be detected with rules
+            if signature:
+                logger.debug(f"Deck is {signature.name}.")
+                classifications[i] = signature, 1.0
+            else:
+                to_be_compared.append(i)
+
+        # second and third, compare with reference decks and with known decks
+        if to_be_compared:
+            for i, classification in zip(
+                to_be_compared,
+                self._classify_decks_by_similarity(
+                    [decks[i] for i in to_be_compared],
+                    eligible[to_be_compared],
+                    held_out[to_be_compared] if held_out is not None else None,
+                ),
+            ):
+                classifications[i] = classification
+        return classifications
+
+    def _get_classifier_key(self) -> str:
+        # the centroid pre-filter may be changed at any time (e.g. by benchmarks)
+        classifier_key = self._classifier_keys.get(self.centroid_prefilter)
+        if classifier_key is None:
+            classifier_key = get_classifier_key(
+                self._model_key, self.archetypes, self.centroid_prefilter
+            )
+            self._classifier_keys[self.centroid_prefilter] = classifier_key
+        if self._learned_version is not None:
+            # learned decks change classifications too
+            return get_learned_version(classifier_key, self._learned_version)
+        return classifier_key
+
+    def _use_results_cache(self) -> bool:
+        return self.results_cache is not None
+
+    def _get_cached_classifications(
+        self, digests: list[str]
+    ) -> list[Optional[Tuple[Optional[ArchetypeConfig], float]]]:
+        # digests are expected to be the ones of simplified decks
+        if not self._use_results_cache() or not digests:
+            return [None] * len(digests)
+        cached = self.results_cache.get_many(self._get_classifier_key(), digests)
+        logger.debug(f"Found {len(cached)} cached classifications.")
+        return [
+            (
+                (self._archetypes_by_name.get(cached[digest][0]), cached[digest][1])
+                if digest in cached
+                else None
+            )
+            for digest in digests
+        ]
 
-    def _is_monow_heroic(self, deck: PlayableDeck) -> bool:
-        return all(
-            c in deck
-            for c in ("Lagonna-Band Trailblazer", "Hyena Umbra", "Deftblade Elite")
+    def _cache_classifications(
+        self,
+        digests: list[str],
+        classifications: list[Tuple[Optional[ArchetypeConfig], float]],
+    ):
+        # classifications made while some reference decks were missing are not
+        # stored: they would outlive the temporary failure
+        if not self._use_results_cache() or self.missing_reference_decks:
+            return
+        self.results_cache.put_many(
+            self._get_classifier_key(),
+            (
+                (digest, archetype.name if archetype else None, score)
+                for digest, (archetype, score) in zip(digests, classifications)
+            ),
         )
 
-    def _is_izzet_blitz(self, deck: PlayableDeck) -> bool:
-        blitz_creatures = [
-            "Kiln Fiend",
-            "Nivix Cyclops",
-            "Wee Dragonauts",
-        ]
-        return len([c for c in blitz_creatures if c in deck]) >= 2
-
-    def _is_monob_control(self, deck: PlayableDeck) -> bool:
-        monob_control_cards = [
-            "Gray Merchant of Asphodel",
-            "Cuombajj Witches",
-            "Oubliette",
-            "Chittering Rats",
-            "Tendrils of Corruption",
-            "Chainer's Edict",
-            "Sign in Blood",
-        ]
-        return len([c for c in monob_control_cards if c in deck]) >= 3
-
-    def _is_infect(self, deck: PlayableDeck) -> bool:
-        infect_creatures = [
-            "Glistener Elf",
-            "Llanowar Augur",
-            "Blight Mamba",
-            "Ichorclaw Myr",
-            "Rot Wolf",
-        ]
-        return len([c for c in infect_creatures if c in deck]) >= 3
-
-    def _is_walls(self, deck: PlayableDeck) -> bool:
-        walls_creatures = [
-            "Overgrown Battlement",
-            "Axebane Guardian",
-            "Valakut Invoker",
-            "Secret Door",
-            "Galvanic Alchemist",
-            "Shield-Wall Sentinel",
-        ]
-        return len([c for c in walls_creatures if c in deck]) >= 3
-
-    def _is_azorius_prowess(self, deck: PlayableDeck) -> bool:
-        azorius_creatures = [
-            "Seeker of the Way",
-            "Elusive Spellfist",
-            "Jhessian Thief",
-            "Delver of Secrets",
+    def _classify_decks_by_similarity(
+        self,
+        decks: list[PlayableDeck],
+        eligible: np.ndarray,
+        held_out: Optional[np.ndarray] = None,
+    ) -> list[Tuple[ArchetypeConfig, Optional[float]]]:
+        queries = self.known_index.fingerprint(decks)
+        eligible = self._prefilter_archetypes(queries, eligible)
+        self._resolve_eligible_reference_decks(eligible)
+
+        # Each comparison is a single sparse product per index.
+        logger.debug("Comparing decks with reference and known decks...")
+        scores, labels = [], []
+        for index in self._get_similarity_indexes():
+            index_scores = index.masked_similarities(
+                queries, self._get_label_mask(index, eligible)
+            )
+            if held_out is not None and index is self.known_index:
+                # a held out deck scores zero, as if it was not there
+                index_scores[held_out[:, index.row_order]] = 0.0
+            scores.append(index_scores)
+            labels += [index.labels[i] for i in index.ordered_label_ids]
+        all_scores = np.hstack(scores)
+        logger.debug("Compared decks with reference and known decks.")
+        if all_scores.shape[1] == 0:
+            return [(None, 0)] * len(decks)
+        columns, best_scores = best_matches(all_scores)
+        return [
+            (labels[column], float(score)) if score > 0 else (None, 0)
+            for column, score in zip(columns, best_scores)
         ]
-        return len([c for c in azorius_creatures if c in deck]) >= 3
 
-    def classify_deck(
+    def _get_similarity_indexes(
         self,
-        deck: PlayableDeck,
-    ) -> Tuple[ArchetypeConfig, Optional[float]]:
-        logger.debug("Classifying deck...")
-        most_similar_archetype, highest_similarity = None, 0
-
-        # for better similarity results, we are going to make some assumptions on decks
-        self._simplify_deck(deck)
-
-        # TODO: remove this block in the future if it becomes useless
-        # first, check if archetype can be detected with rules
-        archetype_predicates = [
-            ("Flicker Tron", self._is_flicker_tron),
-            ("Empty The Warrens Storm", self._is_empty_the_warrens_storm),
-            ("Goblins", self._is_goblins),
-            ("MonoW Heroic", self._is_monow_heroic),
-            ("Izzet Blitz", self._is_izzet_blitz),
-            ("MonoB Control", self._is_monob_control),
-            ("Infect", self._is_infect),
-            ("Walls", self._is_walls),
-            ("Azorius Prowess", self._is_azorius_prowess),
-        ]
-        for archetype_name, archetype_predicate in archetype_predicates:
-            if archetype_predicate(deck) and deck.can_belong_to_archetype(
-                next(a for a in self.archetypes if a.name == archetype_name)
-            ):
-                logger.debug(f"Deck is {archetype_name}.")
-                return next(a for a in self.archetypes if a.name == archetype_name), 1.0
+    ) -> tuple[DeckFingerprintIndex, DeckFingerprintIndex, LearnedDeckIndex]:
+        # reference decks come first so that, as always, they win ties against
+        # known decks, which in turn win ties against learned decks
+        return self._get_reference_index(), self.known_index, self.learned_index
+
+    def _prefilter_archetypes(
+        self, queries: DeckFingerprints, eligible: np.ndarray
+    ) -> np.ndarray:
+        if not self.centroid_prefilter:
+            return eligible
+        return self._get_centroids().top_labels(
+            queries, self.centroid_prefilter, eligible
+        )
 
-        main1, mag_main1, side1, mag_side1 = self._deck_fingerprint(deck)
+    def _get_centroids(self) -> CentroidIndex:
+        self._resolve_reference_decks(self.archetypes)
+        reference_index = self._get_reference_index()
+        # both indexes only grow, or are replaced
+        key = (
+            reference_index,
+            len(reference_index),
+            self.known_index,
+            len(self.known_index),
+        )
+        if self._centroids_key != key:
+            logger.debug("Computing archetype centroids...")
+            self._centroids = CentroidIndex(
+                self.archetypes, [reference_index, self.known_index]
+            )
+            self._centroids_key = key
+            logger.debug("Computed archetype centroids.")
+        return self._centroids
+
+    def _get_label_mask(
+        self, index: DeckFingerprintIndex, eligible: np.ndarray
+    ) -> np.ndarray:
+        # eligible is a (decks x archetypes) mask: a deck is compared only with the
+        # decks of the archetypes it can belong to.
+        return eligible[:, [self._archetype_ids[a] for a in index.labels]]
+
+    def _resolve_eligible_reference_decks(self, eligible: np.ndarray):
+        self._resolve_reference_decks(
+            [
+                a
+                for a, is_eligible in zip(self.archetypes, eligible.any(axis=0))
+                if is_eligible
+            ]
+        )
 
-        # second, compare with reference decks
-        for archetype in self.archetypes:
-            if not deck.can_belong_to_archetype(archetype):
-                logger.debug(f"Skipping archetype {archetype.name} due to rules...")
-                continue
-            logger.debug(f"Comparing deck with reference lists of {archetype.name}...")
-            for reference_deck in archetype.reference_decks:
-                logger.debug(f"Comparing deck with reference list {reference_deck}...")
-                if reference_deck not in self._decks_cache:
-                    playable_reference_deck = self.pauperformance.get_playable_deck(
-                        reference_deck
-                    )
-                    # for better similarity results, apply same assumptions as above
-                    self._simplify_deck(playable_reference_deck)
-                    self._decks_cache[reference_deck] = (
-                        playable_reference_deck,
-                        *self._deck_fingerprint(playable_reference_deck),
-                    )
-                _, main2, mag_main2, side2, mag_side2 = self._decks_cache[
+    def preload_reference_decks(
+        self, max_workers: int = REFERENCE_DECKS_THREADS
+    ) -> list[str]:
+        """Resolves all the reference decks, returning the names of missing ones.
+
+        Decks are loaded by up to max_workers threads. Afterwards the cache is
+        read-only, so it can be shared by concurrent classifications, and missing
+        decks are not requested again.
+        """
+        with self._decks_cache_lock:
+            if not self._reference_decks_preloaded:
+                logger.info("Preloading reference decks...")
+                to_be_loaded = [
                     reference_deck
+                    for archetype in self.archetypes
+                    for reference_deck in archetype.reference_decks
+                    if reference_deck not in self._decks_cache
+                    and reference_deck not in self.missing_reference_decks
                 ]
-                logger.debug(f"Compared deck with reference list {reference_deck}.")
-                score = self._get_similarity_precomputed(
-                    main1,
-                    mag_main1,
-                    side1,
-                    mag_side1,
-                    main2,
-                    mag_main2,
-                    side2,
-                    mag_side2,
-                )
-                logger.debug(f"Similarity: {score}.")
-                if score > highest_similarity:
-                    most_similar_archetype, highest_similarity = archetype, score
-                logger.debug(f"Compared deck with reference lists of {archetype.name}.")
-
-        # third, compare with other known decks
-        logger.debug("Comparing deck with known decks...")
-        for archetype, decks in self.known_decks.items():
-            # known_decks were simplified upon loading
-            if not deck.can_belong_to_archetype(archetype):
-                logger.debug(f"Skipping archetype {archetype.name} due to rules...")
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    loaded_decks = list(
+                        executor.map(self._load_reference_deck, to_be_loaded)
+                    )
+                self._store_reference_decks(zip(to_be_loaded, loaded_decks))
+                self._decks_cache = MappingProxyType(dict(self._decks_cache))
+                self._reference_decks_preloaded = True
+                logger.info(f"Preloaded {len(self._decks_cache)} reference decks.")
+                if self.missing_reference_decks:
+                    logger.warning(
+                        f"Missing reference decks: "
+                        f"{sorted(self.missing_reference_decks)}"
+                    )
+        return sorted(self.missing_reference_decks)
+
+    def _resolve_reference_decks(self, archetypes: list[ArchetypeConfig]):
+        if self._reference_decks_preloaded:
+            return
+        with self._decks_cache_lock:
+            if self._reference_decks_preloaded:
+                return
+            self._store_reference_decks(
+                (reference_deck, self._load_reference_deck(reference_deck))
+                for archetype in archetypes
+                for reference_deck in archetype.reference_decks
+                if reference_deck not in self._decks_cache
+                and reference_deck not in self.missing_reference_decks
+            )
+
+    def _store_reference_decks(
+        self, loaded_decks: Iterable[tuple[str, Optional[PlayableDeck]]]
+    ):
+        # to be called while holding _decks_cache_lock
+        resolved_new_decks = False
+        for reference_deck, playable_reference_deck in loaded_decks:
+            if playable_reference_deck is None:
+                self.missing_reference_decks.add(reference_deck)
                 continue
-            for _, main2, mag_main2, side2, mag_side2 in decks:
-                score = self._get_similarity_precomputed(
-                    main1,
-                    mag_main1,
-                    side1,
-                    mag_side1,
-                    main2,
-                    mag_main2,
-                    side2,
-                    mag_side2,
-                )
-                logger.debug(f"Similarity: {score}.")
-                if score > highest_similarity:
-                    most_similar_archetype, highest_similarity = archetype, score
-        logger.debug("Compared deck with known decks.")
-        logger.debug("Classified deck.")
-        return most_similar_archetype, highest_similarity
+            self._decks_cache[reference_deck] = playable_reference_deck
+            resolved_new_decks = True
+        if resolved_new_decks:
+            self._reference_index = None
+
+    def _load_reference_deck(self, reference_deck: str) -> Optional[PlayableDeck]:
+        logger.debug(f"Loading reference list {reference_deck}...")
+        try:
+            playable_reference_deck = self.pauperformance.get_playable_deck(
+                reference_deck
+            )
+        except Exception as e:
+            logger.warning(f"Unable to load reference list {reference_deck}: {e}")
+            return None
+        # for better similarity results, apply same assumptions as above
+        self._simplify_deck(playable_reference_deck)
+        return playable_reference_deck
+
+    def _get_reference_index(self) -> DeckFingerprintIndex:
+        # Rows follow archetypes and reference lists in configuration order,
+        # no matter in which order the reference decks have been resolved.
+        with self._decks_cache_lock:
+            if self._reference_index is None:
+                reference_index = DeckFingerprintIndex(self.vocabulary)
+                for archetype in self.archetypes:
+                    for reference_deck in archetype.reference_decks:
+                        if reference_deck in self._decks_cache:
+                            reference_index.add(
+                                self._decks_cache[reference_deck], archetype
+                            )
+                self._reference_index = reference_index
+            return self._reference_index
 
     def _simplify_deck(self, playable_deck: PlayableDeck):
         # In Pauper, only few decks take advantage of Snow-Covered lands.
@@ -357,16 +739,16 @@ class Decklassifier:
     @staticmethod
     def _simplify_mainboard(playable_deck: PlayableDeck, swap_tuples):
         for old_card, new_card in swap_tuples:
-            if old_card in playable_deck.mainboard_cards_map:
-                old_amount = playable_deck.mainboard_cards_map[old_card]
+            old_amount = playable_deck.mainboard_cards_map.get(old_card)
+            if old_amount is not None:
                 playable_deck.remove_mainboard_card(PlayedCard(old_amount, old_card))
                 playable_deck.add_mainboard_card(PlayedCard(old_amount, new_card))
 
     @staticmethod
     def _simplify_sideboard(playable_deck: PlayableDeck, swap_tuples):
         for old_card, new_card in swap_tuples:
-            if old_card in playable_deck.sideboard_cards_map:
-                old_amount = playable_deck.sideboard_cards_map[old_card]
+            old_amount = playable_deck.sideboard_cards_map.get(old_card)
+            if old_amount is not None:
                 playable_deck.remove_sideboard_card(PlayedCard(old_amount, old_card))
                 playable_deck.add_sideboard_card(PlayedCard(old_amount, new_card))
 
@@ -374,9 +756,14 @@ class Decklassifier:
         mtggoldfish = MTGGoldfish()
         mtggoldfish_meta = mtggoldfish.get_pauper_meta()
         meta_shares: DefaultDict[str, list[MetaShare]] = defaultdict(list)
-        for link, values in mtggoldfish_meta.items():
-            share, playable_deck = values
-            similar_archetype, similarity_score = self.classify_deck(playable_deck)
+        classifications = self.classify_decks(
+            [playable_deck for _, playable_deck in mtggoldfish_meta.values()]
+        )
+        for (link, values), classification in zip(
+            mtggoldfish_meta.items(), classifications
+        ):
+            share, _ = values
+            similar_archetype, similarity_score = classification
             archetype_name = similar_archetype.name
             if similarity_score < 0.30:
                 archetype_name = "Brew"
@@ -420,6 +807,21 @@ class Decklassifier:
         )
         return deck_id, playable_deck
 
+    @staticmethod
+    def get_dpl_deck(
+        deck_id,
+        archetype_name: Optional[str],
+        similarity: float,
+        brew_threshold=BREW_CLASSIFICATION_THRESHOLD,
+    ) -> DPLDeck:
+        if similarity < brew_threshold:
+            archetype_name = None
+        return DPLDeck(
+            identifier=deck_id,
+            archetype=archetype_name if archetype_name else "Brew",
+            accuracy=float(similarity),
+        )
+
     def get_dpl_metagame(
         self,
         decks,
@@ -427,29 +829,28 @@ class Decklassifier:
         brew_threshold=BREW_CLASSIFICATION_THRESHOLD,
         learn_on_the_fly=True,
     ):
-        dpl_decks = []
-        for deck in decks:
-            deck_id, playable_deck = self.parse_dpl_deck(deck)
-            most_similar_archetype, highest_similarity = self.classify_deck(
-                playable_deck
+        parsed_decks = [self.parse_dpl_deck(deck) for deck in decks]
+        if learn_on_the_fly:
+            # each confidently classified deck is compared with the following ones
+            classifications = [
+                self.classify_and_learn_deck(playable_deck, brew_threshold)
+                for _, playable_deck in parsed_decks
+            ]
+        else:
+            classifications = self.classify_decks(
+                [playable_deck for _, playable_deck in parsed_decks]
             )
-            if highest_similarity < brew_threshold:
-                most_similar_archetype = None
-            elif learn_on_the_fly:
-                self.known_decks.setdefault(most_similar_archetype, []).append(
-                    (playable_deck, *self._deck_fingerprint(playable_deck))
-                )
-            dpl_decks.append(
-                DPLDeck(
-                    identifier=deck_id,
-                    archetype=(
-                        most_similar_archetype.name
-                        if most_similar_archetype
-                        else "Brew"
-                    ),
-                    accuracy=float(highest_similarity),
-                )
+        dpl_decks = [
+            self.get_dpl_deck(
+                deck_id,
+                most_similar_archetype.name if most_similar_archetype else None,
+                highest_similarity,
+                brew_threshold,
+            )
+            for (deck_id, _), (most_similar_archetype, highest_similarity) in zip(
+                parsed_decks, classifications
             )
+        ]
         dpl_meta = DPLMeta(
             name=name,
             dpl_decks=dpl_decks,
@@ -465,11 +866,10 @@ class Decklassifier:
         print()
         for k, v in sorted(archetype_maps.items()):
             print(f"{v} {k}")
-            for a in self.archetypes:
-                if a.name == k:
-                    # some decks have multiple game styles: let's use the first one
-                    game_types[a.game_type[0]] += 1
-                    break
+            archetype = self._archetypes_by_name.get(k)
+            if archetype:
+                # some decks have multiple game styles: let's use the first one
+                game_types[archetype.game_type[0]] += 1
         print()
         for k, v in sorted(game_types.items()):
             print(f"{v} {k}")
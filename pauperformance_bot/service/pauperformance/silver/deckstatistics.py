@@ -1,7 +1,6 @@
 from typing import Dict, List, Tuple
 
-from pauperformance_bot.entity.deck.playable import PlayableDeck
-from pauperformance_bot.exceptions import CardNotFoundException
+from pauperformance_bot.entity.deck.compact import CompactDeck
 from pauperformance_bot.service.academy.data_loader import AcademyDataLoader
 from pauperformance_bot.service.mtg.scryfall import ScryfallService
 from pauperformance_bot.util.log import get_application_logger
@@ -15,7 +14,7 @@ class Deckstatistics:
     def __init__(
         self,
         name: str,
-        playable_decks: List[PlayableDeck],
+        playable_decks: List[CompactDeck],
         cards: Dict[str, Dict[str, int]],
     ):
         self.name = name
@@ -118,14 +117,16 @@ class DeckstatisticsFactory:
         playable_decks = self._academy_loader.load_classified_decks(archetype)
         logger.debug(f"Found {len(playable_decks)} decks for {archetype}")
         all_cards = {}
+        scryfall_cards = self._scryfall.get_cards_named(
+            {c.card_name for pd in playable_decks for c in pd.mainboard + pd.sideboard},
+            skip_missing=True,
+        )
 
         for pd in playable_decks:
             occurred_in_deck = set()
             # build a lookup dict for card stats
             for card in pd.mainboard + pd.sideboard:
-                try:
-                    self._scryfall.get_card_named(card.card_name)
-                except CardNotFoundException:
+                if card.card_name not in scryfall_cards:
                     logger.warning(f"Card not found in scryfall {card.card_name}")
                     continue
 
@@ -0,0 +1,199 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    BREW_CLASSIFICATION_THRESHOLD,
+    CLASSIFICATION_BATCH_SIZE,
+)
+from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.compact import CompactDeck
+from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+# the label of decks classified below the brew threshold (see get_dpl_deck)
+BREW_LABEL = "Brew"
+
+
+class ClassifierEvaluation:
+    """Confusion matrix of the classifier, with per-archetype precision/recall.
+
+    confusion[i][j] is the number of decks labelled with archetypes[i] and
+    classified as archetypes[j].
+    """
+
+    def __init__(
+        self,
+        *,
+        archetypes: list[str],
+        confusion: np.ndarray,
+        folds: Optional[int],
+        brew_threshold: Optional[float],
+    ):
+        self.archetypes: list[str] = archetypes
+        self.confusion: np.ndarray = confusion
+        # None for leave-one-out
+        self.folds: Optional[int] = folds
+        # None if decks are never classified as brews
+        self.brew_threshold: Optional[float] = brew_threshold
+
+    @classmethod
+    def from_classifications(
+        cls,
+        labels: list[str],
+        classifications: list[Tuple[Optional[ArchetypeConfig], float]],
+        folds: Optional[int] = None,
+        brew_threshold: Optional[float] = BREW_CLASSIFICATION_THRESHOLD,
+    ) -> "ClassifierEvaluation":
+        predictions = [
+            (
+                archetype.name
+                if archetype and (brew_threshold is None or score >= brew_threshold)
+                else BREW_LABEL
+            )
+            for archetype, score in classifications
+        ]
+        archetypes = sorted(set(labels) | set(predictions))
+        archetype_ids = {a: i for i, a in enumerate(archetypes)}
+        confusion = np.zeros((len(archetypes), len(archetypes)), dtype=np.int64)
+        np.add.at(
+            confusion,
+            (
+                [archetype_ids[label] for label in labels],
+                [archetype_ids[prediction] for prediction in predictions],
+            ),
+            1,
+        )
+        return cls(
+            archetypes=archetypes,
+            confusion=confusion,
+            folds=folds,
+            brew_threshold=brew_threshold,
+        )
+
+    @property
+    def nr_decks(self) -> int:
+        return int(self.confusion.sum())
+
+    @property
+    def accuracy(self) -> float:
+        if self.nr_decks == 0:
+            return 1.0
+        return float(np.trace(self.confusion)) / self.nr_decks
+
+    def precision_recall(self) -> dict[str, tuple[float, float, int]]:
+        """Returns precision, recall and number of labelled decks, by archetype.
+
+        Precision (recall) is zero for archetypes never predicted (labelled).
+        """
+        hits = np.diag(self.confusion)
+        predicted = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+        return {
+            archetype: (
+                float(hits[i] / predicted[i]) if predicted[i] else 0.0,
+                float(hits[i] / support[i]) if support[i] else 0.0,
+                int(support[i]),
+            )
+            for i, archetype in enumerate(self.archetypes)
+        }
+
+    def save(self, evaluation_file: str):
+        logger.info(f"Storing classifier evaluation in {evaluation_file}...")
+        os.makedirs(path.dirname(evaluation_file) or ".", exist_ok=True)
+        with open(evaluation_file, "w") as out_f:
+            json.dump(
+                {
+                    "folds": self.folds,
+                    "brew_threshold": self.brew_threshold,
+                    "nr_decks": self.nr_decks,
+                    "accuracy": self.accuracy,
+                    "archetypes": self.archetypes,
+                    "confusion": self.confusion.tolist(),
+                    "precision_recall": {
+                        archetype: {
+                            "precision": precision,
+                            "recall": recall,
+                            "support": support,
+                        }
+                        for archetype, (
+                            precision,
+                            recall,
+                            support,
+                        ) in self.precision_recall().items()
+                    },
+                },
+                out_f,
+                indent=2,
+            )
+        logger.info(f"Stored classifier evaluation in {evaluation_file}.")
+
+
+def cross_validate(
+    decklassifier: Decklassifier,
+    folds: Optional[int] = None,
+    batch_size: int = CLASSIFICATION_BATCH_SIZE,
+    max_workers: Optional[int] = None,
+) -> tuple[list[str], list[Tuple[Optional[ArchetypeConfig], float]]]:
+    """Classifies each training deck against the other ones.
+
+    With folds, the i-th training deck belongs to fold i % folds and is not
+    compared with the decks of its fold; otherwise, it is compared with all the
+    other decks (leave-one-out). Reference decks, rules and centroids are not
+    held out. Batches of decks are classified concurrently by up to max_workers
+    threads. Returns the labels of the training decks and their classifications.
+    """
+    logger.info(
+        f"Cross-validating classifier "
+        f"({f'{folds} folds' if folds else 'leave-one-out'})..."
+    )
+    decklassifier.warm_up()
+    rows = list(decklassifier.known_index.rows())
+    labels = [archetype.name for archetype, _, _ in rows]
+    row_folds = np.arange(len(rows))
+    if folds:
+        row_folds %= folds
+
+    def classify(start):
+        batch_folds = row_folds[start : start + batch_size]
+        decks = [
+            CompactDeck.from_cards_maps(mainboard, sideboard).to_playable()
+            for _, mainboard, sideboard in rows[start : start + batch_size]
+        ]
+        return decklassifier.classify_held_out_decks(
+            decks, batch_folds[:, np.newaxis] == row_folds[np.newaxis, :]
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        classifications = [
+            classification
+            for batch in executor.map(classify, range(0, len(rows), batch_size))
+            for classification in batch
+        ]
+    logger.info(f"Cross-validated classifier on {len(rows)} decks.")
+    return labels, classifications
+
+
+def evaluate_classifier(
+    decklassifier: Decklassifier,
+    folds: Optional[int] = None,
+    brew_threshold: Optional[float] = BREW_CLASSIFICATION_THRESHOLD,
+    max_workers: Optional[int] = None,
+) -> ClassifierEvaluation:
+    labels, classifications = cross_validate(
+        decklassifier, folds, max_workers=max_workers
+    )
+    evaluation = ClassifierEvaluation.from_classifications(
+        labels, classifications, folds, brew_threshold
+    )
+    logger.info(
+        f"Evaluated classifier on {evaluation.nr_decks} decks: "
+        f"accuracy {evaluation.accuracy:.3f}."
+    )
+    return evaluation
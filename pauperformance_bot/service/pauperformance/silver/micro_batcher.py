@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    CLASSIFICATION_LATENCY_WINDOW,
+)
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+_STOP = object()
+
+
+class LatencyStats:
+    """Thread-safe record of the latest latencies, summarized by percentiles."""
+
+    def __init__(self, window: int = CLASSIFICATION_LATENCY_WINDOW):
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def record(self, seconds: Iterable[float]):
+        with self._lock:
+            self._latencies.extend(seconds)
+
+    def percentiles(self, percents: Iterable[int] = (50, 90, 99)) -> dict[str, float]:
+        """Returns the percentiles of the latencies, in milliseconds."""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+        if len(latencies) == 0:
+            return {f"p{p}": 0.0 for p in percents}
+        return {f"p{p}": float(np.percentile(latencies, p)) * 1000 for p in percents}
+
+
+class MicroBatcher:
+    """Coalesces the items submitted by concurrent callers into batches.
+
+    A batch is dispatched to process_batch, which returns one result per item,
+    when it holds batch_size items or max_wait seconds after its first item was
+    submitted, whichever comes first. Up to concurrency batches are processed at
+    once: meanwhile, the next batch keeps filling up. Results are scattered back
+    to the futures returned by submit, and the latency of each item (from its
+    submission to its result) is recorded.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], list],
+        batch_size: int,
+        max_wait: float,
+        concurrency: int = 1,
+        latency_window: int = CLASSIFICATION_LATENCY_WINDOW,
+    ):
+        if batch_size <= 0 or max_wait < 0 or concurrency <= 0:
+            raise ValueError(
+                f"Invalid batching: size {batch_size}, max wait {max_wait}, "
+                f"concurrency {concurrency}."
+            )
+        self.process_batch: Callable[[list], list] = process_batch
+        self.batch_size: int = batch_size
+        self.max_wait: float = max_wait
+        self.latencies: LatencyStats = LatencyStats(latency_window)
+        self.nr_items: int = 0
+        self.nr_batches: int = 0
+        self._counters_lock: threading.Lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._slots: threading.Semaphore = threading.Semaphore(concurrency)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="micro-batch"
+        )
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def process(self, item: Any) -> Any:
+        """Submits item and waits for its result."""
+        return self.submit(item).result()
+
+    def close(self):
+        """Processes the items submitted so far, then stops."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "items": self.nr_items,
+            "batches": self.nr_batches,
+            "mean_batch_size": (
+                self.nr_items / self.nr_batches if self.nr_batches else 0
+            ),
+            "latency_ms": self.latencies.percentiles(),
+        }
+
+    def _run(self):
+        stopped = False
+        while not stopped:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch = [entry]
+            deadline = entry[2] + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    entry = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopped = True
+                    break
+                batch.append(entry)
+            self._slots.acquire()
+            self._executor.submit(self._process_batch, batch)
+
+    def _process_batch(self, batch: list[tuple[Any, Future, float]]):
+        try:
+            # items whose callers gave up are not processed
+            batch = [
+                entry for entry in batch if entry[1].set_running_or_notify_cancel()
+            ]
+            if not batch:
+                return
+            results = list(self.process_batch([item for item, _, _ in batch]))
+            # callers would otherwise wait forever for the missing results
+            if len(results) != len(batch):
+                raise ValueError(f"Got {len(results)} results for {len(batch)} items.")
+        except Exception as e:
+            logger.warning(f"Unable to process batch of {len(batch)} items: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        done = time.perf_counter()
+        self.latencies.record(done - submitted for _, _, submitted in batch)
+        with self._counters_lock:
+            self.nr_items += len(batch)
+            self.nr_batches += 1
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
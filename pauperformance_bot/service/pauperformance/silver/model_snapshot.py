@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from os import path
+from typing import Hashable, Iterable, Optional
+
+import numpy as np
+
+from pauperformance_bot.constant.pauperformance.silver import (
+    DECKLASSIFIER_MODEL_VERSION,
+)
+from pauperformance_bot.service.pauperformance.silver.deck_index import (
+    CardVocabulary,
+    DeckFingerprintIndex,
+)
+from pauperformance_bot.util.log import get_application_logger
+from pauperformance_bot.util.path import posix_path
+
+logger = get_application_logger()
+
+_META_FILE = "meta.json"
+_ARRAYS = (
+    "main_data",
+    "main_indices",
+    "main_indptr",
+    "main_magnitudes",
+    "side_data",
+    "side_indices",
+    "side_indptr",
+    "side_magnitudes",
+    "row_labels",
+)
+
+
+def get_model_key(files: Iterable[str]) -> str:
+    """Returns a key identifying the model trained on files (and on this code)."""
+    digest = hashlib.sha1(f"v{DECKLASSIFIER_MODEL_VERSION}".encode("utf-8"))
+    for file in files:
+        with open(file, "rb") as in_f:
+            content = in_f.read()
+        digest.update(f"\n{path.basename(file)}:{len(content)}\n".encode("utf-8"))
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def save_model_snapshot(model_dir: str, key: str, index: DeckFingerprintIndex):
+    """Stores index in model_dir as key, replacing the older snapshots."""
+    logger.debug(f"Storing model snapshot {key} in {model_dir}...")
+    os.makedirs(model_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=model_dir)
+    try:
+        for name, array in index.to_arrays().items():
+            np.save(posix_path(tmp_dir, f"{name}.npy"), array)
+        meta = {
+            "version": DECKLASSIFIER_MODEL_VERSION,
+            "key": key,
+            "vocabulary": index.vocabulary.names,
+            "labels": [label.name for label in index.labels],
+        }
+        with open(posix_path(tmp_dir, _META_FILE), "w") as out_f:
+            json.dump(meta, out_f)
+        for snapshot in os.listdir(model_dir):
+            snapshot_dir = posix_path(model_dir, snapshot)
+            if snapshot_dir != tmp_dir and path.exists(
+                posix_path(snapshot_dir, _META_FILE)
+            ):
+                shutil.rmtree(snapshot_dir)
+        os.replace(tmp_dir, posix_path(model_dir, key))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.debug(f"Stored model snapshot {key} in {model_dir}.")
+
+
+def load_model_snapshot(
+    model_dir: str,
+    key: str,
+    labels: dict[str, Hashable],
+    vocabulary: CardVocabulary,
+) -> Optional[DeckFingerprintIndex]:
+    """Returns the index stored in model_dir as key, or None if it is missing.
+
+    Arrays are memory-mapped (copy-on-write), and card ids are remapped only if
+    vocabulary already interned cards in a different order. labels maps the
+    stored label names to the labels of the returned index.
+    """
+    snapshot_dir = posix_path(model_dir, key)
+    meta_file = posix_path(snapshot_dir, _META_FILE)
+    if not path.exists(meta_file):
+        logger.debug(f"Model snapshot {key} not found in {model_dir}.")
+        return None
+    logger.debug(f"Loading model snapshot {key} from {model_dir}...")
+    try:
+        with open(meta_file) as in_f:
+            meta = json.load(in_f)
+        if meta["version"] != DECKLASSIFIER_MODEL_VERSION:
+            logger.warning(f"Model snapshot {key} has version {meta['version']}.")
+            return None
+        arrays = {
+            name: _load_array(posix_path(snapshot_dir, f"{name}.npy"))
+            for name in _ARRAYS
+        }
+        index_labels = [labels[name] for name in meta["labels"]]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Cannot load model snapshot {key}: {e}")
+        return None
+    card_ids = np.fromiter(
+        (vocabulary.intern(name) for name in meta["vocabulary"]),
+        dtype=np.int32,
+        count=len(meta["vocabulary"]),
+    )
+    if not np.array_equal(card_ids, np.arange(len(card_ids))):
+        for board in ("main", "side"):
+            arrays[f"{board}_indices"] = card_ids[arrays[f"{board}_indices"]]
+    logger.debug(f"Loaded model snapshot {key} from {model_dir}.")
+    return DeckFingerprintIndex.from_arrays(arrays, index_labels, vocabulary)
+
+
+def _load_array(array_file: str) -> np.ndarray:
+    try:
+        return np.load(array_file, mmap_mode="c")
+    except ValueError:  # empty arrays cannot be memory-mapped
+        return np.load(array_file)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from os import path
+from typing import Iterable, Optional
+
+from pauperformance_bot.entity.config.archetype import ArchetypeConfig
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+# max number of digests looked up by a single query (SQLite default limit is 999)
+_MAX_QUERY_DIGESTS = 500
+
+CachedClassification = tuple[Optional[str], float]
+
+
+def get_classified_deck_digest(deck: PlayableDeck) -> str:
+    """Returns a digest of the cards of deck as the classifier sees them.
+
+    Unlike PlayableDeck.digest, card names are case-sensitive (so are the card ids
+    of the fingerprint indexes) and repeated cards count as in the cards maps.
+    """
+    boards = [
+        sorted(deck.mainboard_cards_map.items()),
+        sorted(deck.sideboard_cards_map.items()),
+    ]
+    return hashlib.sha1(json.dumps(boards).encode("utf-8")).hexdigest()
+
+
+def get_classifier_key(
+    model_key: str,
+    archetypes: Iterable[ArchetypeConfig],
+    centroid_prefilter: Optional[int],
+) -> str:
+    """Returns a key identifying the classifications of a model.
+
+    Besides the model (see get_model_key), classifications depend on the rules, on
+    the signatures and on the reference decks of the archetypes, and on the
+    centroid pre-filter.
+    """
+    config = [
+        [
+            archetype.name,
+            sorted(archetype.must_have_cards),
+            sorted(archetype.must_not_have_cards),
+            list(archetype.reference_decks),
+            (
+                [
+                    sorted(archetype.signature.cards),
+                    archetype.signature.min_cards,
+                    archetype.signature.priority,
+                ]
+                if archetype.signature
+                else None
+            ),
+        ]
+        for archetype in archetypes
+    ]
+    digest = hashlib.sha1(model_key.encode("utf-8"))
+    digest.update(json.dumps([config, centroid_prefilter]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_learned_version(previous_version: Optional[str], *items: str) -> str:
+    """Returns the digest of previous_version (None if first) followed by items.
+
+    Chained deck by deck, it tells apart the decks a classifier learned, and the
+    order it learned them in.
+    """
+    digest = hashlib.sha1((previous_version or "").encode("utf-8"))
+    digest.update(json.dumps(items).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ClassificationResultCache:
+    """Persistent (archetype name, score) classifications, by deck digest.
+
+    Classifications are stored in a SQLite file under the key of the classifier
+    that computed them (see get_classifier_key), so classifiers with different
+    keys share the file. Each operation opens its own connection, so the cache
+    can be shared by threads and by forked processes. Failures are logged and
+    treated as cache misses.
+    """
+
+    def __init__(self, cache_file: str):
+        self.cache_file: str = cache_file
+        os.makedirs(path.dirname(cache_file) or ".", exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            columns = [
+                row[1]
+                for row in connection.execute("PRAGMA table_info(classification)")
+            ]
+            if columns and "stored_at" not in columns:
+                # cached by a previous version, with no time to evict them by
+                connection.execute("DROP TABLE classification")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS classification ("
+                "classifier TEXT NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "archetype TEXT, "
+                "score REAL NOT NULL, "
+                "stored_at REAL NOT NULL, "
+                "PRIMARY KEY (classifier, digest))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS classification_stored_at "
+                "ON classification (stored_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_file, timeout=30)
+
+    def __len__(self):
+        with closing(self._connect()) as connection:
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM classification"
+            ).fetchone()
+        return count
+
+    def evict(self, max_age: float, max_size: int):
+        """Drops the classifications stored more than max_age seconds ago, then
+        the oldest ones beyond max_size, whatever classifier computed them."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                dropped = connection.execute(
+                    "DELETE FROM classification WHERE stored_at < ?",
+                    (time.time() - max_age,),
+                ).rowcount
+                (count,) = connection.execute(
+                    "SELECT COUNT(*) FROM classification"
+                ).fetchone()
+                if count > max_size:
+                    dropped += connection.execute(
+                        "DELETE FROM classification WHERE rowid IN ("
+                        "SELECT rowid FROM classification "
+                        "ORDER BY stored_at LIMIT ?)",
+                        (count - max_size,),
+                    ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Unable to clean classification cache: {e}")
+            return
+        if dropped:
+            logger.info(f"Dropped {dropped} outdated cached classifications.")
+
+    def get_many(
+        self, classifier_key: str, digests: list[str]
+    ) -> dict[str, CachedClassification]:
+        cached: dict[str, CachedClassification] = {}
+        try:
+            with closing(self._connect()) as connection:
+                for start in range(0, len(digests), _MAX_QUERY_DIGESTS):
+                    chunk = digests[start : start + _MAX_QUERY_DIGESTS]
+                    rows = connection.execute(
+                        "SELECT digest, archetype, score FROM classification "
+                        "WHERE classifier = ? "
+                        f"AND digest IN ({','.join('?' * len(chunk))})",
+                        (classifier_key, *chunk),
+                    )
+                    cached.update(
+                        (digest, (archetype, score))
+                        for digest, archetype, score in rows
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Unable to read classification cache: {e}")
+        return cached
+
+    def put_many(
+        self,
+        classifier_key: str,
+        classifications: Iterable[tuple[str, Optional[str], float]],
+    ):
+        stored_at = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO classification VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (classifier_key, digest, archetype, float(score), stored_at)
+                        for digest, archetype, score in classifications
+                    ),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Unable to update classification cache: {e}")
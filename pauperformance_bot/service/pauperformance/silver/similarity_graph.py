@@ -0,0 +1,212 @@
+import os
+from os import path
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+from scipy import sparse
+
+from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.myr import (
+    SIMILARITY_GRAPH_FILE,
+    MyrFileSystem,
+)
+from pauperformance_bot.constant.pauperformance.silver import (
+    NEAR_DUPLICATE_SIMILARITY,
+    SIMILARITY_GRAPH_BLOCK_SIZE,
+    SIMILARITY_GRAPH_K,
+    SIMILARITY_GRAPH_MIN_SIMILARITY,
+)
+from pauperformance_bot.entity.deck.playable import PlayableDeck
+from pauperformance_bot.service.pauperformance.silver.classification_pool import (
+    load_playable_deck_file,
+)
+from pauperformance_bot.service.pauperformance.silver.deck_index import (
+    DeckFingerprintIndex,
+)
+from pauperformance_bot.util.log import get_application_logger
+
+logger = get_application_logger()
+
+
+class DeckSimilarityGraph:
+    """The most similar decks of each deck, as a sparse (decks x decks) matrix.
+
+    Row i holds the similarities (as in Decklassifier.get_similarity) of deck i
+    with its neighbours, sorted by decreasing similarity. Lookups only read one
+    row, so they cost as much as the neighbours of a deck, not as the corpus.
+    """
+
+    def __init__(self, deck_ids: list[str], neighbours: sparse.csr_matrix):
+        self.deck_ids: list[str] = deck_ids
+        self.neighbours: sparse.csr_matrix = neighbours
+        self._deck_rows: dict[str, int] = {d: i for i, d in enumerate(deck_ids)}
+
+    def __len__(self):
+        return len(self.deck_ids)
+
+    def __contains__(self, deck_id: str):
+        return deck_id in self._deck_rows
+
+    @property
+    def nr_edges(self) -> int:
+        return self.neighbours.nnz
+
+    def get_neighbours(
+        self, deck_id: str, k: Optional[int] = None
+    ) -> list[tuple[str, float]]:
+        """Returns the (up to k) closest decks to deck_id, with their similarity."""
+        row = self._deck_rows[deck_id]
+        start, end = self.neighbours.indptr[row], self.neighbours.indptr[row + 1]
+        if k is not None:
+            end = min(end, start + k)
+        return [
+            (self.deck_ids[column], float(score))
+            for column, score in zip(
+                self.neighbours.indices[start:end], self.neighbours.data[start:end]
+            )
+        ]
+
+    def get_near_duplicates(
+        self, min_similarity: float = NEAR_DUPLICATE_SIMILARITY
+    ) -> list[tuple[str, str, float]]:
+        """Returns the pairs of decks at least min_similarity similar.
+
+        Each pair is listed once, by decreasing similarity.
+        """
+        edges = self.neighbours.tocoo()
+        is_near = edges.data >= min_similarity
+        pairs = np.column_stack(
+            (
+                np.minimum(edges.row[is_near], edges.col[is_near]),
+                np.maximum(edges.row[is_near], edges.col[is_near]),
+            )
+        )
+        pairs, first = np.unique(pairs, axis=0, return_index=True)
+        scores = edges.data[is_near][first]
+        order = np.lexsort((pairs[:, 1], pairs[:, 0], -scores))
+        return [
+            (self.deck_ids[pairs[i, 0]], self.deck_ids[pairs[i, 1]], float(scores[i]))
+            for i in order
+        ]
+
+    def save(self, graph_file: str):
+        logger.info(f"Storing similarity graph in {graph_file}...")
+        os.makedirs(path.dirname(graph_file) or ".", exist_ok=True)
+        tmp_file = f"{graph_file}.tmp"
+        with open(tmp_file, "wb") as out_f:
+            np.savez(
+                out_f,
+                deck_ids=np.array(self.deck_ids, dtype=np.str_),
+                data=self.neighbours.data,
+                indices=self.neighbours.indices,
+                indptr=self.neighbours.indptr,
+            )
+        os.replace(tmp_file, graph_file)
+        logger.info(f"Stored similarity graph in {graph_file}.")
+
+    @classmethod
+    def load(cls, graph_file: str) -> "DeckSimilarityGraph":
+        logger.info(f"Loading similarity graph from {graph_file}...")
+        with np.load(graph_file) as arrays:
+            deck_ids = arrays["deck_ids"].tolist()
+            neighbours = sparse.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=(len(deck_ids), len(deck_ids)),
+            )
+        logger.info(f"Loaded similarity graph from {graph_file}.")
+        return cls(deck_ids, neighbours)
+
+
+def build_similarity_graph(
+    decks: Iterable[tuple[str, PlayableDeck]],
+    k: int = SIMILARITY_GRAPH_K,
+    min_similarity: float = SIMILARITY_GRAPH_MIN_SIMILARITY,
+    block_size: int = SIMILARITY_GRAPH_BLOCK_SIZE,
+) -> DeckSimilarityGraph:
+    """Links each deck to its k most similar other decks, if at least min_similarity.
+
+    Decks are scored block_size at a time against all the decks, with one sparse
+    product per board: memory is bounded by a (block_size x decks) matrix. Ties
+    at the k-th place are broken arbitrarily.
+    """
+    if min_similarity <= 0:
+        raise ValueError(f"Minimum similarity must be positive: {min_similarity}.")
+    index = DeckFingerprintIndex()
+    deck_ids = []
+    for deck_id, deck in decks:
+        index.add(deck, None)
+        deck_ids.append(deck_id)
+    logger.info(f"Building similarity graph of {len(deck_ids)} decks...")
+    fingerprints = index.fingerprints
+    k = min(k, len(deck_ids) - 1)
+    counts, columns, scores = [], [], []
+    for start in range(0, len(deck_ids) if k > 0 else 0, block_size):
+        end = min(start + block_size, len(deck_ids))
+        block_scores = index.similarities(fingerprints[start:end])
+        block_scores[np.arange(end - start), np.arange(start, end)] = 0.0
+        top = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block_scores, top, axis=1)
+        # neighbours by decreasing similarity, then by position
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        is_similar = top_scores >= min_similarity
+        counts.append(is_similar.sum(axis=1))
+        columns.append(top[is_similar])
+        scores.append(top_scores[is_similar])
+    neighbours = _to_csr(counts, columns, scores, len(deck_ids))
+    logger.info(
+        f"Built similarity graph of {len(deck_ids)} decks: {neighbours.nnz} edges."
+    )
+    return DeckSimilarityGraph(deck_ids, neighbours)
+
+
+def _to_csr(
+    counts: list[np.ndarray],
+    columns: list[np.ndarray],
+    scores: list[np.ndarray],
+    nr_decks: int,
+) -> sparse.csr_matrix:
+    # the CSR arrays are built directly, keeping the entries of each row sorted
+    # by decreasing similarity (scipy would sort them by column)
+    indptr = np.zeros(nr_decks + 1, dtype=np.int64)
+    if counts:
+        np.cumsum(np.concatenate(counts), out=indptr[1:])
+    return sparse.csr_matrix(
+        (
+            np.concatenate(scores) if scores else np.empty(0, dtype=np.float64),
+            np.concatenate(columns) if columns else np.empty(0, dtype=np.int64),
+            indptr,
+        ),
+        shape=(nr_decks, nr_decks),
+    )
+
+
+def build_tournament_similarity_graph(
+    academy_fs: AcademyFileSystem,
+    myr_fs: MyrFileSystem,
+    graph_file: Optional[str] = SIMILARITY_GRAPH_FILE,
+    **kwargs,
+) -> DeckSimilarityGraph:
+    """Builds (and stores, unless graph_file is None) the graph of tournament decks.
+
+    Decks are the MTGGoldfish tournament decks of the Academy and of the local
+    cache, identified by MTGGoldfish id. kwargs are as in build_similarity_graph.
+    """
+    deck_files = {}
+    for decks_dir in (
+        myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR,
+        academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
+    ):
+        deck_files.update((f.stem, f) for f in Path(decks_dir).glob("*.txt"))
+    logger.info(f"Loading {len(deck_files)} tournament decks...")
+    decks = [
+        (deck_id, deck)
+        for deck_id, deck_file in sorted(deck_files.items())
+        if (deck := load_playable_deck_file(deck_file.as_posix())) is not None
+    ]
+    graph = build_similarity_graph(decks, **kwargs)
+    if graph_file:
+        graph.save(graph_file)
+    return graph
@@ -34,28 +34,41 @@ class VideoClassifier:
             for file, video_json in videos.items()
             if video_json["content_video_id"] not in banned_ids
         ]
-        missing_rows = []
+        pending_videos = []
         with ThreadPoolExecutor(max_workers=VIDEO_CLASSIFICATION_THREADS) as executor:
             for i in range(0, len(candidates), VIDEO_CLASSIFICATION_THREADS):
                 batch = candidates[i : i + VIDEO_CLASSIFICATION_THREADS]
                 futures = [
                     executor.submit(
-                        self._classify_video, file, video_json, manual_labels
+                        self._get_video_deck, file, video_json, manual_labels
                     )
                     for file, video_json in batch
                 ]
+                pending_videos.extend(p for f in futures if (p := f.result()))
+
+            # all the decks linked in video descriptions are classified at once
+            linked_decks = [deck for _, _, deck in pending_videos if deck]
+            classifications = iter(self.decklassifier.classify_decks(linked_decks))
+            pending_videos = [
+                (file, video_json, next(classifications) if deck else None)
+                for file, video_json, deck in pending_videos
+            ]
+
+            missing_rows = []
+            for i in range(0, len(pending_videos), VIDEO_CLASSIFICATION_THREADS):
+                batch = pending_videos[i : i + VIDEO_CLASSIFICATION_THREADS]
+                futures = [
+                    executor.submit(
+                        self._classify_video, file, video_json, classification
+                    )
+                    for file, video_json, classification in batch
+                ]
                 missing_rows.extend(row for f in futures if (row := f.result()))
         missing_rows.sort(key=lambda row: row[0])
         with open(myr_fs.MISSING_VIDEO_ARCHETYPES, "w", newline="") as out_f:
             csv.writer(out_f).writerows(missing_rows)
 
-    def _classify_video(
-        self,
-        filename,
-        video_json,
-        manual_labels,
-        brew_threshold=BREW_CLASSIFICATION_THRESHOLD,
-    ):
+    def _get_video_deck(self, filename, video_json, manual_labels):
         # check manual labels: these will override anything else
         video_id = video_json["content_video_id"]
         if video_id in manual_labels:
@@ -90,10 +103,19 @@ class VideoClassifier:
         logger.debug(f"Parsed {len(playable_decks)} decks.")
         if len(playable_decks) == 1:
             logger.debug("Found unique deck URL in description: parsing it...")
-            playable_deck = playable_decks[0]
-            most_similar_archetype, highest_similarity = (
-                self.decklassifier.classify_deck(playable_deck)
-            )
+            return filename, video_json, playable_decks[0]
+        return filename, video_json, None
+
+    def _classify_video(
+        self,
+        filename,
+        video_json,
+        classification,
+        brew_threshold=BREW_CLASSIFICATION_THRESHOLD,
+    ):
+        video_id = video_json["content_video_id"]
+        if classification:
+            most_similar_archetype, highest_similarity = classification
             if highest_similarity >= brew_threshold:
                 archetype = most_similar_archetype.name
                 logger.debug(f"Classifying deck as {archetype}")
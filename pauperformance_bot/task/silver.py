@@ -1,17 +1,47 @@
 import json
 import os
+import threading
+from typing import Optional
 
 import jsonpickle
 
 from pauperformance_bot.constant.pauperformance.academy import ACADEMY_FILE_SYSTEM
-from pauperformance_bot.constant.pauperformance.myr import TOP_PATH
+from pauperformance_bot.constant.pauperformance.myr import (
+    MYR_FILE_SYSTEM,
+    SILVER_BENCHMARK_FIXTURE_FILE,
+    SILVER_BENCHMARK_RESULTS_FILE,
+    SILVER_EVALUATION_FILE,
+    SIMILARITY_GRAPH_FILE,
+    TOP_PATH,
+)
+from pauperformance_bot.constant.pauperformance.silver import (
+    BREW_CLASSIFICATION_THRESHOLD,
+    CLASSIFICATION_SERVER_BATCH_SIZE,
+    CLASSIFICATION_SERVER_MAX_WAIT,
+    CLASSIFICATION_SERVER_PORT,
+)
 from pauperformance_bot.service.pauperformance.archive.mtggoldfish import (
     MTGGoldfishArchiveService,
 )
 from pauperformance_bot.service.pauperformance.pauperformance import (
     PauperformanceService,
 )
+from pauperformance_bot.service.pauperformance.silver.benchmark import (
+    BenchmarkFixture,
+    build_benchmark_fixture,
+    compare_centroid_prefilter,
+    run_benchmark,
+)
+from pauperformance_bot.service.pauperformance.silver.classification_server import (
+    ClassificationServer,
+)
 from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.service.pauperformance.silver.evaluation import (
+    evaluate_classifier,
+)
+from pauperformance_bot.service.pauperformance.silver.similarity_graph import (
+    build_tournament_similarity_graph,
+)
 from pauperformance_bot.service.pauperformance.silver.video_classifier import (
     VideoClassifier,
 )
@@ -40,11 +70,31 @@ def get_dpl_classifier():
     return Decklassifier(pauperformance, ACADEMY_FILE_SYSTEM)
 
 
-DPL_SILVER = get_dpl_classifier()
+# the classifier of generate_dpl_meta, built on first use (see get_dpl_silver)
+_dpl_silver: Optional[Decklassifier] = None
+# decks are learned on the fly: requests are served one at a time
+_dpl_silver_lock = threading.RLock()
+
+
+def get_dpl_silver() -> Decklassifier:
+    global _dpl_silver
+    with _dpl_silver_lock:
+        if _dpl_silver is None:
+            _dpl_silver = get_dpl_classifier()
+            _dpl_silver.warm_up()
+        return _dpl_silver
+
+
+def __getattr__(name):
+    # DPL_SILVER is no longer built at import time
+    if name == "DPL_SILVER":
+        return get_dpl_silver()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def generate_dpl_meta(data, name="DPL metagame"):
-    return DPL_SILVER.get_dpl_metagame(data, name=name)
+    with _dpl_silver_lock:
+        return get_dpl_silver().get_dpl_metagame(data, name=name)
 
 
 def main(input_file, output_file):
@@ -60,6 +110,7 @@ def main(input_file, output_file):
     logger.info(f"Stored DPL meta in {output_file}...")
 
 
+# WSGI applications (e.g. for gunicorn): see serve for the asyncio server
 def dpl_classifier(environ, start_response):
     try:
         method = environ["REQUEST_METHOD"]
@@ -122,6 +173,62 @@ def apl_classifier(environ, start_response):
         return [json.dumps({"error": str(e)}).encode("utf-8")]
 
 
+def serve(
+    port=CLASSIFICATION_SERVER_PORT,
+    batch_size=CLASSIFICATION_SERVER_BATCH_SIZE,
+    max_wait=CLASSIFICATION_SERVER_MAX_WAIT,
+    learn_on_the_fly=True,
+):
+    ClassificationServer(
+        get_dpl_classifier,
+        batch_size=batch_size,
+        max_wait=max_wait,
+        learn_on_the_fly=learn_on_the_fly,
+    ).run(port)
+
+
+def benchmark_centroid_prefilter(top_n_values=(5, 10, 20)):
+    decklassifier = get_dpl_classifier()
+    for top_n in top_n_values:
+        compare_centroid_prefilter(decklassifier, top_n)
+
+
+def benchmark_classifier(
+    fixture_file=SILVER_BENCHMARK_FIXTURE_FILE,
+    results_file=SILVER_BENCHMARK_RESULTS_FILE,
+):
+    # the fixture is built once: later runs reuse it, so they can be compared
+    if os.path.exists(fixture_file):
+        fixture = BenchmarkFixture.load(fixture_file)
+    else:
+        storage = DropboxService()
+        archive = MTGGoldfishArchiveService(storage)
+        pauperformance = PauperformanceService(storage, archive)
+        fixture = build_benchmark_fixture(pauperformance, ACADEMY_FILE_SYSTEM)
+        fixture.save(fixture_file)
+    benchmark = run_benchmark(fixture)
+    benchmark.save(results_file)
+    logger.info(f"Stored benchmark results in {results_file}.")
+    return benchmark
+
+
+def evaluate(
+    folds=None,
+    brew_threshold=BREW_CLASSIFICATION_THRESHOLD,
+    output_file=SILVER_EVALUATION_FILE,
+):
+    # folds=None holds out one deck at a time
+    evaluation = evaluate_classifier(get_dpl_classifier(), folds, brew_threshold)
+    evaluation.save(output_file)
+    return evaluation
+
+
+def similarity_graph(output_file=SIMILARITY_GRAPH_FILE):
+    return build_tournament_similarity_graph(
+        ACADEMY_FILE_SYSTEM, MYR_FILE_SYSTEM, output_file
+    )
+
+
 def classify():
     storage = DropboxService()
     archive = MTGGoldfishArchiveService(storage)
@@ -0,0 +1,143 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+_START, _KEY, _COLON, _VALUE, _NEXT_KEY, _ITEM, _NEXT_ITEM, _END = range(8)
+
+
+class JSONArrayStream:
+    """Incremental parser of the items of a JSON array, fed by chunks of bytes.
+
+    The array is either the whole document or, if key is set, the value of key in
+    the top-level object. Items are decoded as soon as they are complete, so that
+    only the current one is kept in memory, while everything after the array is
+    ignored. Invalid documents raise json.JSONDecodeError (ValueError).
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key: Optional[str] = key
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer: str = ""
+        self._state: int = _START
+        self._current_key: Optional[str] = None
+        # whether the array has just been opened, i.e. it may be empty
+        self._array_opened: bool = False
+        self._closed: bool = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Returns the items completed by chunk."""
+        self._buffer += self._decoder.decode(chunk)
+        return self._parse()
+
+    def close(self) -> list[Any]:
+        """Returns the items left, checking the array is complete."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._closed = True
+        items = self._parse()
+        if self._state != _END:
+            raise json.JSONDecodeError("Unexpected end of data", self._buffer, 0)
+        return items
+
+    def _parse(self) -> list[Any]:
+        items = []
+        pos = 0
+        while self._state != _END:
+            pos = _WHITESPACE.match(self._buffer, pos).end()
+            if pos == len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if self._state == _START:
+                if self.key is not None:
+                    pos = self._expect("{", pos)
+                    self._state = _KEY
+                else:
+                    pos = self._expect("[", pos)
+                    self._state = _ITEM
+                    self._array_opened = True
+            elif self._state == _NEXT_ITEM and char == "]":
+                self._state = _END
+            elif self._state in (_NEXT_KEY, _NEXT_ITEM):
+                if self._state == _NEXT_KEY and char == "}":
+                    raise json.JSONDecodeError(
+                        f"Missing key {self.key}", self._buffer, pos
+                    )
+                pos = self._expect(",", pos)
+                self._state = _KEY if self._state == _NEXT_KEY else _ITEM
+            elif self._state == _COLON:
+                pos = self._expect(":", pos)
+                self._state = _VALUE
+            elif self._state == _VALUE and self._current_key == self.key:
+                pos = self._expect("[", pos)
+                self._state = _ITEM
+                self._array_opened = True
+            elif self._state == _ITEM and char == "]" and self._array_opened:
+                self._state = _END  # empty array
+            else:
+                if self._state == _KEY and char == "}":
+                    raise json.JSONDecodeError(
+                        f"Missing key {self.key}", self._buffer, pos
+                    )
+                decoded = self._decode(pos)
+                if decoded is None:
+                    break
+                value, pos = decoded
+                if self._state == _KEY:
+                    if not isinstance(value, str):
+                        raise json.JSONDecodeError("Expecting key", self._buffer, pos)
+                    self._current_key = value
+                    self._state = _COLON
+                elif self._state == _VALUE:
+                    self._state = _NEXT_KEY
+                else:
+                    items.append(value)
+                    self._state = _NEXT_ITEM
+                    self._array_opened = False
+        self._buffer = self._buffer[pos:] if self._state != _END else ""
+        return items
+
+    def _expect(self, char: str, pos: int) -> int:
+        if self._buffer[pos] != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, pos)
+        return pos + 1
+
+    def _decode(self, pos: int) -> Optional[tuple[Any, int]]:
+        # returns None if the value may be incomplete, waiting for more data
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return None
+        # values at the end of the buffer, and numbers in general, may continue
+        if not self._closed and (
+            end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS
+        ):
+            return None
+        return value, end
+
+
+async def aiter_json_array(
+    chunks: AsyncIterable[bytes], key: Optional[str] = None
+) -> AsyncIterator[Any]:
+    """Yields the items of a JSON array read from chunks (see JSONArrayStream)."""
+    stream = JSONArrayStream(key)
+    async for chunk in chunks:
+        for item in stream.feed(chunk):
+            yield item
+    for item in stream.close():
+        yield item
+
+
+def iter_json_array(
+    chunks: Iterable[bytes], key: Optional[str] = None
+) -> Iterator[Any]:
+    """Yields the items of a JSON array read from chunks (see JSONArrayStream)."""
+    stream = JSONArrayStream(key)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
@@ -1,3 +1,10 @@
+import re
+from functools import lru_cache
+
+from pauperformance_bot.constant.pauperformance.pauperformance import (
+    FIXED_CARD_NAMES_CACHE_SIZE,
+)
+
 # TODO: replace UB MTGO version names
 # TODO: replace single cards with dual cards
 # eg (Stormshriek Feral -> Stormshriek Feral // Flush Out)
@@ -83,7 +90,17 @@ def is_valid_p12e_deck_name(deck_name):
     return len(deck_number) == 3
 
 
+# matches any typo (TYPOS is expected to be left as it is)
+_TYPOS_PATTERN = re.compile("|".join(re.escape(typo) for typo in TYPOS))
+
+
+@lru_cache(maxsize=FIXED_CARD_NAMES_CACHE_SIZE)
 def fix_card_name(card_name):
+    # Typos are fixed in order, each one in the result of the previous fixes (e.g.
+    # "Plain" -> "Plains", then "Plainss" -> "Plains"). If the name holds none of
+    # them, no fix applies at all: only the other names go through the fixes.
+    if not _TYPOS_PATTERN.search(card_name):
+        return card_name
     for typo, fix in TYPOS.items():
         card_name = card_name.replace(typo, fix)
     return card_name
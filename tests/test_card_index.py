@@ -0,0 +1,229 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from pauperformance_bot.service.arena import youtube
+from pauperformance_bot.service.pauperformance.card_index import (
+    CardIndexColumns,
+    build_card_index_from_bulk_data,
+    get_card_index_stamp,
+    iter_bulk_data_cards,
+    load_set_index,
+    partition_cards_by_set,
+)
+from pauperformance_bot.util.path import posix_path
+
+# the default arguments of the service build a YouTube client, which needs an API
+# key: tests always pass their own services
+with patch.object(youtube, "Api"):
+    from pauperformance_bot.service.pauperformance.pauperformance import (
+        PauperformanceService,
+    )
+
+BULK_DATA_FILE = "tests/mock_data/scryfall_bulk_data.json"
+
+SETS = [
+    ("lea", "Limited Edition Alpha", "1993-08-05"),
+    ("lrw", "Lorwyn", "2007-10-12"),
+    ("fem", "Fallen Empires", "1994-11-01"),
+    ("mmq", "Mercadian Masques", "1999-10-04"),
+    ("ced", "Collectors' Edition", "1993-12-10"),
+]
+
+
+class TestCardIndex(unittest.TestCase):
+    @staticmethod
+    def load_test_set_index(tmp_dir):
+        set_index_file = posix_path(tmp_dir, "set_index.json")
+        with open(set_index_file, "w") as out_f:
+            json.dump(
+                {
+                    str(i): {
+                        "p12e_code": i,
+                        "scryfall_code": code,
+                        "name": name,
+                        "date": date,
+                    }
+                    for i, (code, name, date) in enumerate(SETS, start=1)
+                },
+                out_f,
+            )
+        return load_set_index(set_index_file)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.set_index = self.load_test_set_index(self.tmp_dir.name)
+        self.cache_dir = posix_path(self.tmp_dir.name, "cards_index")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_set_index(self):
+        self.assertListEqual([1, 2, 3, 4, 5], list(self.set_index))
+        self.assertEqual("lrw", self.set_index[2]["scryfall_code"])
+
+    def test_iter_bulk_data_cards(self):
+        with open(BULK_DATA_FILE) as in_f:
+            cards = json.load(in_f)
+        self.assertListEqual(
+            cards, list(iter_bulk_data_cards(BULK_DATA_FILE, chunk_size=16))
+        )
+
+    def test_partition_cards_by_set(self):
+        card_index = partition_cards_by_set(
+            iter_bulk_data_cards(BULK_DATA_FILE), self.set_index, skip_sets=[4]
+        )
+        names = {
+            p12e_code: [c["name"] for c in cards]
+            for p12e_code, cards in card_index.items()
+        }
+        self.assertDictEqual(
+            {
+                1: ["Dark Ritual", "Lightning Bolt"],
+                2: ["Brainstorm", "Forest", "Ponder"],
+                3: ["Hymn to Tourach"],
+                4: [],
+                5: ["Ponder"],
+            },
+            names,
+        )
+        # the first printing of a card in a set is kept
+        self.assertEqual("298", card_index[2][1]["collector_number"])
+
+    def test_build_card_index_from_bulk_data(self):
+        card_index = build_card_index_from_bulk_data(
+            BULK_DATA_FILE, self.set_index, [4, 5], self.cache_dir
+        )
+        self.assertListEqual(
+            ["1.json", "2.json", "3.json"], sorted(os.listdir(self.cache_dir))
+        )
+        with open(posix_path(self.cache_dir, "2.json")) as in_f:
+            self.assertListEqual(card_index[2], json.load(in_f))
+
+    def test_cache_is_loaded_without_queries(self):
+        pauperformance = Mock(set_index=self.set_index)
+        card_index = PauperformanceService._build_card_index(
+            pauperformance, [4, 5], self.cache_dir, bulk_data_file=BULK_DATA_FILE
+        )
+        pauperformance._load_card_index.assert_not_called()
+        loaded = PauperformanceService._load_card_index(
+            pauperformance, [4, 5], self.cache_dir
+        )
+        self.assertDictEqual(card_index, loaded)
+        pauperformance.scryfall.search_cards.assert_not_called()
+
+
+class TestCardIndexColumns(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.set_index = TestCardIndex.load_test_set_index(self.tmp_dir.name)
+        self.cache_dir = posix_path(self.tmp_dir.name, "cards_index")
+        self.columns_dir = posix_path(self.tmp_dir.name, "columns")
+        self.card_index = build_card_index_from_bulk_data(
+            BULK_DATA_FILE, self.set_index, [4], self.cache_dir
+        )
+        self.stamp = get_card_index_stamp(self.cache_dir, self.set_index)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def service(self):
+        pauperformance = PauperformanceService(
+            Mock(),
+            Mock(),
+            scryfall=Mock(),
+            youtube=Mock(),
+            config_reader=Mock(),
+            card_columns_dir=self.columns_dir,
+        )
+        pauperformance.set_index = self.set_index
+        return pauperformance
+
+    def test_save_and_load(self):
+        columns = CardIndexColumns.from_card_index(self.card_index)
+        columns.save(self.columns_dir, self.stamp)
+        loaded = CardIndexColumns.load(self.columns_dir, self.stamp)
+        self.assertEqual(len(columns), len(loaded))
+        for p12e_code, cards in self.card_index.items():
+            rows = loaded.get_set_rows(p12e_code)
+            self.assertListEqual([c["name"] for c in cards], loaded.get_names(rows))
+            self.assertListEqual(
+                [c["scryfall_uri"] for c in cards], loaded.get_scryfall_uris(rows)
+            )
+        self.assertListEqual([], loaded.get_names(loaded.get_set_rows(4)))
+
+    def test_stale_columns(self):
+        self.assertIsNone(CardIndexColumns.load(self.columns_dir, self.stamp))
+        CardIndexColumns.from_card_index(self.card_index).save(
+            self.columns_dir, self.stamp
+        )
+        build_card_index_from_bulk_data(
+            BULK_DATA_FILE, self.set_index, [], self.cache_dir
+        )
+        stamp = get_card_index_stamp(self.cache_dir, self.set_index)
+        self.assertNotEqual(self.stamp, stamp)
+        self.assertIsNone(CardIndexColumns.load(self.columns_dir, stamp))
+
+    def test_indexes_are_lazy(self):
+        pauperformance = PauperformanceService(
+            Mock(), Mock(), scryfall=Mock(), youtube=Mock(), config_reader=Mock()
+        )
+        pauperformance.scryfall.get_sets.assert_not_called()
+        self.assertNotIn("card_index", vars(pauperformance))
+
+    def test_columns_are_reused(self):
+        with patch.object(PauperformanceService, "_build_card_index") as build:
+            build.return_value = self.card_index
+            self.service()._load_card_columns([4], self.cache_dir, self.columns_dir)
+            build.assert_called_once()
+            build.reset_mock()
+            columns = self.service()._load_card_columns(
+                [4], self.cache_dir, self.columns_dir
+            )
+            build.assert_not_called()
+        self.assertEqual(
+            sum(len(cards) for cards in self.card_index.values()), len(columns)
+        )
+
+    def test_card_index(self):
+        pauperformance = self.service()
+        pauperformance.card_columns = CardIndexColumns.from_card_index(self.card_index)
+        card_index = pauperformance._project_card_index(self.cache_dir)
+        self.assertListEqual(list(self.set_index), list(card_index))
+        for p12e_code, cards in self.card_index.items():
+            self.assertListEqual(
+                [(c["name"], c["scryfall_uri"]) for c in cards],
+                [(c.name, c.scryfall_uri) for c in card_index[p12e_code]],
+            )
+        bolt = card_index[1][1]
+        self.assertEqual("Lightning Bolt", bolt.name)
+        self.assertEqual("https://scryfall.com/card/lea/161", bolt.url)
+        # the full card is read from the cache
+        self.assertEqual(self.card_index[1][1], bolt.scryfall_card)
+        self.assertFalse(hasattr(bolt, "__dict__"))
+
+    def test_incremental_card_index(self):
+        pauperformance = self.service()
+        pauperformance.card_columns = CardIndexColumns.from_card_index(self.card_index)
+        incremental_card_index = pauperformance.incremental_card_index
+        self.assertDictEqual(
+            {
+                1: ["Dark Ritual", "Lightning Bolt"],
+                2: ["Brainstorm", "Forest", "Ponder"],
+                3: ["Hymn to Tourach"],
+                4: [],
+                5: [],
+            },
+            {
+                p12e_code: [c.name for c in cards]
+                for p12e_code, cards in incremental_card_index.items()
+            },
+        )
+        # cards are shared with the card index
+        self.assertIs(pauperformance.card_index[1][0], incremental_card_index[1][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
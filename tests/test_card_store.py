@@ -0,0 +1,68 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from pauperformance_bot.service.mtg.card_store import ScryfallCardStore
+from pauperformance_bot.util.cache import to_pkl_name
+from pauperformance_bot.util.path import posix_path
+
+
+class TestScryfallCardStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = posix_path(self.tmp_dir.name, "cards.sqlite3")
+        self.store = ScryfallCardStore(self.db_file, lru_size=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.store.get("Brainstorm"))
+        self.store.put("Brainstorm", {"name": "Brainstorm"})
+        self.assertEqual({"name": "Brainstorm"}, self.store.get("Brainstorm"))
+        self.assertEqual({"name": "Brainstorm"}, self.store.get("brainstorm"))
+        self.assertEqual(1, len(ScryfallCardStore(self.db_file)))
+
+    def test_get_many(self):
+        names = [f"Card {i}" for i in range(1200)]
+        self.store.put_many((name, {"name": name}) for name in names)
+        cards = self.store.get_many(names + ["card 3", "Missing"])
+        self.assertEqual(len(names) + 1, len(cards))
+        self.assertEqual("Card 3", cards["card 3"]["name"])
+        self.assertNotIn("Missing", cards)
+
+    def test_lru(self):
+        self.store.put_many((name, {"name": name}) for name in "ABC")
+        self.store.get_many("ABC")
+        self.assertListEqual(["b", "c"], list(self.store._lru))
+        self.store.get("B")
+        self.assertListEqual(["c", "b"], list(self.store._lru))
+        # updates are not hidden by the LRU
+        self.store.put("C", {"name": "C2"})
+        self.assertEqual("C2", self.store.get("C")["name"])
+
+    def test_open_imports_pickles(self):
+        cards_dir = posix_path(self.tmp_dir.name, "cards")
+        os.makedirs(cards_dir)
+        for name in ("Fire // Ice", "Ponder"):
+            with open(posix_path(cards_dir, to_pkl_name(name)), "wb") as out_f:
+                pickle.dump({"name": name}, out_f)
+        with open(posix_path(cards_dir, "Broken.pkl"), "wb") as out_f:
+            out_f.write(b"broken")
+        db_file = posix_path(self.tmp_dir.name, "store", "cards.sqlite3")
+        store = ScryfallCardStore.open(db_file, legacy_cards_dir=cards_dir)
+        self.assertEqual(2, len(store))
+        self.assertEqual("Fire // Ice", store.get("Fire // Ice")["name"])
+        # only the pickles missing from the store are imported
+        store.put("Ponder", {"name": "Ponder", "updated": True})
+        with open(posix_path(cards_dir, "Preordain.pkl"), "wb") as out_f:
+            pickle.dump({"name": "Preordain"}, out_f)
+        store = ScryfallCardStore.open(db_file, legacy_cards_dir=cards_dir)
+        self.assertEqual(3, len(store))
+        self.assertTrue(store.get("Ponder")["updated"])
+        self.assertEqual("Preordain", store.get("preordain")["name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from pauperformance_bot.service.pauperformance.silver.classification_server import (
+    ClassificationServer,
+)
+from tests.test_decklassifier import SyntheticCorpus, copy_deck
+
+
+def to_cards(board):
+    return [{"quantity": c.quantity, "name": c.card_name} for c in board]
+
+
+def to_dpl_decks(queries):
+    return [
+        {
+            "id": str(i),
+            "cards": {
+                "mainboard": to_cards(q.mainboard),
+                "sideboard": to_cards(q.sideboard),
+            },
+        }
+        for i, q in enumerate(queries)
+    ]
+
+
+class ClassificationServerTestCase(unittest.IsolatedAsyncioTestCase):
+    learn_on_the_fly = True
+
+    async def asyncSetUp(self):
+        self.corpus = SyntheticCorpus()
+        self.decklassifier = self.corpus.classifier()
+        self.server = ClassificationServer(
+            self.corpus.classifier,
+            max_workers=2,
+            batch_size=8,
+            max_wait=0.005,
+            learn_on_the_fly=self.learn_on_the_fly,
+        )
+        self.client = TestClient(TestServer(self.server.create_app()))
+        await self.client.start_server()
+        for _ in range(500):
+            response = await self.client.get("/health")
+            if response.status == 200:
+                break
+            self.assertEqual(503, response.status)
+            await asyncio.sleep(0.01)
+        self.assertTrue(self.server.ready)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.corpus.cleanup()
+
+    def expected_archetypes(self, queries):
+        return [
+            a.name if a and s >= 0.78 else "Brew"
+            for a, s in self.decklassifier.classify_decks(
+                [copy_deck(q) for q in queries]
+            )
+        ]
+
+
+class TestClassificationServer(ClassificationServerTestCase):
+    learn_on_the_fly = False
+
+    async def test_dpl_classifier(self):
+        decks = to_dpl_decks(self.corpus.queries)
+        response = await self.client.post("/dpl", data=json.dumps(decks))
+        self.assertEqual(200, response.status)
+        dpl_meta = json.loads(await response.text())
+        self.assertEqual("DPL metagame", dpl_meta["name"])
+        self.assertListEqual(
+            [str(i) for i in range(len(decks))],
+            [d["identifier"] for d in dpl_meta["dpl_decks"]],
+        )
+        self.assertListEqual(
+            self.expected_archetypes(self.corpus.queries),
+            [d["archetype"] for d in dpl_meta["dpl_decks"]],
+        )
+
+    async def test_concurrent_apl_classifiers(self):
+        async def post(queries):
+            payload = {
+                "decks": [
+                    {
+                        "id": str(i),
+                        "mainDeck": to_cards(q.mainboard),
+                        "sideboard": to_cards(q.sideboard),
+                    }
+                    for i, q in enumerate(queries)
+                ]
+            }
+            response = await self.client.post("/apl", data=json.dumps(payload))
+            self.assertEqual(200, response.status)
+            return await response.json()
+
+        requests = [self.corpus.queries[i::3] for i in range(3)]
+        responses = await asyncio.gather(*(post(queries) for queries in requests))
+        for queries, response in zip(requests, responses):
+            self.assertListEqual(
+                self.expected_archetypes(queries), list(response.values())
+            )
+        response = await self.client.get("/stats")
+        self.assertEqual(200, response.status)
+        stats = await response.json()
+        self.assertEqual(len(self.corpus.queries), stats["items"])
+        self.assertLessEqual(stats["mean_batch_size"], 8)
+        self.assertSetEqual({"p50", "p90", "p99"}, set(stats["latency_ms"]))
+
+    async def test_invalid_request(self):
+        response = await self.client.post("/apl", data=b'{"decks": [{"id": 1}')
+        self.assertEqual(400, response.status)
+        self.assertIn("error", await response.json())
+        response = await self.client.get("/apl")
+        self.assertEqual(405, response.status)
+
+
+class TestLearningClassificationServer(ClassificationServerTestCase):
+    async def test_dpl_classifier(self):
+        decks = to_dpl_decks(self.corpus.queries)
+        expected = self.decklassifier.get_dpl_metagame(decks)
+        response = await self.client.post("/dpl", data=json.dumps(decks))
+        self.assertEqual(200, response.status)
+        dpl_meta = json.loads(await response.text())
+        self.assertListEqual(
+            [d.archetype for d in expected.dpl_decks],
+            [d["archetype"] for d in dpl_meta["dpl_decks"]],
+        )
+        self.assertListEqual(
+            [d.accuracy for d in expected.dpl_decks],
+            [d["accuracy"] for d in dpl_meta["dpl_decks"]],
+        )
+        response = await self.client.get("/stats")
+        self.assertEqual(200, response.status)
+        self.assertDictEqual(
+            {"learned_decks": len(self.decklassifier.learned_index)},
+            await response.json(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import tests.data as data
+from pauperformance_bot.entity.deck.compact import (
+    CARD_NAMES,
+    CardNameTable,
+    CompactDeck,
+)
+from pauperformance_bot.entity.deck.playable import PlayableDeck, PlayedCard
+
+
+class TestCardNameTable(unittest.TestCase):
+    def test_intern(self):
+        table = CardNameTable()
+        bolt = table.intern("Lightning Bolt")
+        self.assertEqual(bolt, table.intern("Lightning Bolt"))
+        self.assertNotEqual(bolt, table.intern("Lava Spike"))
+        self.assertEqual("Lightning Bolt", table.name(bolt))
+        self.assertIsNone(table.get("Black Lotus"))
+        self.assertEqual(2, len(table))
+
+
+class TestCompactDeck(unittest.TestCase):
+    def setUp(self):
+        self.playable = PlayableDeck(data.DECK_MAIN, data.DECK_SIDE)
+        self.compact = CompactDeck.from_playable(self.playable)
+
+    def test_round_trip(self):
+        playable = self.compact.to_playable()
+        self.assertListEqual(self.playable.mainboard, playable.mainboard)
+        self.assertListEqual(self.playable.sideboard, playable.sideboard)
+        self.assertEqual(repr(self.playable), repr(playable))
+        self.assertEqual(self.playable, playable)
+        self.assertEqual(self.compact, CompactDeck.from_playable(playable))
+        self.assertEqual(self.playable.digest, self.compact.digest)
+        self.assertEqual(hash(self.playable), hash(self.compact))
+
+    def test_equality_with_playable_deck(self):
+        self.assertEqual(self.playable, self.compact)
+        self.assertEqual(self.compact, self.playable)
+        self.assertEqual(1, len({self.playable, self.compact}))
+        other = PlayableDeck(data.DECK_MAIN, data.DECK_SIDE[:-1])
+        self.assertNotEqual(other, self.compact)
+        self.assertNotEqual(self.compact, other)
+        self.assertNotEqual(self.compact, self.compact.digest)
+        self.assertNotEqual(self.playable, None)
+
+    def test_card_names_are_interned(self):
+        other = CompactDeck.from_playable(self.playable)
+        for c1, c2 in zip(self.compact.mainboard, other.mainboard):
+            self.assertIs(c1.card_name, c2.card_name)
+        bolt = next(
+            c for c in self.compact.mainboard if c.card_name == "Lightning Bolt"
+        )
+        self.assertIs(CARD_NAMES.name(CARD_NAMES.get("Lightning Bolt")), bolt.card_name)
+
+    def test_read_interface(self):
+        self.assertDictEqual(
+            dict(self.playable.mainboard_cards_map), self.compact.mainboard_cards_map
+        )
+        self.assertDictEqual(
+            dict(self.playable.sideboard_cards_map), self.compact.sideboard_cards_map
+        )
+        self.assertSetEqual(self.playable.card_names, self.compact.card_names)
+        self.assertEqual(self.playable.len_mainboard, self.compact.len_mainboard)
+        self.assertEqual(self.playable.len_sideboard, self.compact.len_sideboard)
+        self.assertEqual(str(self.playable), str(self.compact))
+        self.assertIn("Electrickery", self.compact)
+        self.assertNotIn("Black Lotus", self.compact)
+        self.assertFalse(self.compact.is_legal(["Lightning Bolt"]))
+        self.assertTrue(self.compact.is_legal(["Black Lotus"]))
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.compact, "__dict__"))
+
+    def test_quantity_overflow(self):
+        with self.assertRaises(OverflowError):
+            CompactDeck([PlayedCard(2**16, "Island")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,6 +55,18 @@ def test_list_archetypes_must_have_or_not_have_cards_are_lists():
         assert isinstance(archetype.must_not_have_cards, list)
 
 
+def test_list_archetypes_signatures():
+    signatures = {
+        a.name: a.signature for a in ConfigReader().list_archetypes() if a.signature
+    }
+    assert len(signatures) >= 9
+    assert signatures["Flicker Tron"].priority == 1
+    assert signatures["Flicker Tron"].min_cards == 4
+    assert "Ghostly Flicker" in signatures["Flicker Tron"].cards
+    for signature in signatures.values():
+        assert 0 < signature.min_cards <= len(signature.cards)
+
+
 # --- ConfigReader.get_archetype_name_from_alias ---
 
 
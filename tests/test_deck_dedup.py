@@ -0,0 +1,141 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import tests.data as data
+from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.myr import (
+    ARCHIVE_DECK_SOURCE,
+    DECKSTATS_DECK_SOURCE,
+    DPL_DECK_SOURCE,
+    MTGGOLDFISH_DECK_SOURCE,
+)
+from pauperformance_bot.entity.deck.playable import PlayableDeck, PlayedCard
+from pauperformance_bot.service.pauperformance.deck_dedup import (
+    DeckDedupIndex,
+    build_deck_dedup_index,
+)
+from pauperformance_bot.util.path import posix_path
+from tests.test_decklassifier import deck_lines
+
+
+def deckstats_deck(deck):
+    def cards(board):
+        return [
+            {"amount": c.quantity, "name": c.card_name, "valid": True} for c in board
+        ]
+
+    return {
+        "saved_id": 1,
+        "sections": [{"name": "Main", "cards": cards(deck.mainboard)}],
+        "sideboard": cards(deck.sideboard),
+    }
+
+
+class TestDeckDedupIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.academy_fs = AcademyFileSystem(self.root.name)
+        self.myr_fs = Mock()
+        self.myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR = posix_path(self.root.name, "meta")
+        self.deckstats_dir = posix_path(self.root.name, "deckstats")
+        self.deck = PlayableDeck(list(data.DECK_MAIN), list(data.DECK_SIDE))
+        self.other_deck = PlayableDeck(
+            list(data.DECK_MAIN[1:]) + [PlayedCard(4, "Fake Card")],
+            list(data.DECK_SIDE),
+        )
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def write_deck_file(self, decks_dir, deck_id, deck):
+        os.makedirs(decks_dir, exist_ok=True)
+        with open(posix_path(decks_dir, f"{deck_id}.txt"), "w") as out_f:
+            out_f.write("\n".join(deck_lines(deck)) + "\n")
+
+    def test_add(self):
+        index = DeckDedupIndex()
+        self.assertTrue(index.add(DPL_DECK_SOURCE, "1", self.deck))
+        self.assertFalse(index.add(DPL_DECK_SOURCE, "1", self.deck))
+        reordered = PlayableDeck(self.deck.mainboard[::-1], self.deck.sideboard)
+        self.assertFalse(index.add(MTGGOLDFISH_DECK_SOURCE, "2", reordered))
+        self.assertTrue(index.add(DPL_DECK_SOURCE, "3", self.other_deck))
+        self.assertEqual(2, len(index))
+        self.assertEqual(3, index.nr_source_ids)
+        self.assertIn(self.other_deck, index)
+        self.assertListEqual(
+            [(DPL_DECK_SOURCE, "1"), (MTGGOLDFISH_DECK_SOURCE, "2")],
+            index.get_source_ids(self.deck),
+        )
+        self.assertDictEqual(
+            {self.deck.digest: index.get_source_ids(self.deck)},
+            index.get_duplicates(),
+        )
+        # a deck indexed again with another list is moved to that list
+        self.assertFalse(index.add(DPL_DECK_SOURCE, "3", self.deck))
+        self.assertEqual(1, len(index))
+        self.assertNotIn(self.other_deck, index)
+
+    def test_group_duplicates(self):
+        index = DeckDedupIndex()
+        index.add(MTGGOLDFISH_DECK_SOURCE, "1", self.deck)
+        index.add(MTGGOLDFISH_DECK_SOURCE, "2", self.other_deck)
+        index.add(MTGGOLDFISH_DECK_SOURCE, "3", self.deck)
+        index.add(DPL_DECK_SOURCE, "4", self.deck)
+        # "4" and "5" are not indexed as MTGGoldfish decks
+        self.assertListEqual(
+            [["2"], ["1", "3"], ["5"], ["4"]],
+            index.group_duplicates(MTGGOLDFISH_DECK_SOURCE, ["2", "1", "5", "3", "4"]),
+        )
+
+    def test_build_deck_dedup_index(self):
+        self.write_deck_file(
+            self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR, "10", self.deck
+        )
+        self.write_deck_file(self.myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR, "11", self.deck)
+        self.write_deck_file(self.academy_fs.ASSETS_DATA_DECK_DPL_DIR, "a", self.deck)
+        self.write_deck_file(
+            self.academy_fs.ASSETS_DATA_DECK_DPL_DIR, "b", self.other_deck
+        )
+        os.makedirs(self.deckstats_dir)
+        with open(posix_path(self.deckstats_dir, "12.pkl"), "wb") as out_f:
+            pickle.dump(deckstats_deck(self.other_deck), out_f)
+        archive = Mock()
+        archive.list_decks.return_value = [Mock(deck_id=13)]
+        archive.to_playable_deck.return_value = self.deck
+        index_file = posix_path(self.root.name, "cache", "index.json")
+
+        index = build_deck_dedup_index(
+            self.academy_fs, self.myr_fs, archive, self.deckstats_dir, index_file
+        )
+        self.assertEqual(2, len(index))
+        self.assertListEqual(
+            [
+                (MTGGOLDFISH_DECK_SOURCE, "10"),
+                (MTGGOLDFISH_DECK_SOURCE, "11"),
+                (DPL_DECK_SOURCE, "a"),
+                (ARCHIVE_DECK_SOURCE, "13"),
+            ],
+            index.get_source_ids(self.deck),
+        )
+        self.assertListEqual(
+            [(DPL_DECK_SOURCE, "b"), (DECKSTATS_DECK_SOURCE, "12")],
+            index.get_source_ids(self.other_deck.digest),
+        )
+
+        # indexed decks are not parsed again
+        self.write_deck_file(self.academy_fs.ASSETS_DATA_DECK_DPL_DIR, "c", self.deck)
+        os.remove(posix_path(self.academy_fs.ASSETS_DATA_DECK_DPL_DIR, "a.txt"))
+        restored = build_deck_dedup_index(
+            self.academy_fs, self.myr_fs, None, self.deckstats_dir, index_file
+        )
+        self.assertEqual(2, len(restored))
+        self.assertIn((DPL_DECK_SOURCE, "a"), restored.get_source_ids(self.deck))
+        self.assertIn((DPL_DECK_SOURCE, "c"), restored.get_source_ids(self.deck))
+        self.assertEqual(7, restored.nr_source_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
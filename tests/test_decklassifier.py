@@ -0,0 +1,660 @@
+import os
+import random
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from pauperformance_bot.constant.pauperformance.academy import AcademyFileSystem
+from pauperformance_bot.constant.pauperformance.silver import (
+    BREW_CLASSIFICATION_THRESHOLD,
+)
+from pauperformance_bot.entity.config.archetype import (
+    ArchetypeConfig,
+    ArchetypeSignature,
+)
+from pauperformance_bot.entity.deck.playable import (
+    PlayableDeck,
+    PlayedCard,
+    parse_playable_deck_from_lines,
+)
+from pauperformance_bot.exceptions import ArchiveException
+from pauperformance_bot.service.pauperformance.silver.archetype_rules import (
+    ArchetypeRuleIndex,
+)
+from pauperformance_bot.service.pauperformance.silver.benchmark import (
+    compare_centroid_prefilter,
+)
+from pauperformance_bot.service.pauperformance.silver.classification_pool import (
+    classify_deck_files,
+)
+from pauperformance_bot.service.pauperformance.silver.deck_index import (
+    CardVocabulary,
+    DeckFingerprintIndex,
+    LearnedDeckIndex,
+)
+from pauperformance_bot.service.pauperformance.silver.decklassifier import Decklassifier
+from pauperformance_bot.service.pauperformance.silver.model_snapshot import (
+    load_model_snapshot,
+)
+from pauperformance_bot.service.pauperformance.silver.result_cache import (
+    ClassificationResultCache,
+    get_classified_deck_digest,
+)
+from pauperformance_bot.util.path import posix_path
+
+CARD_POOL = [f"Card {i:03}" for i in range(120)] + [
+    "Snow-Covered Island",
+    "Island",
+    "Blue Elemental Blast",
+    "Hydroblast",
+]
+
+
+def random_deck(rng, core):
+    main_cards = core[:4] + rng.sample(core[4:], 6) + rng.sample(CARD_POOL, 5)
+    main_cards = list(dict.fromkeys(main_cards))
+    quantities = [4] * len(main_cards)
+    while sum(quantities) < 60:
+        quantities[rng.randrange(len(quantities))] += 1
+    side_cards = rng.sample(CARD_POOL, rng.randrange(0, 6))
+    return PlayableDeck(
+        [PlayedCard(q, c) for q, c in zip(quantities, main_cards)],
+        [PlayedCard(rng.randint(1, 3), c) for c in side_cards],
+    )
+
+
+def deck_lines(deck):
+    return (
+        [f"{c.quantity} {c.card_name}" for c in deck.mainboard]
+        + [""]
+        + [f"{c.quantity} {c.card_name}" for c in deck.sideboard]
+        + [""]
+    )
+
+
+def copy_deck(deck):
+    return parse_playable_deck_from_lines(deck_lines(deck))
+
+
+class SyntheticCorpus:
+    """A seeded, self-contained classifier fixture: no Academy, no network."""
+
+    def __init__(self, seed=0, nr_archetypes=8, decks_per_archetype=12):
+        rng = random.Random(seed)
+        self.root = tempfile.TemporaryDirectory()
+        self.academy_fs = AcademyFileSystem(self.root.name)
+        self.archetypes = []
+        self.reference_decks = {}
+        labelled = []
+        for i in range(nr_archetypes):
+            core = rng.sample(CARD_POOL, 16)
+            must_have = [core[0]] if i % 3 == 0 else []
+            must_not_have = [rng.choice(CARD_POOL)] if i % 4 == 1 else []
+            references = []
+            for j in range(2):
+                name = f"Archetype {i} {j}.001.Someone"
+                deck = random_deck(rng, core)
+                self.reference_decks[name] = deck
+                references.append(name)
+            self.archetypes.append(
+                ArchetypeConfig(
+                    name=f"Archetype {i}",
+                    aliases=[],
+                    family=None,
+                    dominant_mana=[],
+                    game_type=["Aggro"],
+                    description="",
+                    must_have_cards=must_have,
+                    must_not_have_cards=must_not_have,
+                    reference_decks=references,
+                    resource_sideboards=[],
+                    resources_discord=[],
+                    resources=[],
+                )
+            )
+            for _ in range(decks_per_archetype):
+                labelled.append((random_deck(rng, core), f"Archetype {i}"))
+        # identical lists with different labels exercise tie-breaking
+        labelled.append((labelled[0][0], labelled[-1][1]))
+        rng.shuffle(labelled)
+        self.queries = [
+            random_deck(rng, rng.sample(CARD_POOL, 16)) for _ in range(20)
+        ] + [copy_deck(deck) for deck, _ in labelled[:20]]
+
+        tournament_file = posix_path(self.root.name, "mtggoldfish.csv")
+        dpl_file = posix_path(self.root.name, "dpl.csv")
+        split = len(labelled) * 3 // 4
+        self._write_training_data(
+            tournament_file,
+            self.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR,
+            labelled[:split],
+        )
+        self._write_training_data(
+            dpl_file, self.academy_fs.ASSETS_DATA_DECK_DPL_DIR, labelled[split:]
+        )
+        self.pauperformance = Mock()
+        self.pauperformance.config_reader.list_archetypes.return_value = self.archetypes
+        myr_fs = self.pauperformance.config_reader.myr_file_system
+        myr_fs.MTGGOLDFISH_DECK_TRAINING_DATA = tournament_file
+        myr_fs.DPL_DECK_TRAINING_DATA = dpl_file
+        self.pauperformance.get_playable_deck.side_effect = lambda name: copy_deck(
+            self.reference_decks[name]
+        )
+
+    @staticmethod
+    def _write_training_data(training_file, deck_dir, labelled):
+        os.makedirs(deck_dir, exist_ok=True)
+        with open(training_file, "w") as out_f:
+            out_f.write("# deck id, archetype\n")
+            for i, (deck, archetype) in enumerate(labelled):
+                deck_id = f"{os.path.basename(training_file)}-{i}"
+                out_f.write(f"{deck_id},{archetype}\n")
+                with open(posix_path(deck_dir, f"{deck_id}.txt"), "w") as deck_f:
+                    deck_f.write("\n".join(deck_lines(deck)))
+
+    def classifier(self, model_dir=None, results_cache_file=None):
+        return Decklassifier(
+            self.pauperformance,
+            self.academy_fs,
+            model_dir,
+            results_cache_file=results_cache_file,
+        )
+
+    def cleanup(self):
+        self.root.cleanup()
+
+
+def legacy_classify_deck(classifier, deck):
+    """The pairwise scan Decklassifier used before the fingerprint index."""
+    most_similar_archetype, highest_similarity = None, 0
+    classifier._simplify_deck(deck)
+    fingerprint = classifier._deck_fingerprint(deck)
+    candidates = []
+    for archetype in classifier.archetypes:
+        if deck.can_belong_to_archetype(archetype):
+            for reference_deck in archetype.reference_decks:
+                if reference_deck in classifier._decks_cache:
+                    reference = copy_deck(classifier._decks_cache[reference_deck])
+                    candidates.append((archetype, reference))
+    for archetype, decks in classifier.known_decks.items():
+        if deck.can_belong_to_archetype(archetype):
+            candidates += [(archetype, known_deck) for known_deck in decks]
+    for archetype, candidate in candidates:
+        score = classifier._get_similarity_precomputed(
+            *fingerprint, *classifier._deck_fingerprint(candidate)
+        )
+        if score > highest_similarity:
+            most_similar_archetype, highest_similarity = archetype, score
+    return most_similar_archetype, highest_similarity
+
+
+class TestDecklassifier(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus()
+        self.classifier = self.corpus.classifier()
+
+    def tearDown(self):
+        self.corpus.cleanup()
+
+    def test_training_data_is_indexed(self):
+        nr_known_decks = sum(len(d) for d in self.classifier.known_decks.values())
+        self.assertEqual(nr_known_decks, len(self.classifier.known_index))
+
+    def test_classify_deck_matches_pairwise_scan(self):
+        for query in self.corpus.queries:
+            actual = self.classifier.classify_deck(copy_deck(query))
+            expected = legacy_classify_deck(self.classifier, copy_deck(query))
+            self.assertEqual(expected, actual)
+
+    def test_classify_known_deck_is_exact_match(self):
+        deck, *_ = next(iter(self.classifier.known_decks.values()))
+        _, score = self.classifier.classify_deck(copy_deck(deck))
+        self.assertAlmostEqual(1.0, score)
+
+    def test_classify_deck_without_candidates(self):
+        for archetype in self.corpus.archetypes:
+            archetype.must_have_cards = ["Black Lotus"]
+        classifier = self.corpus.classifier()
+        archetype, score = classifier.classify_deck(self.corpus.queries[0])
+        self.assertIsNone(archetype)
+        self.assertEqual(0, score)
+
+    def test_rule_index_matches_can_belong_to_archetype(self):
+        rules = ArchetypeRuleIndex(self.corpus.archetypes)
+        decks = self.corpus.queries + list(self.corpus.reference_decks.values())
+        expected = [
+            [deck.can_belong_to_archetype(a) for a in self.corpus.archetypes]
+            for deck in decks
+        ]
+        self.assertListEqual(expected, rules.eligibility(decks).tolist())
+
+    def add_signatures(self):
+        # signatures overlapping the cores of the archetypes, with tied priorities
+        rng = random.Random(1)
+        for i, archetype in enumerate(self.corpus.archetypes[::2]):
+            cards = rng.sample(CARD_POOL, 6)
+            archetype.signature = ArchetypeSignature(
+                cards=cards, min_cards=2 + i % 3, priority=i % 2
+            )
+
+    def test_rule_index_signatures(self):
+        self.add_signatures()
+        rules = ArchetypeRuleIndex(self.corpus.archetypes)
+        decks = self.corpus.queries + list(self.corpus.reference_decks.values())
+        ordered = sorted(
+            (a for a in self.corpus.archetypes if a.signature),
+            key=lambda a: (a.signature.priority, self.corpus.archetypes.index(a)),
+        )
+        expected = [
+            next(
+                (
+                    a
+                    for a in ordered
+                    if deck.can_belong_to_archetype(a)
+                    and len(set(a.signature.cards) & set(deck.card_names))
+                    >= a.signature.min_cards
+                ),
+                None,
+            )
+            for deck in decks
+        ]
+        self.assertTrue(any(expected))
+        self.assertFalse(all(expected))
+        eligible, signatures = rules.match(decks)
+        self.assertListEqual(expected, signatures)
+        self.assertListEqual(rules.eligibility(decks).tolist(), eligible.tolist())
+
+    def test_classify_deck_by_signature(self):
+        self.add_signatures()
+        classifier = self.corpus.classifier()
+        _, signatures = classifier.archetype_rules.match(self.corpus.queries)
+        classifications = classifier.classify_decks(self.corpus.queries)
+        self.assertTrue(any(signatures))
+        for query, signature, classification in zip(
+            self.corpus.queries, signatures, classifications
+        ):
+            if signature:
+                self.assertEqual((signature, 1.0), classification)
+                self.assertEqual(classification, classifier.classify_deck(query))
+
+    def test_learned_decks_are_indexed(self):
+        before = len(self.classifier.known_index)
+        deck = copy_deck(self.corpus.queries[0])
+        archetype = next(
+            a for a in self.classifier.archetypes if deck.can_belong_to_archetype(a)
+        )
+        self.classifier.add_known_deck(deck, archetype)
+        self.assertEqual(before + 1, len(self.classifier.known_index))
+        _, score = self.classifier.classify_deck(copy_deck(deck))
+        self.assertAlmostEqual(1.0, score)
+
+    def test_classify_decks_matches_classify_deck(self):
+        expected = [
+            self.classifier.classify_deck(copy_deck(q)) for q in self.corpus.queries
+        ]
+        actual = self.classifier.classify_decks(
+            [copy_deck(q) for q in self.corpus.queries], batch_size=7
+        )
+        self.assertListEqual(expected, actual)
+
+    def test_classify_decks_empty_batch(self):
+        self.assertListEqual([], self.classifier.classify_decks([]))
+
+    def test_preload_reference_decks(self):
+        missing = "Archetype 2 1.001.Someone"
+
+        def get_playable_deck(name):
+            if name == missing:
+                raise ArchiveException(f"Unable to find deck with name {name}.")
+            return copy_deck(self.corpus.reference_decks[name])
+
+        mock = self.corpus.pauperformance.get_playable_deck
+        mock.side_effect = get_playable_deck
+        classifier = self.corpus.classifier()
+        self.assertListEqual([missing], classifier.preload_reference_decks(2))
+        self.assertEqual(
+            len(self.corpus.reference_decks) - 1, len(classifier._decks_cache)
+        )
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            actual = list(
+                executor.map(
+                    classifier.classify_deck,
+                    [copy_deck(q) for q in self.corpus.queries],
+                )
+            )
+        self.assertEqual(len(self.corpus.reference_decks), mock.call_count)
+        for query, classification in zip(self.corpus.queries, actual):
+            self.assertEqual(
+                legacy_classify_deck(classifier, copy_deck(query)), classification
+            )
+        self.assertListEqual([missing], classifier.preload_reference_decks())
+        self.assertEqual(len(self.corpus.reference_decks), mock.call_count)
+
+    def test_classify_deck_files_matches_classify_decks(self):
+        deck_files = []
+        for i, query in enumerate(self.corpus.queries):
+            deck_file = posix_path(self.corpus.root.name, f"query-{i}.txt")
+            with open(deck_file, "w") as out_f:
+                out_f.write("\n".join(deck_lines(query)) + "\n")
+            deck_files.append(deck_file)
+        with open(deck_files[3], "w") as out_f:
+            out_f.write("not a deck\n")
+        expected = self.classifier.classify_decks(
+            [copy_deck(q) for q in self.corpus.queries]
+        )
+        expected = [(a.name if a else None, s) for a, s in expected]
+        expected[3] = None
+        actual = classify_deck_files(
+            self.classifier, deck_files, chunk_size=7, max_workers=2
+        )
+        self.assertListEqual(expected, actual)
+
+    def test_top_k_matches_exhaustive_ranking(self):
+        index = self.classifier.known_index
+        queries = index.fingerprint([copy_deck(q) for q in self.corpus.queries])
+        rng = np.random.default_rng(0)
+        label_mask = rng.random((len(queries), len(index.labels))) < 0.8
+        scores = index.masked_similarities(queries, label_mask)
+        for k in (1, 3, 50):
+            neighbours = index.top_k(queries, k, label_mask)
+            for i, query_neighbours in enumerate(neighbours):
+                # scores are in visiting order: a stable sort breaks ties by it
+                ranking = np.argsort(-scores[i], kind="stable")[:k]
+                expected = [
+                    (int(index.row_order[j]), scores[i, j])
+                    for j in ranking
+                    if scores[i, j] > 0
+                ]
+                self.assertListEqual(expected, query_neighbours)
+
+    def test_get_nearest_neighbours(self):
+        for query in self.corpus.queries:
+            neighbours = self.classifier.get_nearest_neighbours(copy_deck(query), 4)
+            self.assertLessEqual(len(neighbours), 4)
+            self.assertEqual(
+                self.classifier.classify_deck(copy_deck(query)), neighbours[0]
+            )
+            self.assertListEqual(sorted(neighbours, key=lambda n: -n[1]), neighbours)
+
+    def test_centroid_prefilter_keeps_top_archetypes(self):
+        queries = self.classifier.known_index.fingerprint(
+            [copy_deck(q) for q in self.corpus.queries]
+        )
+        eligible = self.classifier.archetype_rules.eligibility(self.corpus.queries)
+        centroids = self.classifier._get_centroids()
+        scores = centroids.similarities(queries)
+        top = centroids.top_labels(queries, 2, eligible)
+        for i in range(len(queries)):
+            self.assertLessEqual(top[i].sum(), 2)
+            self.assertTrue(np.all(eligible[i] >= top[i]))
+            left_out = scores[i][eligible[i] & ~top[i]]
+            if left_out.size > 0:
+                self.assertGreaterEqual(scores[i][top[i]].min(), left_out.max())
+
+    def test_centroid_prefilter_with_all_archetypes(self):
+        expected = self.classifier.classify_decks(
+            [copy_deck(q) for q in self.corpus.queries]
+        )
+        self.classifier.centroid_prefilter = len(self.classifier.archetypes)
+        actual = self.classifier.classify_decks(
+            [copy_deck(q) for q in self.corpus.queries]
+        )
+        self.assertListEqual(expected, actual)
+
+    def test_compare_centroid_prefilter(self):
+        comparison = compare_centroid_prefilter(self.classifier, 1)
+        self.assertEqual(len(self.classifier.known_index), comparison.nr_decks)
+        self.assertGreater(comparison.exhaustive_accuracy, 0.9)
+        self.assertGreaterEqual(comparison.accuracy_loss, 0)
+        self.assertIsNone(self.classifier.centroid_prefilter)
+
+    def test_model_snapshot(self):
+        model_dir = posix_path(self.corpus.root.name, "model")
+        trained = self.corpus.classifier(model_dir)
+        self.assertEqual(1, len(os.listdir(model_dir)))
+        restored = self.corpus.classifier(model_dir)
+        self.assertIsNotNone(restored.known_index._base)
+        self.assertEqual(len(trained.known_index), len(restored.known_index))
+        self.assertDictEqual(
+            {a: list(map(repr, d)) for a, d in trained.known_decks.items()},
+            {a: list(map(repr, d)) for a, d in restored.known_decks.items()},
+        )
+        for query in self.corpus.queries:
+            self.assertEqual(
+                trained.classify_deck(copy_deck(query)),
+                restored.classify_deck(copy_deck(query)),
+            )
+
+    def test_model_snapshot_is_rebuilt_on_changes(self):
+        model_dir = posix_path(self.corpus.root.name, "model")
+        self.corpus.classifier(model_dir)
+        (snapshot,) = os.listdir(model_dir)
+        deck_dir = self.corpus.academy_fs.ASSETS_DATA_DECK_DPL_DIR
+        deck_file = posix_path(deck_dir, sorted(os.listdir(deck_dir))[0])
+        with open(deck_file) as deck_f:
+            content = deck_f.read()
+        with open(deck_file, "w") as deck_f:
+            deck_f.write(f"1 Card 000\n{content}")
+        classifier = self.corpus.classifier(model_dir)
+        self.assertIsNone(classifier.known_index._base)
+        self.assertNotIn(snapshot, os.listdir(model_dir))
+        self.assertEqual(1, len(os.listdir(model_dir)))
+
+    def test_model_snapshot_with_another_vocabulary(self):
+        model_dir = posix_path(self.corpus.root.name, "model")
+        trained = self.corpus.classifier(model_dir)
+        (key,) = os.listdir(model_dir)
+        vocabulary = CardVocabulary(
+            ["Black Lotus", *reversed(trained.vocabulary.names)]
+        )
+        restored = load_model_snapshot(
+            model_dir, key, {a.name: a for a in trained.archetypes}, vocabulary
+        )
+        queries = [copy_deck(q) for q in self.corpus.queries]
+        np.testing.assert_array_equal(
+            trained.known_index.similarities(trained.known_index.fingerprint(queries)),
+            restored.similarities(restored.fingerprint(queries)),
+        )
+
+    def test_deck_digest_ignores_card_order(self):
+        deck = self.corpus.queries[0]
+        shuffled = PlayableDeck(deck.mainboard[::-1], deck.sideboard[::-1])
+        self.assertEqual(
+            get_classified_deck_digest(deck), get_classified_deck_digest(shuffled)
+        )
+        other = PlayableDeck(deck.sideboard, deck.mainboard)
+        self.assertNotEqual(
+            get_classified_deck_digest(deck), get_classified_deck_digest(other)
+        )
+
+    def test_results_cache(self):
+        cache_file = posix_path(self.corpus.root.name, "results.sqlite")
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        expected = classifier.classify_decks(
+            [copy_deck(q) for q in self.corpus.queries]
+        )
+        cache = classifier.results_cache
+        self.assertEqual(
+            len(
+                {get_classified_deck_digest(copy_deck(q)) for q in self.corpus.queries}
+            ),
+            len(cache),
+        )
+        cached = self.corpus.classifier(results_cache_file=cache_file)
+        with patch.object(
+            cached, "_classify_simplified_decks", side_effect=AssertionError
+        ), patch.object(
+            cached, "_classify_simplified_deck", side_effect=AssertionError
+        ):
+            self.assertListEqual(
+                expected,
+                cached.classify_decks([copy_deck(q) for q in self.corpus.queries]),
+            )
+            for query, classification in zip(self.corpus.queries, expected):
+                self.assertEqual(classification, cached.classify_deck(copy_deck(query)))
+
+    def test_results_cache_is_invalidated_on_changes(self):
+        cache_file = posix_path(self.corpus.root.name, "results.sqlite")
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        classifier.classify_decks([copy_deck(q) for q in self.corpus.queries])
+        self.assertLess(0, len(classifier.results_cache))
+        digests = [
+            get_classified_deck_digest(copy_deck(q)) for q in self.corpus.queries
+        ]
+        self.corpus.archetypes[0].must_not_have_cards = ["Black Lotus"]
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        self.assertDictEqual({}, self._get_cached(classifier, digests))
+        classifier.classify_decks([copy_deck(q) for q in self.corpus.queries])
+        self.assertLess(0, len(self._get_cached(classifier, digests)))
+        deck_dir = self.corpus.academy_fs.ASSETS_DATA_DECK_DPL_DIR
+        deck_file = posix_path(deck_dir, sorted(os.listdir(deck_dir))[0])
+        with open(deck_file) as deck_f:
+            content = deck_f.read()
+        with open(deck_file, "w") as deck_f:
+            deck_f.write(f"1 Card 000\n{content}")
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        self.assertDictEqual({}, self._get_cached(classifier, digests))
+
+    @staticmethod
+    def _get_cached(classifier, digests):
+        return classifier.results_cache.get_many(
+            classifier._get_classifier_key(), digests
+        )
+
+    def test_results_cache_is_shared_by_classifiers(self):
+        cache_file = posix_path(self.corpus.root.name, "results.sqlite")
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        classifier.classify_decks([copy_deck(q) for q in self.corpus.queries])
+        nr_cached = len(classifier.results_cache)
+        classifier.centroid_prefilter = 2
+        classifier.classify_decks([copy_deck(q) for q in self.corpus.queries])
+        self.assertEqual(2 * nr_cached, len(classifier.results_cache))
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        self.assertEqual(2 * nr_cached, len(classifier.results_cache))
+
+    def test_results_cache_eviction(self):
+        cache = ClassificationResultCache(
+            posix_path(self.corpus.root.name, "results.sqlite")
+        )
+        with patch("time.time", return_value=1000.0):
+            cache.put_many("old", [("a", "A", 1.0), ("b", None, 0.5)])
+        with patch("time.time", return_value=2000.0):
+            cache.put_many("new", [("c", "C", 1.0), ("d", "D", 0.9)])
+        with patch("time.time", return_value=2500.0):
+            cache.evict(max_age=1000, max_size=10)
+        self.assertDictEqual({}, cache.get_many("old", ["a", "b"]))
+        self.assertEqual(2, len(cache))
+        with patch("time.time", return_value=3000.0):
+            cache.put_many("new", [("e", "E", 1.0)])
+            cache.evict(max_age=10000, max_size=2)
+        self.assertEqual(2, len(cache))
+        self.assertIn("e", cache.get_many("new", ["c", "d", "e"]))
+
+    def test_results_cache_is_keyed_by_learned_decks(self):
+        cache_file = posix_path(self.corpus.root.name, "results.sqlite")
+        classifier = self.corpus.classifier(results_cache_file=cache_file)
+        deck = copy_deck(self.corpus.queries[0])
+        archetype, _ = classifier.classify_deck(deck)
+        classifier.learn_deck(deck, archetype)
+        self.assertEqual((archetype, 1.0), classifier.classify_deck(copy_deck(deck)))
+        self.assertEqual(2, len(classifier.results_cache))
+        cached = self.corpus.classifier(results_cache_file=cache_file)
+        with patch.object(
+            cached, "_classify_simplified_deck", side_effect=AssertionError
+        ):
+            deck = copy_deck(self.corpus.queries[0])
+            self.assertEqual(archetype, cached.classify_deck(deck)[0])
+            cached.learn_deck(deck, archetype)
+            self.assertEqual((archetype, 1.0), cached.classify_deck(copy_deck(deck)))
+
+    def test_known_decks_include_learned_decks(self):
+        nr_known_decks = sum(len(d) for d in self.classifier.known_decks.values())
+        deck = copy_deck(self.corpus.queries[0])
+        archetype, _ = self.classifier.classify_deck(deck)
+        self.classifier.learn_deck(deck, archetype)
+        known_decks = self.classifier.known_decks
+        self.assertEqual(nr_known_decks + 1, sum(len(d) for d in known_decks.values()))
+        self.assertEqual(deck.digest, known_decks[archetype][-1].digest)
+        self.classifier.learn_deck(copy_deck(deck), archetype)
+        self.assertEqual(
+            nr_known_decks + 2,
+            sum(len(d) for d in self.classifier.known_decks.values()),
+        )
+
+    def test_learned_index_matches_fingerprint_index(self):
+        vocabulary = CardVocabulary()
+        learned = LearnedDeckIndex(vocabulary, capacity=7)
+        decks = [copy_deck(q) for q in self.corpus.queries]
+        labels = [i % 3 for i in range(len(decks))]
+        rng = np.random.default_rng(0)
+        for end in (5, 7, 12, len(decks)):
+            for i in range(len(learned), end):
+                learned.add(decks[i], labels[i])
+            self.assertEqual(min(end, 7), len(learned))
+            expected_index = DeckFingerprintIndex(vocabulary)
+            for i in range(max(0, end - 7), end):
+                expected_index.add(decks[i], labels[i])
+            queries = expected_index.fingerprint(decks)
+            mask = rng.random((len(decks), 3)) < 0.7
+            # rows of both indexes are in insertion order
+            expected = expected_index.similarities(queries)
+            expected = np.where(
+                mask[
+                    :, [expected_index.labels[i] for i in expected_index.row_label_ids]
+                ],
+                expected,
+                0.0,
+            )
+            actual = learned.masked_similarities(
+                queries, mask[:, [learned.labels.index(label) for label in range(3)]]
+            )
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_get_dpl_metagame_learns_decks(self):
+        decks = self._get_dpl_decks()
+        nr_known_decks = len(self.classifier.known_index)
+        expected = []
+        for query in self.corpus.queries:
+            archetype, score = self.classifier.classify_deck(copy_deck(query))
+            expected.append(score)
+            if score >= BREW_CLASSIFICATION_THRESHOLD:
+                self.classifier.learn_deck(copy_deck(query), archetype)
+        classifier = self.corpus.classifier()
+        dpl_meta = classifier.get_dpl_metagame(decks)
+        self.assertListEqual(expected, [d.accuracy for d in dpl_meta.dpl_decks])
+        self.assertEqual(nr_known_decks, len(classifier.known_index))
+        self.assertEqual(
+            len(self.classifier.learned_index), len(classifier.learned_index)
+        )
+
+    def test_get_dpl_metagame_without_learning(self):
+        decks = self._get_dpl_decks()
+        dpl_meta = self.classifier.get_dpl_metagame(decks, learn_on_the_fly=False)
+        for dpl_deck, query in zip(dpl_meta.dpl_decks, self.corpus.queries):
+            _, score = self.classifier.classify_deck(copy_deck(query))
+            self.assertEqual(score, dpl_deck.accuracy)
+
+    def _get_dpl_decks(self):
+        return [
+            {
+                "id": str(i),
+                "cards": {
+                    "mainboard": [
+                        {"quantity": c.quantity, "name": c.card_name}
+                        for c in q.mainboard
+                    ],
+                    "sideboard": [
+                        {"quantity": c.quantity, "name": c.card_name}
+                        for c in q.sideboard
+                    ],
+                },
+            }
+            for i, q in enumerate(self.corpus.queries)
+        ]
+
+
+if __name__ == "__main__":
+    unittest.main()
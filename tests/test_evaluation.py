@@ -0,0 +1,128 @@
+import json
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from pauperformance_bot.entity.deck.compact import CompactDeck
+from pauperformance_bot.service.pauperformance.silver.deck_index import (
+    DeckFingerprintIndex,
+)
+from pauperformance_bot.service.pauperformance.silver.evaluation import (
+    BREW_LABEL,
+    ClassifierEvaluation,
+    cross_validate,
+    evaluate_classifier,
+)
+from pauperformance_bot.util.path import posix_path
+from tests.test_decklassifier import SyntheticCorpus
+
+
+def archetype(name):
+    a = Mock()
+    a.name = name
+    return a
+
+
+class TestCrossValidation(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus()
+        self.classifier = self.corpus.classifier()
+        self.rows = list(self.classifier.known_index.rows())
+
+    def tearDown(self):
+        self.corpus.cleanup()
+
+    def classify_without(self, i, held_out_rows):
+        # retrains the classifier without the held out rows, adding the other
+        # ones in visiting order, so that ties are broken as before
+        classifier = self.corpus.classifier()
+        known_index = DeckFingerprintIndex(classifier.vocabulary)
+        for j in self.classifier.known_index.row_order:
+            label, mainboard, sideboard = self.rows[j]
+            if j not in held_out_rows:
+                known_index.add(
+                    CompactDeck.from_cards_maps(mainboard, sideboard), label
+                )
+        classifier.known_index = known_index
+        _, mainboard, sideboard = self.rows[i]
+        deck = CompactDeck.from_cards_maps(mainboard, sideboard).to_playable()
+        return classifier.classify_deck(deck)
+
+    def test_leave_one_out_matches_retraining(self):
+        labels, classifications = cross_validate(self.classifier)
+        self.assertListEqual([label.name for label, _, _ in self.rows], labels)
+        for i in range(0, len(self.rows), 7):
+            self.assertEqual(self.classify_without(i, {i}), classifications[i])
+
+    def test_k_fold_matches_retraining(self):
+        _, classifications = cross_validate(self.classifier, folds=4)
+        for i in range(0, len(self.rows), 9):
+            fold = {j for j in range(len(self.rows)) if j % 4 == i % 4}
+            self.assertEqual(self.classify_without(i, fold), classifications[i])
+
+    def test_concurrent_batches(self):
+        expected = cross_validate(self.classifier, folds=3)
+        actual = cross_validate(self.classifier, folds=3, batch_size=7, max_workers=4)
+        self.assertEqual(expected, actual)
+
+    def test_evaluate_classifier(self):
+        evaluation = evaluate_classifier(self.classifier, brew_threshold=None)
+        self.assertEqual(len(self.rows), evaluation.nr_decks)
+        self.assertGreater(evaluation.accuracy, 0.8)
+        self.assertNotIn(BREW_LABEL, evaluation.archetypes)
+        # nothing is that similar: all the decks are classified as brews
+        strict = evaluate_classifier(self.classifier, brew_threshold=1.01)
+        self.assertEqual(0, strict.accuracy)
+        brew_id = strict.archetypes.index(BREW_LABEL)
+        self.assertEqual(len(self.rows), strict.confusion[:, brew_id].sum())
+
+
+class TestClassifierEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.evaluation = ClassifierEvaluation.from_classifications(
+            ["Burn", "Burn", "Burn", "Faeries", "Faeries", "Brew"],
+            [
+                (archetype("Burn"), 0.9),
+                (archetype("Burn"), 0.8),
+                (archetype("Faeries"), 0.9),
+                (archetype("Faeries"), 0.5),
+                (archetype("Faeries"), 0.95),
+                (None, 0),
+            ],
+            folds=5,
+            brew_threshold=0.78,
+        )
+
+    def test_confusion(self):
+        self.assertListEqual(["Brew", "Burn", "Faeries"], self.evaluation.archetypes)
+        self.assertListEqual(
+            [[1, 0, 0], [0, 2, 1], [1, 0, 1]], self.evaluation.confusion.tolist()
+        )
+        self.assertAlmostEqual(4 / 6, self.evaluation.accuracy)
+
+    def test_precision_recall(self):
+        precision_recall = self.evaluation.precision_recall()
+        self.assertEqual((0.5, 1.0, 1), precision_recall["Brew"])
+        self.assertEqual((1.0, 2 / 3, 3), precision_recall["Burn"])
+        self.assertEqual((0.5, 0.5, 2), precision_recall["Faeries"])
+
+    def test_empty(self):
+        evaluation = ClassifierEvaluation.from_classifications([], [])
+        self.assertEqual(0, evaluation.nr_decks)
+        self.assertEqual(1.0, evaluation.accuracy)
+        self.assertDictEqual({}, evaluation.precision_recall())
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            evaluation_file = posix_path(tmp_dir, "evaluation.json")
+            self.evaluation.save(evaluation_file)
+            with open(evaluation_file) as in_f:
+                saved = json.load(in_f)
+        self.assertEqual(5, saved["folds"])
+        self.assertEqual(self.evaluation.confusion.tolist(), saved["confusion"])
+        self.assertEqual(2, saved["precision_recall"]["Faeries"]["support"])
+        self.assertAlmostEqual(4 / 6, saved["accuracy"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import random
+import unittest
+
+from pauperformance_bot.util.json_stream import (
+    JSONArrayStream,
+    aiter_json_array,
+    iter_json_array,
+)
+
+ITEMS = [
+    1,
+    -2.5e3,
+    'Lotus Petal, "quoted" and è',
+    None,
+    True,
+    {"id": "1", "cards": {"mainboard": [{"quantity": 4, "name": "Ponder"}]}},
+    [[], {}],
+]
+
+
+def parse(document, key=None, seed=0):
+    rng = random.Random(seed)
+    data = document.encode("utf-8")
+    stream = JSONArrayStream(key)
+    items, start = [], 0
+    while start < len(data):
+        end = start + rng.randint(1, 7)
+        items += stream.feed(data[start:end])
+        start = end
+    return items + stream.close()
+
+
+class TestJSONArrayStream(unittest.TestCase):
+    def test_top_level_array(self):
+        for seed in range(20):
+            self.assertListEqual(ITEMS, parse(json.dumps(ITEMS), seed=seed))
+            self.assertListEqual(ITEMS, parse(json.dumps(ITEMS, indent=2), seed=seed))
+
+    def test_array_in_object(self):
+        document = json.dumps({"format": {"decks": 0}, "n": 12, "decks": ITEMS, "x": 1})
+        for seed in range(20):
+            self.assertListEqual(ITEMS, parse(document, key="decks", seed=seed))
+
+    def test_empty_array(self):
+        self.assertListEqual([], parse("[]"))
+        self.assertListEqual([], parse(' { "decks" : [ ] } ', key="decks"))
+
+    def test_items_are_returned_once_complete(self):
+        stream = JSONArrayStream()
+        self.assertListEqual([{"a": 1}], stream.feed(b'[{"a": 1}, 2'))
+        self.assertListEqual([], stream.feed(b"3"))
+        self.assertListEqual([23], stream.feed(b", 4"))
+        self.assertListEqual([4], stream.feed(b"]"))
+        self.assertListEqual([], stream.close())
+
+    def test_invalid_documents(self):
+        for document, key in [
+            ("[1, 2", None),
+            ("[1 2]", None),
+            ("[,]", None),
+            ('{"a": 1}', "decks"),
+            ('["decks"]', "decks"),
+            ("", None),
+        ]:
+            with self.assertRaises(ValueError):
+                parse(document, key)
+
+    def test_aiter_json_array(self):
+        async def chunks():
+            for chunk in (b'{"decks": [1, ', b'{"b": 2}', b"]}"):
+                yield chunk
+
+        async def collect():
+            return [item async for item in aiter_json_array(chunks(), "decks")]
+
+        self.assertListEqual([1, {"b": 2}], asyncio.run(collect()))
+
+    def test_iter_json_array(self):
+        chunks = (b'{"decks": [1, ', b'{"b": 2}', b"]}")
+        self.assertListEqual([1, {"b": 2}], list(iter_json_array(chunks, "decks")))
+
+
+if __name__ == "__main__":
+    unittest.main()
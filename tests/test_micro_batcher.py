@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pauperformance_bot.service.pauperformance.silver.micro_batcher import (
+    LatencyStats,
+    MicroBatcher,
+)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def square(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        return [item * item for item in items]
+
+    def test_results_are_scattered_back(self):
+        batcher = MicroBatcher(self.square, batch_size=4, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(10)]
+        self.assertListEqual([i * i for i in range(10)], [f.result() for f in futures])
+        batcher.close()
+        self.assertTrue(all(len(batch) <= 4 for batch in self.batches))
+        self.assertEqual(list(range(10)), [i for batch in self.batches for i in batch])
+        stats = batcher.stats()
+        self.assertEqual(10, stats["items"])
+        self.assertEqual(len(self.batches), stats["batches"])
+        self.assertEqual(10, len(batcher.latencies))
+
+    def test_concurrent_callers_are_coalesced(self):
+        batcher = MicroBatcher(self.square, batch_size=64, max_wait=0.2)
+        barrier = threading.Barrier(16)
+
+        def call(i):
+            barrier.wait()
+            return batcher.process(i)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(call, range(16)))
+        batcher.close()
+        self.assertListEqual([i * i for i in range(16)], results)
+        self.assertLess(len(self.batches), 16)
+
+    def test_max_wait_bounds_latency(self):
+        batcher = MicroBatcher(self.square, batch_size=1000, max_wait=0.01)
+        start = time.perf_counter()
+        self.assertEqual(9, batcher.process(3))
+        self.assertLess(time.perf_counter() - start, 1)
+        batcher.close()
+
+    def test_exceptions_are_propagated(self):
+        def fail(items):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(fail, batch_size=2, max_wait=0)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            self.assertRaises(RuntimeError, future.result)
+        batcher.close()
+        self.assertEqual(0, batcher.stats()["items"])
+
+    def test_missing_results_are_propagated(self):
+        batcher = MicroBatcher(lambda items: items[1:], batch_size=3, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            self.assertRaises(ValueError, future.result, timeout=5)
+        batcher.close()
+        self.assertEqual(0, batcher.stats()["items"])
+
+    def test_close_processes_pending_items(self):
+        batcher = MicroBatcher(self.square, batch_size=2, max_wait=10, concurrency=2)
+        futures = [batcher.submit(i) for i in range(5)]
+        batcher.close()
+        self.assertListEqual([i * i for i in range(5)], [f.result() for f in futures])
+
+    def test_invalid_batching(self):
+        for batch_size, max_wait, concurrency in [(0, 1, 1), (1, -1, 1), (1, 1, 0)]:
+            with self.assertRaises(ValueError):
+                MicroBatcher(self.square, batch_size, max_wait, concurrency)
+
+    def test_latency_percentiles(self):
+        latencies = LatencyStats(window=100)
+        self.assertDictEqual(
+            {"p50": 0.0, "p90": 0.0, "p99": 0.0}, latencies.percentiles()
+        )
+        latencies.record(i / 1000 for i in range(1, 201))
+        self.assertEqual(100, len(latencies))
+        percentiles = latencies.percentiles((0, 50, 100))
+        self.assertAlmostEqual(101, percentiles["p0"])
+        self.assertAlmostEqual(150.5, percentiles["p50"])
+        self.assertAlmostEqual(200, percentiles["p100"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,20 @@
 import unittest
 
 from pauperformance_bot.util.naming import (
+    TYPOS,
+    fix_card_name,
     is_valid_p12e_deck_name,
     is_valid_p12e_deckstats_name,
 )
 
 
+def fix_card_name_in_order(card_name):
+    """The plain loop fix_card_name is expected to be equivalent to."""
+    for typo, fix in TYPOS.items():
+        card_name = card_name.replace(typo, fix)
+    return card_name
+
+
 class TestIsValidP12eDeckstatsName(unittest.TestCase):
     def test_valid_single_word_archetype(self):
         self.assertTrue(is_valid_p12e_deckstats_name("Burn 123.001"))
@@ -69,5 +78,29 @@ class TestIsValidP12eDeckName(unittest.TestCase):
         self.assertTrue(is_valid_p12e_deck_name("Affinity 99.999.Player"))
 
 
+class TestFixCardName(unittest.TestCase):
+    def test_names_without_typos_are_unchanged(self):
+        for card_name in ["Lightning Bolt", "Counterspell", "Island", ""]:
+            self.assertEqual(card_name, fix_card_name(card_name))
+
+    def test_fixes_are_chained(self):
+        self.assertEqual("Plains", fix_card_name("Plain"))
+        self.assertEqual("Plains", fix_card_name("Plains"))
+        self.assertEqual("Snow-Covered Plains", fix_card_name("Snow-Covered plain"))
+        self.assertEqual("Village Rites", fix_card_name("Village Rite"))
+        self.assertEqual("Viridian Longbow", fix_card_name("Viridian Longbo"))
+        self.assertEqual("Lightning Bolt", fix_card_name("SB: 2 lightining bolt"))
+
+    def test_same_as_fixing_in_order(self):
+        card_names = list(TYPOS) + list(TYPOS.values())
+        card_names += [f"SB: 1 {typo}" for typo in TYPOS]
+        card_names += [f"{typo} &amp; {fix}" for typo, fix in TYPOS.items()]
+        card_names += ["Plainsss", "Plain Plainss", "archeomancer's archeomance"]
+        for card_name in card_names:
+            self.assertEqual(
+                fix_card_name_in_order(card_name), fix_card_name(card_name), card_name
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
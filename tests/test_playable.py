@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import Mock
 
@@ -6,6 +8,8 @@ from pauperformance_bot.entity.deck.playable import (
     PlayableDeck,
     PlayedCard,
     get_decks_diff,
+    parse_playable_deck_from_file,
+    parse_playable_deck_from_text,
 )
 
 
@@ -51,6 +55,139 @@ class TestPlayableDeck(unittest.TestCase):
         self.assertListEqual(data.DECK_SIDE[:-1], pd.sideboard)
 
 
+class TestParsePlayableDeck(unittest.TestCase):
+    def _deck_text(self, end):
+        main = "\n".join(str(c) for c in data.DECK_MAIN)
+        side = "\n".join(str(c) for c in data.DECK_SIDE)
+        return f"{main}\n\n{side}{end}"
+
+    def test_last_sideboard_card_is_kept(self):
+        for end in ("", "\n", "\n\n", "\r\n"):
+            with self.subTest(end=repr(end)):
+                pd = parse_playable_deck_from_text(self._deck_text(end))
+
+                self.assertEqual(pd, PlayableDeck(data.DECK_MAIN, data.DECK_SIDE))
+                self.assertEqual(pd.len_sideboard, 15)
+
+    def test_file_parsed_as_text(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            deck_file = os.path.join(tmp_dir, "deck.txt")
+            with open(deck_file, "w") as out_f:
+                out_f.write(self._deck_text("\n"))
+
+            pd = parse_playable_deck_from_file(deck_file)
+
+        self.assertEqual(pd, PlayableDeck(data.DECK_MAIN, data.DECK_SIDE))
+
+
+class TestPlayableDeckCardViews(unittest.TestCase):
+    def _deck(self):
+        return PlayableDeck(list(data.DECK_MAIN), list(data.DECK_SIDE))
+
+    def assertViewsCurrent(self, pd):
+        fresh = PlayableDeck(list(pd.mainboard), list(pd.sideboard))
+        self.assertDictEqual(
+            dict(fresh.mainboard_cards_map), dict(pd.mainboard_cards_map)
+        )
+        self.assertDictEqual(
+            dict(fresh.sideboard_cards_map), dict(pd.sideboard_cards_map)
+        )
+        self.assertSetEqual(fresh.card_names, pd.card_names)
+
+    def test_cards_map(self):
+        pd = self._deck()
+        self.assertEqual(4, pd.mainboard_cards_map["Thermo-Alchemist"])
+        self.assertEqual(3, pd.sideboard_cards_map["Electrickery"])
+        cards_map = pd.mainboard_cards_map
+        cards_map["Thermo-Alchemist"] = 1
+        self.assertEqual(4, pd.mainboard_cards_map["Thermo-Alchemist"])
+        self.assertViewsCurrent(pd)
+
+    def test_add_existing_card_case_insensitive(self):
+        pd = self._deck()
+        pd.add_mainboard_card(PlayedCard(2, "thermo-alchemist"))
+        self.assertEqual(6, pd.mainboard_cards_map["Thermo-Alchemist"])
+        self.assertNotIn("thermo-alchemist", pd)
+        self.assertViewsCurrent(pd)
+
+    def test_add_new_card(self):
+        pd = self._deck()
+        self.assertNotIn("Fake Card", pd)
+        pd.add_sideboard_card(PlayedCard(1, "Fake Card"))
+        self.assertIn("Fake Card", pd)
+        self.assertEqual(PlayedCard(1, "Fake Card"), pd.sideboard[-1])
+        self.assertViewsCurrent(pd)
+
+    def test_remove_card(self):
+        pd = self._deck()
+        pd.remove_mainboard_card(PlayedCard(1, "Voldaren Epicure"))
+        self.assertEqual(3, pd.mainboard_cards_map["Voldaren Epicure"])
+        pd.remove_mainboard_card(PlayedCard(3, "voldaren epicure"))
+        self.assertNotIn("Voldaren Epicure", pd)
+        self.assertNotIn("Voldaren Epicure", pd.mainboard_cards_map)
+        pd.add_mainboard_card(PlayedCard(1, "Needle Drop"))
+        self.assertViewsCurrent(pd)
+
+    def test_remove_missing_card(self):
+        pd = self._deck()
+        with self.assertRaises(ValueError):
+            pd.remove_mainboard_card(PlayedCard(1, "Fake Card"))
+        with self.assertRaises(ValueError):
+            pd.remove_sideboard_card(PlayedCard(4, "Electrickery"))
+        self.assertViewsCurrent(pd)
+
+    def test_shared_cards_are_not_mutated(self):
+        pd1, pd2 = self._deck(), self._deck()
+        pd1.add_mainboard_card(PlayedCard(1, "Thermo-Alchemist"))
+        pd1.remove_sideboard_card(PlayedCard(1, "Electrickery"))
+        self.assertEqual(4, pd2.mainboard_cards_map["Thermo-Alchemist"])
+        self.assertEqual(3, pd2.sideboard_cards_map["Electrickery"])
+        self.assertListEqual(data.DECK_MAIN, pd2.mainboard)
+
+    def test_duplicated_card_names(self):
+        main = list(data.DECK_MAIN) + [PlayedCard(2, "Thermo-Alchemist")]
+        pd = PlayableDeck(main, [])
+        self.assertEqual(2, pd.mainboard_cards_map["Thermo-Alchemist"])
+        pd.add_mainboard_card(PlayedCard(1, "Thermo-Alchemist"))
+        self.assertEqual(5, pd.mainboard[0].quantity)
+        self.assertViewsCurrent(pd)
+
+
+class TestPlayableDeckDigest(unittest.TestCase):
+    def test_digest_ignores_order_case_and_repeated_cards(self):
+        pd = PlayableDeck(list(data.DECK_MAIN), list(data.DECK_SIDE))
+        first, *others = data.DECK_MAIN
+        main = [
+            PlayedCard(first.quantity - 1, first.card_name.lower()),
+            *reversed(others),
+            PlayedCard(1, first.card_name.upper()),
+        ]
+        shuffled = PlayableDeck(main, list(reversed(data.DECK_SIDE)))
+        self.assertEqual(pd.digest, shuffled.digest)
+        self.assertEqual(pd, shuffled)
+        self.assertEqual(hash(pd), hash(shuffled))
+        self.assertEqual(1, len({pd, shuffled}))
+
+    def test_digest_tells_boards_apart(self):
+        pd = PlayableDeck(list(data.DECK_MAIN), list(data.DECK_SIDE))
+        swapped = PlayableDeck(list(data.DECK_SIDE), list(data.DECK_MAIN))
+        self.assertNotEqual(pd.digest, swapped.digest)
+        self.assertNotEqual(pd, swapped)
+
+    def test_digest_is_current(self):
+        pd = PlayableDeck(list(data.DECK_MAIN), list(data.DECK_SIDE))
+        digest = pd.digest
+        self.assertIs(digest, pd.digest)
+        pd.add_mainboard_card(PlayedCard(1, "Fake Card"))
+        self.assertNotEqual(digest, pd.digest)
+        pd.remove_mainboard_card(PlayedCard(1, "Fake Card"))
+        self.assertEqual(digest, pd.digest)
+        pd.remove_sideboard_card(PlayedCard(1, "Electrickery"))
+        self.assertEqual(
+            PlayableDeck(list(pd.mainboard), list(pd.sideboard)).digest, pd.digest
+        )
+
+
 class TestPlayedCard(unittest.TestCase):
     def test_equality_case_insensitive(self):
         self.assertEqual(
@@ -46,19 +46,23 @@ class TestScryfallServiceGetCardNamed(unittest.TestCase):
         }
         mock_req.return_value = _mock_response(card_data)
         with tempfile.TemporaryDirectory() as tmpdir:
-            svc = ScryfallService()
+            svc = ScryfallService(card_stores_dir=tmpdir)
             result = svc.get_card_named("Lightning Bolt", cards_cache_dir=tmpdir)
             self.assertEqual(result["name"], "Lightning Bolt")
 
     @mock.patch("pauperformance_bot.service.mtg.scryfall.execute_http_request")
-    def test_cache_miss_writes_cache_file(self, mock_req):
+    def test_cache_miss_stores_card(self, mock_req):
         card_data = {"name": "Counterspell", "scryfall_uri": "https://x"}
         mock_req.return_value = _mock_response(card_data)
         with tempfile.TemporaryDirectory() as tmpdir:
-            svc = ScryfallService()
+            svc = ScryfallService(card_stores_dir=tmpdir)
             svc.get_card_named("Counterspell", cards_cache_dir=tmpdir)
-            cache_file = os.path.join(tmpdir, "Counterspell.pkl")
-            self.assertTrue(os.path.exists(cache_file))
+            self.assertIn("Counterspell.pkl", os.listdir(tmpdir))
+            result = ScryfallService(card_stores_dir=tmpdir).get_card_named(
+                "Counterspell", cards_cache_dir=tmpdir
+            )
+            self.assertEqual(card_data, result)
+            mock_req.assert_called_once()
 
     def test_cache_hit_returns_without_http(self):
         card_data = {"name": "Brainstorm", "scryfall_uri": "https://x"}
@@ -66,7 +70,7 @@ class TestScryfallServiceGetCardNamed(unittest.TestCase):
             cache_path = os.path.join(tmpdir, "Brainstorm.pkl")
             with open(cache_path, "wb") as f:
                 pickle.dump(card_data, f)
-            svc = ScryfallService()
+            svc = ScryfallService(card_stores_dir=tmpdir)
             result = svc.get_card_named("Brainstorm", cards_cache_dir=tmpdir)
             self.assertEqual(result["name"], "Brainstorm")
 
@@ -77,7 +81,7 @@ class TestScryfallServiceGetCardNamed(unittest.TestCase):
         exc.response = resp_mock
         mock_req.side_effect = exc
         with tempfile.TemporaryDirectory() as tmpdir:
-            svc = ScryfallService()
+            svc = ScryfallService(card_stores_dir=tmpdir)
             with self.assertRaises(CardNotFoundException):
                 svc.get_card_named("Nonexistent Card XYZ", cards_cache_dir=tmpdir)
 
@@ -88,11 +92,59 @@ class TestScryfallServiceGetCardNamed(unittest.TestCase):
         exc.response = resp_mock
         mock_req.side_effect = exc
         with tempfile.TemporaryDirectory() as tmpdir:
-            svc = ScryfallService()
+            svc = ScryfallService(card_stores_dir=tmpdir)
             with self.assertRaises(requests.exceptions.HTTPError):
                 svc.get_card_named("Some Card", cards_cache_dir=tmpdir)
 
 
+class TestScryfallServiceGetCardsNamed(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for name in ("Brainstorm", "Ponder"):
+            with open(os.path.join(self.tmpdir.name, f"{name}.pkl"), "wb") as f:
+                pickle.dump({"name": name}, f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @mock.patch("pauperformance_bot.service.mtg.scryfall.execute_http_request")
+    def test_cached_cards_without_http(self, mock_req):
+        svc = ScryfallService(card_stores_dir=self.tmpdir.name)
+        result = svc.get_cards_named(
+            ["Brainstorm", "ponder"], cards_cache_dir=self.tmpdir.name
+        )
+        self.assertEqual({"Brainstorm", "ponder"}, set(result))
+        self.assertEqual("Ponder", result["ponder"]["name"])
+        mock_req.assert_not_called()
+
+    @mock.patch("pauperformance_bot.service.mtg.scryfall.time.sleep")
+    @mock.patch("pauperformance_bot.service.mtg.scryfall.execute_http_request")
+    def test_fetches_missing_cards(self, mock_req, _):
+        mock_req.return_value = _mock_response({"name": "Preordain"})
+        svc = ScryfallService(card_stores_dir=self.tmpdir.name)
+        result = svc.get_cards_named(
+            ["Brainstorm", "Preordain"], cards_cache_dir=self.tmpdir.name
+        )
+        self.assertEqual("Preordain", result["Preordain"]["name"])
+        self.assertEqual(1, mock_req.call_count)
+        svc.get_cards_named(["Preordain"], cards_cache_dir=self.tmpdir.name)
+        self.assertEqual(1, mock_req.call_count)
+
+    @mock.patch("pauperformance_bot.service.mtg.scryfall.time.sleep")
+    @mock.patch("pauperformance_bot.service.mtg.scryfall.execute_http_request")
+    def test_missing_cards(self, mock_req, _):
+        resp_mock = mock.MagicMock(status_code=404)
+        mock_req.side_effect = requests.exceptions.HTTPError(response=resp_mock)
+        svc = ScryfallService(card_stores_dir=self.tmpdir.name)
+        names = ["Brainstorm", "Nonexistent Card XYZ"]
+        with self.assertRaises(CardNotFoundException):
+            svc.get_cards_named(names, cards_cache_dir=self.tmpdir.name)
+        result = svc.get_cards_named(
+            names, cards_cache_dir=self.tmpdir.name, skip_missing=True
+        )
+        self.assertEqual({"Brainstorm"}, set(result))
+
+
 class TestScryfallServiceSearchCards(unittest.TestCase):
     @mock.patch("pauperformance_bot.service.mtg.scryfall.execute_http_request")
     def test_single_page(self, mock_req):
@@ -177,44 +229,54 @@ class TestScryfallServiceGetArchetypeCards(unittest.TestCase):
             "scryfall_uri": f"https://scryfall.com/card/x/{name}?utm_source=api",
         }
 
-    @mock.patch.object(ScryfallService, "get_card_named")
+    @mock.patch.object(ScryfallService, "get_cards_named")
     def test_returns_archetype_card_list(self, mock_get):
-        mock_get.side_effect = lambda name, **kw: self._fake_card(name)
+        mock_get.side_effect = lambda names, **kw: {
+            name: self._fake_card(name) for name in names
+        }
         svc = ScryfallService()
         result = svc.get_archetype_cards(["Lightning Bolt"])
         self.assertEqual(len(result), 1)
         self.assertIsInstance(result[0], ArchetypeCard)
         self.assertEqual(result[0].name, "Lightning Bolt")
 
-    @mock.patch.object(ScryfallService, "get_card_named")
+    @mock.patch.object(ScryfallService, "get_cards_named")
     def test_image_query_string_stripped(self, mock_get):
-        mock_get.side_effect = lambda name, **kw: self._fake_card(name)
+        mock_get.side_effect = lambda names, **kw: {
+            name: self._fake_card(name) for name in names
+        }
         svc = ScryfallService()
         result = svc.get_archetype_cards(["Lightning Bolt"])
         self.assertNotIn("?", result[0].preview)
 
-    @mock.patch.object(ScryfallService, "get_card_named")
+    @mock.patch.object(ScryfallService, "get_cards_named")
     def test_utm_source_stripped_from_link(self, mock_get):
-        mock_get.side_effect = lambda name, **kw: self._fake_card(name)
+        mock_get.side_effect = lambda names, **kw: {
+            name: self._fake_card(name) for name in names
+        }
         svc = ScryfallService()
         result = svc.get_archetype_cards(["Lightning Bolt"])
         self.assertNotIn("utm_source", result[0].link)
 
-    @mock.patch.object(ScryfallService, "get_card_named")
+    @mock.patch.object(ScryfallService, "get_cards_named")
     def test_dfc_uses_first_face_image(self, mock_get):
         mock_get.return_value = {
-            "card_faces": [
-                {"image_uris": {"normal": "https://img.scryfall.com/delver.jpg"}}
-            ],
-            "scryfall_uri": "https://scryfall.com/card/b?utm_source=api",
+            "Delver of Secrets": {
+                "card_faces": [
+                    {"image_uris": {"normal": "https://img.scryfall.com/delver.jpg"}}
+                ],
+                "scryfall_uri": "https://scryfall.com/card/b?utm_source=api",
+            }
         }
         svc = ScryfallService()
         result = svc.get_archetype_cards(["Delver of Secrets"])
         self.assertEqual(result[0].preview, "https://img.scryfall.com/delver.jpg")
 
-    @mock.patch.object(ScryfallService, "get_card_named")
+    @mock.patch.object(ScryfallService, "get_cards_named")
     def test_cards_sorted_alphabetically(self, mock_get):
-        mock_get.side_effect = lambda name, **kw: self._fake_card(name)
+        mock_get.side_effect = lambda names, **kw: {
+            name: self._fake_card(name) for name in names
+        }
         svc = ScryfallService()
         result = svc.get_archetype_cards(["Swamp", "Lightning Bolt", "Forest"])
         names = [c.name for c in result]
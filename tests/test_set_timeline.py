@@ -0,0 +1,76 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from pauperformance_bot.service.pauperformance.set_timeline import SetTimeline
+
+
+def scan(sets, usa_date):
+    # the lookup SetTimeline replaces
+    return [s for s in sets if s["date"] <= usa_date][-1]
+
+
+def random_sets(rng, nr_sets):
+    start = date(1993, 8, 5)
+    return [
+        {
+            "p12e_code": i,
+            "date": (start + timedelta(days=rng.randint(0, 10000))).isoformat(),
+        }
+        for i in range(nr_sets)
+    ]
+
+
+class TestSetTimeline(unittest.TestCase):
+    def test_matches_scan(self):
+        rng = random.Random(0)
+        for nr_sets in (1, 2, 10, 200):
+            sets = random_sets(rng, nr_sets)
+            timeline = SetTimeline(sets)
+            self.assertEqual(nr_sets, len(timeline))
+            dates = [s["date"] for s in sets] + [
+                (date(1993, 8, 5) + timedelta(days=d)).isoformat()
+                for d in range(0, 10500, 37)
+            ]
+            for usa_date in dates:
+                if usa_date < min(s["date"] for s in sets):
+                    continue
+                self.assertIs(scan(sets, usa_date), timeline.get_set_at(usa_date))
+
+    def test_sets_out_of_order(self):
+        sets = [
+            {"p12e_code": 1, "date": "2020-01-01"},
+            {"p12e_code": 2, "date": "2022-01-01"},  # announced early
+            {"p12e_code": 3, "date": "2021-01-01"},
+            {"p12e_code": 4, "date": "2021-01-01"},
+        ]
+        timeline = SetTimeline(sets)
+        self.assertEqual(1, timeline.get_set_at("2020-12-31")["p12e_code"])
+        self.assertEqual(4, timeline.get_set_at("2021-06-01")["p12e_code"])
+        self.assertEqual(4, timeline.get_set_at("2023-01-01")["p12e_code"])
+
+    def test_no_set_released(self):
+        timeline = SetTimeline([{"p12e_code": 1, "date": "2020-01-01"}])
+        with self.assertRaises(IndexError):
+            timeline.get_set_at("2019-12-31")
+        with self.assertRaises(IndexError):
+            SetTimeline([]).get_set_at("2020-01-01")
+
+    def test_set_index(self):
+        set_index = {
+            1: {"p12e_code": 1, "date": "2020-01-01"},
+            2: {"p12e_code": 2, "date": "2020-06-01"},
+            3: {"p12e_code": 3, "date": "2021-01-01"},
+        }
+        # like the sets with no new pauper cards, set 2 is left out
+        timeline = SetTimeline([set_index[1], set_index[3]])
+        for usa_date, p12e_code in [
+            ("2020-01-01", 1),
+            ("2020-12-31", 1),
+            ("2021-01-01", 3),
+        ]:
+            self.assertIs(set_index[p12e_code], timeline.get_set_at(usa_date))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import os
+import unittest
+
+from pauperformance_bot.constant.pauperformance.myr import (
+    DPL_DECK_SOURCE,
+    MTGGOLDFISH_DECK_SOURCE,
+)
+from pauperformance_bot.service.pauperformance.silver.benchmark import (
+    BenchmarkFixture,
+    PrefilterComparison,
+    _rate,
+    build_benchmark_fixture,
+    run_benchmark,
+)
+from pauperformance_bot.util.path import posix_path
+from tests.test_decklassifier import SyntheticCorpus, deck_lines
+
+
+class TestSilverBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus()
+        cache_dir = posix_path(self.corpus.root.name, "mtggoldfish_decks")
+        os.makedirs(cache_dir)
+        for i, query in enumerate(self.corpus.queries[:10]):
+            with open(posix_path(cache_dir, f"{i}.txt"), "w") as out_f:
+                out_f.write("\n".join(deck_lines(query)))
+        myr_fs = self.corpus.pauperformance.config_reader.myr_file_system
+        myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR = cache_dir
+        self.fixture = build_benchmark_fixture(
+            self.corpus.pauperformance, self.corpus.academy_fs, max_queries=8
+        )
+
+    def tearDown(self):
+        self.corpus.cleanup()
+
+    def test_build_benchmark_fixture(self):
+        nr_labelled = 8 * 12 + 1
+        self.assertEqual(nr_labelled, len(self.fixture.labelled_decks))
+        self.assertSetEqual(
+            {MTGGOLDFISH_DECK_SOURCE, DPL_DECK_SOURCE},
+            {d[0] for d in self.fixture.labelled_decks},
+        )
+        self.assertSetEqual(
+            set(self.corpus.reference_decks), set(self.fixture.reference_decks)
+        )
+        self.assertEqual(8, len(self.fixture.queries))
+
+    def test_fixture_is_frozen(self):
+        fixture_file = posix_path(self.corpus.root.name, "fixture.json")
+        self.fixture.save(fixture_file)
+        fixture = BenchmarkFixture.load(fixture_file)
+        self.assertEqual(self.fixture.digest, fixture.digest)
+        self.assertListEqual(self.fixture.labelled_decks, fixture.labelled_decks)
+
+    def test_run_benchmark(self):
+        benchmark = run_benchmark(
+            self.fixture, self.corpus.archetypes, holdout=4, rounds=1
+        )
+        nr_labelled = len(self.fixture.labelled_decks)
+        self.assertEqual(self.fixture.digest, benchmark.fixture_digest)
+        self.assertEqual((nr_labelled + 3) // 4, benchmark.nr_test_decks)
+        self.assertEqual(
+            nr_labelled, benchmark.nr_training_decks + benchmark.nr_test_decks
+        )
+        self.assertEqual(benchmark.nr_test_decks + 8, benchmark.nr_queries)
+        self.assertSetEqual({"p50", "p90", "p99"}, set(benchmark.latency_ms))
+        self.assertGreater(benchmark.throughput, 0)
+        self.assertGreater(benchmark.peak_memory_mb, 0)
+        self.assertGreaterEqual(benchmark.top1_agreement, 0.8)
+        again = run_benchmark(self.fixture, self.corpus.archetypes, holdout=4)
+        self.assertEqual(benchmark.top1_agreement, again.top1_agreement)
+
+        results_file = posix_path(self.corpus.root.name, "results.jsonl")
+        benchmark.save(results_file)
+        again.save(results_file)
+        with open(results_file) as in_f:
+            results = [json.loads(line) for line in in_f]
+        self.assertEqual(2, len(results))
+        self.assertEqual(benchmark.latency_ms, results[0]["latency_ms"])
+
+    def test_rates_over_no_decks_are_undefined(self):
+        self.assertIsNone(_rate([], []))
+        self.assertEqual(0.5, _rate(["a", "b"], ["a", "c"]))
+        comparison = PrefilterComparison(
+            top_n=5,
+            nr_decks=0,
+            exhaustive_accuracy=None,
+            prefilter_accuracy=None,
+            agreement=None,
+        )
+        self.assertIsNone(comparison.accuracy_loss)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import unittest
+
+from pauperformance_bot.service.pauperformance.silver.similarity_graph import (
+    DeckSimilarityGraph,
+    build_similarity_graph,
+    build_tournament_similarity_graph,
+)
+from pauperformance_bot.util.path import posix_path
+from tests.test_decklassifier import SyntheticCorpus, copy_deck, deck_lines
+
+
+class TestSimilarityGraph(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus()
+        self.classifier = self.corpus.classifier()
+        self.decks = [(str(i), q) for i, q in enumerate(self.corpus.queries)]
+        self.decks += list(self.corpus.reference_decks.items())
+        # a resubmission of the first deck, and an almost identical one
+        self.decks.append(("copy", copy_deck(self.decks[0][1])))
+        self.decks.append(("almost", copy_deck(self.decks[0][1])))
+        self.decks[-1][1].remove_sideboard_card(self.decks[-1][1].sideboard[0])
+
+    def tearDown(self):
+        self.corpus.cleanup()
+
+    def pairwise_neighbours(self, deck_id, deck, min_similarity):
+        neighbours = [
+            (other_id, self.classifier.get_similarity(deck, other))
+            for other_id, other in self.decks
+            if other_id != deck_id
+        ]
+        return sorted(
+            [(other_id, s) for other_id, s in neighbours if s >= min_similarity],
+            key=lambda n: -n[1],
+        )
+
+    def test_graph_matches_pairwise_similarities(self):
+        graph = build_similarity_graph(
+            self.decks, k=len(self.decks), min_similarity=0.3, block_size=16
+        )
+        self.assertEqual(len(self.decks), len(graph))
+        for deck_id, deck in self.decks:
+            expected = self.pairwise_neighbours(deck_id, deck, 0.3)
+            actual = graph.get_neighbours(deck_id)
+            self.assertListEqual([s for _, s in expected], [s for _, s in actual])
+            self.assertSetEqual(set(expected), set(actual))
+
+    def test_top_k(self):
+        graph = build_similarity_graph(self.decks, k=5, min_similarity=0.3)
+        for deck_id, deck in self.decks:
+            expected = self.pairwise_neighbours(deck_id, deck, 0.3)[:5]
+            actual = graph.get_neighbours(deck_id)
+            self.assertListEqual([s for _, s in expected], [s for _, s in actual])
+            self.assertListEqual(actual[:2], graph.get_neighbours(deck_id, k=2))
+
+    def test_blocks_do_not_change_the_graph(self):
+        graph = build_similarity_graph(self.decks, k=5, min_similarity=0.3)
+        blocked = build_similarity_graph(
+            self.decks, k=5, min_similarity=0.3, block_size=7
+        )
+        self.assertEqual(0, (graph.neighbours != blocked.neighbours).nnz)
+
+    def test_near_duplicates(self):
+        graph = build_similarity_graph(self.decks, k=3)
+        near_duplicates = graph.get_near_duplicates(0.95)
+        self.assertEqual(("0", "copy", 1.0), near_duplicates[0])
+        self.assertSetEqual(
+            {("0", "almost"), ("copy", "almost")},
+            {(d1, d2) for d1, d2, _ in near_duplicates[1:]},
+        )
+
+    def test_save_and_load(self):
+        graph = build_similarity_graph(self.decks, k=4)
+        graph_file = posix_path(self.corpus.root.name, "graph.npz")
+        graph.save(graph_file)
+        loaded = DeckSimilarityGraph.load(graph_file)
+        self.assertListEqual(graph.deck_ids, loaded.deck_ids)
+        for deck_id, _ in self.decks:
+            self.assertListEqual(
+                graph.get_neighbours(deck_id), loaded.get_neighbours(deck_id)
+            )
+
+    def test_tiny_graphs(self):
+        self.assertEqual(0, build_similarity_graph([]).nr_edges)
+        graph = build_similarity_graph(self.decks[:1])
+        self.assertListEqual([], graph.get_neighbours("0"))
+        with self.assertRaises(ValueError):
+            build_similarity_graph(self.decks, min_similarity=0)
+
+    def test_build_tournament_similarity_graph(self):
+        myr_fs = self.corpus.pauperformance.config_reader.myr_file_system
+        myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR = posix_path(self.corpus.root.name, "c")
+        os.makedirs(myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR)
+        for deck_id, deck in self.decks[:5]:
+            deck_file = posix_path(myr_fs.MTGGOLDFISH_DECKS_CACHE_DIR, f"{deck_id}.txt")
+            with open(deck_file, "w") as out_f:
+                out_f.write("\n".join(deck_lines(deck)))
+        graph_file = posix_path(self.corpus.root.name, "graph.npz")
+        graph = build_tournament_similarity_graph(
+            self.corpus.academy_fs, myr_fs, graph_file, k=3
+        )
+        tournament_dir = (
+            self.corpus.academy_fs.ASSETS_DATA_DECK_MTGGOLDFISH_TOURNAMENT_DIR
+        )
+        self.assertEqual(len(os.listdir(tournament_dir)) + 5, len(graph))
+        self.assertListEqual(
+            graph.deck_ids, DeckSimilarityGraph.load(graph_file).deck_ids
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()